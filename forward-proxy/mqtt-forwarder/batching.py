@@ -0,0 +1,144 @@
+"""Packs spooled MQTT messages into batches sent as one IoT Hub message each.
+
+A batch body is a JSON envelope, optionally gzip or zstd compressed:
+
+    {"format": "forwarder-batch/v1", "entries": [
+        {"original-topic": "tele/plug-1/SENSOR", "timestamp": 1735689600.123, "payload": {...}},
+        ...
+    ]}
+
+JSON payloads (all Tasmota SENSOR/STATE telemetry) are spliced in as-is
+without re-encoding; anything else is carried as "payload_text". The
+encoding and entry count travel as message properties (batch-format,
+batch-encoding, batch-count); the process_iot_hub_message function unpacks
+batches back into individual readings.
+"""
+
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+from spool import DiskSpool, SpoolRecord
+
+BATCH_FORMAT = "forwarder-batch/v1"
+ENCODINGS = ("none", "gzip", "zstd")
+
+_ENVELOPE_HEAD = b'{"format":"' + BATCH_FORMAT.encode() + b'","entries":['
+_ENVELOPE_TAIL = b"]}"
+
+
+def resolve_encoding(encoding: str) -> str:
+    """The encoding actually used: zstd falls back to gzip without the zstandard package."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown batch encoding '{encoding}', expected one of {ENCODINGS}")
+    if encoding == "zstd" and zstandard is None:
+        return "gzip"
+    return encoding
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def is_json(payload: bytes) -> bool:
+    try:
+        json.loads(payload)
+    except ValueError:
+        return False
+    return True
+
+
+def encode_entry(record: SpoolRecord) -> bytes:
+    """
+    One envelope entry; JSON payloads are spliced in, not re-serialized.
+
+    Validity comes from the edge stage's parse when the record carries it;
+    only records without it (read back from disk, edge stages disabled)
+    are parsed here.
+    """
+    head = json.dumps(
+        {"original-topic": record.topic, "timestamp": record.timestamp}, separators=(",", ":")
+    )[:-1]
+    valid = record.is_json if record.is_json is not None else is_json(record.payload)
+    if valid:
+        return head.encode() + b',"payload":' + record.payload + b"}"
+    text = record.payload.decode("utf-8", errors="replace")
+    return (head + ',"payload_text":' + json.dumps(text) + "}").encode()
+
+
+@dataclass
+class Batch:
+    records: List[SpoolRecord]
+    body: bytes  # Encoded (possibly compressed) envelope
+    encoding: str
+    raw_bytes: int  # Envelope size before compression
+
+    @property
+    def topic(self) -> Optional[str]:
+        """The topic shared by every entry, if there is one."""
+        topics = {record.topic for record in self.records}
+        return topics.pop() if len(topics) == 1 else None
+
+
+class Batcher:
+    """
+    Pulls records from the spool and closes a batch at max_messages entries,
+    max_bytes of uncompressed envelope, or max_delay seconds after its first
+    record, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        spool: DiskSpool,
+        max_messages: int = 200,
+        max_bytes: int = 128 * 1024,
+        max_delay: float = 0.5,
+        encoding: str = "gzip",
+    ):
+        self.spool = spool
+        self.max_messages = max(1, max_messages)
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.encoding = resolve_encoding(encoding)
+        # Record that would have overflowed the previous batch; opens the next one
+        self._carry: Optional[SpoolRecord] = None
+
+    def next_batch(self, timeout: Optional[float] = None) -> Optional[Batch]:
+        """Block for the next batch; None on timeout or once the spool is closed."""
+        first = self._carry or self.spool.get(timeout=timeout)
+        self._carry = None
+        if first is None:
+            return None
+
+        records = [first]
+        entries = [encode_entry(first)]
+        size = len(_ENVELOPE_HEAD) + len(entries[0]) + len(_ENVELOPE_TAIL)
+        close_at = time.monotonic() + self.max_delay
+        while len(records) < self.max_messages:
+            remaining = close_at - time.monotonic()
+            if remaining <= 0:
+                break
+            record = self.spool.get(timeout=remaining)
+            if record is None:
+                break
+            entry = encode_entry(record)
+            if size + len(entry) + 1 > self.max_bytes:
+                self._carry = record
+                break
+            records.append(record)
+            entries.append(entry)
+            size += len(entry) + 1
+
+        raw = _ENVELOPE_HEAD + b",".join(entries) + _ENVELOPE_TAIL
+        return Batch(records, compress(raw, self.encoding), self.encoding, len(raw))
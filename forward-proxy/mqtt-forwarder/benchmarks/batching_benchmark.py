@@ -0,0 +1,114 @@
+"""Uplink batching benchmark: one IoT Hub message per reading vs. batches.
+
+Runs entirely locally: readings go through the disk spool and the sender
+loop into a stand-in sink that charges a fixed round trip per uplink
+message, as a device client waiting for IoT Hub's acknowledgement does.
+
+    python benchmarks/batching_benchmark.py --messages 5000 --rtt-ms 20
+
+Reports, per mode: messages/s end to end, uplink messages sent, body bytes
+on the wire and IoT Hub billing units (each message is metered in 4 KB
+blocks).
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from batching import Batcher, resolve_encoding  # noqa: E402
+from spool import DiskSpool  # noqa: E402
+from spool_benchmark import produce, wait_drained  # noqa: E402
+
+IOT_HUB_METER_BYTES = 4 * 1024
+
+
+class MeteredSink:
+    """Stand-in for IoT Hub that counts uplink messages, bytes and billing units."""
+
+    def __init__(self, round_trip_seconds: float):
+        self.round_trip_seconds = round_trip_seconds
+        self.messages = 0
+        self.wire_bytes = 0
+        self.billing_units = 0
+
+    def send(self, body: bytes) -> None:
+        if self.round_trip_seconds:
+            time.sleep(self.round_trip_seconds)
+        self.messages += 1
+        self.wire_bytes += len(body)
+        self.billing_units += max(1, -(-len(body) // IOT_HUB_METER_BYTES))
+
+
+def run_unbatched(spool: DiskSpool, sink: MeteredSink, stop: threading.Event) -> None:
+    while not stop.is_set():
+        record = spool.get(timeout=0.1)
+        if record is not None:
+            sink.send(record.payload)
+            spool.ack(record.seq)
+
+
+def run_batched(batcher: Batcher, sink: MeteredSink, stop: threading.Event) -> None:
+    while not stop.is_set():
+        batch = batcher.next_batch(timeout=0.1)
+        if batch is not None:
+            sink.send(batch.body)
+            for record in batch.records:
+                batcher.spool.ack(record.seq)
+
+
+def bench(label: str, messages: int, round_trip_seconds: float, encoding=None, **batch_options) -> None:
+    directory = tempfile.mkdtemp(prefix="batching-bench-")
+    try:
+        spool = DiskSpool(directory)
+        sink = MeteredSink(round_trip_seconds)
+        stop = threading.Event()
+        if encoding is None:
+            sender = threading.Thread(target=run_unbatched, args=(spool, sink, stop))
+        else:
+            batcher = Batcher(spool, encoding=encoding, **batch_options)
+            sender = threading.Thread(target=run_batched, args=(batcher, sink, stop))
+        sender.start()
+
+        start = time.perf_counter()
+        produce(spool, messages)
+        wait_drained(spool)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        sender.join()
+        spool.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{label:<22} {messages / elapsed:>10,.0f} msg/s  {sink.messages:>6} uplink msgs  "
+          f"{sink.wire_bytes / 1e3:>9,.1f} kB on the wire ({sink.wire_bytes / messages:6.1f} B/reading)  "
+          f"{sink.billing_units:>6} billing units")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rtt-ms", type=float, default=20, help="simulated IoT Hub round trip per uplink message")
+    parser.add_argument("--batch-messages", type=int, default=200)
+    parser.add_argument("--batch-bytes", type=int, default=128 * 1024)
+    parser.add_argument("--batch-delay-ms", type=int, default=500)
+    args = parser.parse_args()
+
+    rtt = args.rtt_ms / 1000
+    options = dict(
+        max_messages=args.batch_messages, max_bytes=args.batch_bytes, max_delay=args.batch_delay_ms / 1000
+    )
+    bench("unbatched", args.messages, rtt)
+    for encoding in ("none", "gzip", "zstd"):
+        used = resolve_encoding(encoding)
+        label = f"batched ({encoding})" if used == encoding else f"batched ({encoding}->{used})"
+        bench(label, args.messages, rtt, encoding=encoding, **options)
+
+
+if __name__ == "__main__":
+    main()
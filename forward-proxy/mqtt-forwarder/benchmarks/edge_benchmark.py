@@ -0,0 +1,98 @@
+"""Edge processing benchmark: processing rate and reduction per stage setup.
+
+Replays a synthetic day of telemetry from several plugs (readings every
+few seconds; mostly steady loads with small noise and occasional
+switching) through the edge pipeline, using the readings' own timestamps.
+
+    python benchmarks/edge_benchmark.py --plugs 8 --interval 5 --hours 24
+
+Reports messages/s through the pipeline, messages and bytes in and out,
+and what each stage suppressed or summarized.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from edge import DeadbandStage, EdgePipeline, SummaryStage  # noqa: E402
+
+START = 1735689600.0
+
+
+def synthetic_stream(plugs: int, interval: float, hours: float, seed: int = 1):
+    """(topic, payload, timestamp) tuples in arrival order."""
+    rng = random.Random(seed)
+    loads = [rng.choice((0.0, 5.0, 60.0, 120.0)) for _ in range(plugs)]
+    today = [0.0] * plugs
+    steps = int(hours * 3600 / interval)
+    for step in range(steps):
+        for plug in range(plugs):
+            if rng.random() < 0.002:  # Appliance switched on or off
+                loads[plug] = rng.choice((0.0, 5.0, 60.0, 120.0, 1800.0))
+            power = max(0.0, loads[plug] + rng.gauss(0, 0.4)) if loads[plug] else 0.0
+            voltage = 230 + rng.gauss(0, 0.6)
+            today[plug] += power * interval / 3600 / 1000
+            payload = json.dumps({
+                "Time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(START + step * interval)),
+                "ENERGY": {
+                    "TotalStartTime": "2024-12-01T00:00:00",
+                    "Total": round(100 + today[plug], 3),
+                    "Yesterday": 1.234,
+                    "Today": round(today[plug], 3),
+                    "Power": round(power),
+                    "ApparentPower": round(power * 1.1),
+                    "ReactivePower": round(power * 0.2),
+                    "Factor": 0.91 if power else 0,
+                    "Voltage": round(voltage),
+                    "Current": round(power / voltage, 3),
+                },
+            }).encode()
+            yield f"tele/plug-{plug}/SENSOR", payload, START + step * interval + plug * 0.01
+
+
+def bench(label: str, stages, stream) -> None:
+    pipeline = EdgePipeline(stages)
+    start = time.perf_counter()
+    for topic, payload, timestamp in stream:
+        pipeline.process(topic, payload, timestamp)
+    pipeline.flush(math.inf)
+    elapsed = time.perf_counter() - start
+    stats = pipeline.stats()
+    details = ", ".join(
+        f"{key}={value}" for key, value in stats.items()
+        if key not in ("received", "forwarded", "bytes_in", "bytes_out", "message_ratio", "compression_ratio")
+    )
+    print(f"{label:<18} {stats['received'] / elapsed:>9,.0f} msg/s  "
+          f"{stats['received']:>7} -> {stats['forwarded']:>6} msgs ({stats['message_ratio']:>6}x)  "
+          f"{stats['bytes_in'] / 1e6:6.2f} -> {stats['bytes_out'] / 1e6:5.2f} MB ({stats['compression_ratio']:>6}x)  "
+          f"{details}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plugs", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=5, help="seconds between readings of one plug")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--power", type=float, default=1.0, help="Power deadband (W)")
+    parser.add_argument("--heartbeat", type=float, default=60)
+    parser.add_argument("--period", type=float, default=60, help="summary period (s)")
+    args = parser.parse_args()
+
+    stream = list(synthetic_stream(args.plugs, args.interval, args.hours))
+
+    def deadband():
+        return DeadbandStage({"Power": args.power, "Voltage": 2.0, "Current": 0.01}, heartbeat=args.heartbeat)
+
+    bench("passthrough", [], stream)
+    bench("deadband", [deadband()], stream)
+    bench("summary", [SummaryStage(period=args.period)], stream)
+
+
+if __name__ == "__main__":
+    main()
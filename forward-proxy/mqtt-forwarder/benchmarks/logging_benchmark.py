@@ -0,0 +1,75 @@
+"""Per-message bookkeeping cost: the old log lines vs. metrics and sampled logs.
+
+The forwarder used to write two timestamped, flushed log lines for every
+forwarded message ("Dequeued ...", "Successfully forwarded ..."). It now
+bumps a few counters and writes a log record only for every Nth message
+(none by default). This times both per message, writing to a temporary
+file in place of the container log.
+
+    python benchmarks/logging_benchmark.py --messages 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from logs import StructuredLogger  # noqa: E402
+from metrics import ForwarderMetrics  # noqa: E402
+
+
+def old_log_message(stream, message):
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    print(f"[{timestamp}] {message}", file=stream, flush=True)
+
+
+def bench_old(stream, messages: int) -> float:
+    start = time.perf_counter()
+    for i in range(messages):
+        old_log_message(stream, f"Dequeued message on topic 'tele/plug-{i % 8}/SENSOR'. Forwarding to Azure...")
+        old_log_message(stream, "Successfully forwarded message to Azure IoT Hub.")
+    return time.perf_counter() - start
+
+
+def bench_new(stream, messages: int, sample_every: int) -> float:
+    metrics = ForwarderMetrics()
+    logger = StructuredLogger(stream)
+    start = time.perf_counter()
+    for i in range(messages):
+        metrics.inc("messages_received")
+        metrics.inc("messages_enqueued", 1)
+        metrics.observe_send_latency(0.02)
+        metrics.inc("messages_forwarded", 1)
+        metrics.inc("uplink_messages")
+        metrics.inc("uplink_bytes", 250)
+        if sample_every > 0:
+            logger.sampled("forwarded", sample_every, "Forwarded uplink message",
+                           records=1, bytes=250, topic=f"tele/plug-{i % 8}/SENSOR")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="logging-bench-") as directory:
+        runs = [("two log lines per message (old)", lambda stream: bench_old(stream, args.messages))]
+        for every in (0, 1000, 1):
+            runs.append((f"metrics, sampled logs 1/{every}" if every else "metrics, per-message logs off",
+                         lambda stream, every=every: bench_new(stream, args.messages, every)))
+        for label, run in runs:
+            path = os.path.join(directory, "log")
+            with open(path, "w") as stream:
+                elapsed = run(stream)
+            size = os.path.getsize(path)
+            print(f"{label:<34} {elapsed / args.messages * 1e6:7.2f} us/message  "
+                  f"{size / args.messages:6.1f} log bytes/message")
+
+
+if __name__ == "__main__":
+    main()
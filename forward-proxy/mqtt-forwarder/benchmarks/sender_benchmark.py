@@ -0,0 +1,153 @@
+"""Sender pool benchmark: sustained throughput vs. sends in flight.
+
+Spools a backlog of readings from several plugs and drains it through the
+asyncio sender pool into local stand-in sinks with a simulated round trip:
+
+    python benchmarks/sender_benchmark.py --messages 4000 --rtt-ms 20
+
+Reports messages/s per configuration and checks that every topic was
+delivered in spool order, also with injected send failures (retried with
+jittered backoff). The peak number of sends actually in flight shows that
+batches, which mix every plug's topic, are sent one at a time.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from batching import Batcher  # noqa: E402
+from sender import SenderPool  # noqa: E402
+from sinks import FileSink, HttpSink, Sink, Uplink  # noqa: E402
+from spool import DiskSpool  # noqa: E402
+from spool_benchmark import produce  # noqa: E402
+
+
+class RecordingSink(Sink):
+    """In-memory stand-in with a jittered round trip and optional failures."""
+
+    def __init__(self, round_trip_seconds: float, failure_rate: float = 0.0):
+        self.round_trip_seconds = round_trip_seconds
+        self.failure_rate = failure_rate
+        self.delivered = []  # (topic, seq) in delivery order
+        self.failures = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def send(self, uplink: Uplink) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.round_trip_seconds * random.uniform(0.5, 1.5))
+        finally:
+            self.in_flight -= 1
+        if random.random() < self.failure_rate:
+            self.failures += 1
+            raise ConnectionError("injected failure")
+        self.delivered.extend((record.topic, record.seq) for record in uplink.records)
+
+    def in_topic_order(self) -> bool:
+        last = {}
+        for topic, seq in self.delivered:
+            if seq <= last.get(topic, -1):
+                return False
+            last[topic] = seq
+        return True
+
+
+def make_handler(round_trip_seconds: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(round_trip_seconds)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+async def drain(spool: DiskSpool, pool: SenderPool, messages: int) -> float:
+    start = time.perf_counter()
+    runner = asyncio.create_task(pool.run())
+    while spool.stats()["unacked"]:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    spool.close()
+    await runner
+    return elapsed
+
+
+def bench(label: str, sink: Sink, messages: int, max_in_flight: int, batch_messages: int = 1) -> None:
+    directory = tempfile.mkdtemp(prefix="sender-bench-")
+    try:
+        spool = DiskSpool(directory)
+        produce(spool, messages)
+        batcher = Batcher(spool, max_messages=batch_messages, max_delay=0.05) if batch_messages > 1 else None
+        pool = SenderPool(
+            spool, sink, batcher=batcher, max_in_flight=max_in_flight,
+            retry_base=0.01, retry_max=0.1,
+        )
+
+        async def main():
+            await sink.connect()
+            try:
+                return await drain(spool, pool, messages)
+            finally:
+                await sink.close()
+
+        elapsed = asyncio.run(main())
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    line = f"{label:<35} {messages / elapsed:>9,.0f} msg/s  ({elapsed:.2f}s, {pool.retries} retries)"
+    if isinstance(sink, RecordingSink):
+        line += f"  peak in flight: {sink.peak_in_flight}  per-topic order kept: {sink.in_topic_order()}"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=4000)
+    parser.add_argument("--rtt-ms", type=float, default=20, help="simulated round trip per uplink message")
+    args = parser.parse_args()
+    rtt = args.rtt_ms / 1000
+    messages = args.messages
+
+    for in_flight in (1, 8, 32):
+        bench(f"memory, {in_flight} in flight", RecordingSink(rtt), messages, in_flight)
+    bench("memory, 8 in flight, 5% failures", RecordingSink(rtt, failure_rate=0.05), messages, 8)
+    bench("memory, batches of 50, 1 in flight", RecordingSink(rtt), messages, 1, batch_messages=50)
+    bench("memory, batches of 50, 8 in flight", RecordingSink(rtt), messages, 8, batch_messages=50)
+    bench("memory, batches of 50, 32 in flight", RecordingSink(rtt), messages, 32, batch_messages=50)
+
+    directory = tempfile.mkdtemp(prefix="sender-bench-sink-")
+    try:
+        path = os.path.join(directory, "uplink.jsonl")
+        for in_flight in (1, 8):
+            bench(f"file, {in_flight} in flight", FileSink(path, latency=rtt), messages // 4, in_flight)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(rtt))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/uplink"
+        for in_flight in (1, 8):
+            bench(f"http, {in_flight} in flight", HttpSink(url), messages // 4, in_flight)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Throughput and recovery benchmark for the forwarder's disk spool.
+
+Runs entirely locally: a stand-in sink takes the place of IoT Hub and can
+be switched offline to simulate an uplink outage.
+
+    python benchmarks/spool_benchmark.py --messages 50000
+
+Reports:
+    - steady-state throughput (MQTT thread -> spool -> sender -> ack)
+    - backlog drain rate after an outage (replay from disk, oldest first)
+    - restart recovery time and replay of unacknowledged messages
+    - oldest-first dropping once the disk budget is exceeded
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from spool import DiskSpool  # noqa: E402
+
+
+def tasmota_payload(i: int) -> bytes:
+    return json.dumps({
+        "Time": "2025-01-01T00:00:00",
+        "ENERGY": {
+            "TotalStartTime": "2024-12-01T00:00:00",
+            "Total": 123.456 + i / 1000,
+            "Yesterday": 1.234,
+            "Today": 0.567,
+            "Power": 100 + i % 50,
+            "ApparentPower": 110,
+            "ReactivePower": 20,
+            "Factor": 0.91,
+            "Voltage": 230,
+            "Current": 0.48,
+        },
+    }).encode()
+
+
+class LocalSink:
+    """Stand-in for IoT Hub: records what it receives and can go offline."""
+
+    def __init__(self, round_trip_seconds: float = 0.0):
+        self.round_trip_seconds = round_trip_seconds
+        self.online = threading.Event()
+        self.online.set()
+        self.received = []
+
+    def send(self, record) -> None:
+        if not self.online.is_set():
+            raise ConnectionError("uplink down")
+        if self.round_trip_seconds:
+            time.sleep(self.round_trip_seconds)
+        self.received.append(record.seq)
+
+
+def run_sender(spool: DiskSpool, sink: LocalSink, stop: threading.Event) -> None:
+    """The forwarder's sender loop against the stand-in sink."""
+    while not stop.is_set():
+        record = spool.get(timeout=0.1)
+        if record is None:
+            continue
+        while not stop.is_set():
+            try:
+                sink.send(record)
+                spool.ack(record.seq)
+                break
+            except ConnectionError:
+                sink.online.wait(0.05)
+
+
+def produce(spool: DiskSpool, count: int, start: int = 0) -> None:
+    for i in range(start, start + count):
+        spool.put(f"tele/plug-{i % 8}/SENSOR", tasmota_payload(i))
+
+
+def wait_drained(spool: DiskSpool, timeout: float = 300) -> None:
+    deadline = time.perf_counter() + timeout
+    while spool.stats()["unacked"] and time.perf_counter() < deadline:
+        time.sleep(0.005)
+
+
+def bench_throughput(directory: str, messages: int) -> None:
+    spool = DiskSpool(directory)
+    sink = LocalSink()
+    stop = threading.Event()
+    sender = threading.Thread(target=run_sender, args=(spool, sink, stop))
+    sender.start()
+
+    start = time.perf_counter()
+    produce(spool, messages)
+    produced = time.perf_counter() - start
+    wait_drained(spool)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sender.join()
+    stats = spool.stats()
+    spool.close()
+
+    print(f"steady state: {messages} messages in {elapsed:.2f}s "
+          f"({messages / elapsed:,.0f} msg/s end to end, {messages / produced:,.0f} msg/s enqueue), "
+          f"{stats['fsyncs']} fsyncs, {spool.disk_reads} disk reads, "
+          f"in order: {sink.received == sorted(sink.received)}")
+
+
+def bench_outage(directory: str, messages: int) -> None:
+    spool = DiskSpool(directory, memory_records=1000)
+    sink = LocalSink()
+    stop = threading.Event()
+    sender = threading.Thread(target=run_sender, args=(spool, sink, stop))
+    sender.start()
+
+    sink.online.clear()
+    produce(spool, messages)
+    backlog = spool.stats()
+    reconnected = time.perf_counter()
+    sink.online.set()
+    wait_drained(spool)
+    drain = time.perf_counter() - reconnected
+    stop.set()
+    sender.join()
+    stats = spool.stats()
+    spool.close()
+
+    print(f"outage: {backlog['backlog']} messages spooled ({backlog['disk_bytes'] / 1e6:.1f} MB on disk, "
+          f"{backlog['memory_records']} in RAM); drained in {drain:.2f}s after reconnect "
+          f"({messages / drain:,.0f} msg/s), in order: {sink.received == sorted(sink.received)}, "
+          f"segments left: {stats['segments']}")
+
+
+def bench_restart(directory: str, messages: int) -> None:
+    spool = DiskSpool(directory)
+    produce(spool, messages)
+    # Half of the backlog was delivered before the crash
+    for _ in range(messages // 2):
+        spool.ack(spool.get().seq)
+    spool.close()
+
+    start = time.perf_counter()
+    spool = DiskSpool(directory)
+    reopened = time.perf_counter() - start
+    replayed = 0
+    first = spool.get(timeout=0)
+    while first is not None:
+        replayed += 1
+        spool.ack(first.seq)
+        first = spool.get(timeout=0)
+    elapsed = time.perf_counter() - start
+    spool.close()
+
+    print(f"restart: reopened in {reopened * 1000:.1f}ms, replayed {replayed} unacknowledged "
+          f"messages in {elapsed:.2f}s ({replayed / elapsed:,.0f} msg/s)")
+
+
+def bench_disk_limit(directory: str, messages: int) -> None:
+    spool = DiskSpool(directory, segment_bytes=256 * 1024, max_disk_bytes=2 * 1024 * 1024)
+    produce(spool, messages)
+    stats = spool.stats()
+    first = spool.get(timeout=0)
+    spool.close()
+    print(f"disk limit: kept {stats['disk_bytes'] / 1e6:.2f} MB in {stats['segments']} segments, "
+          f"dropped {stats['dropped']} oldest messages, replay resumes at #{first.seq}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50000)
+    args = parser.parse_args()
+
+    for bench in (bench_throughput, bench_outage, bench_restart, bench_disk_limit):
+        directory = tempfile.mkdtemp(prefix="spool-bench-")
+        try:
+            bench(directory, args.messages)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Edge processing of Tasmota telemetry before it is spooled and uplinked.
+
+Every MQTT message is parsed once and passed through a chain of stages;
+each stage returns the readings it lets through (none, the same one, or
+new ones). Messages without an ENERGY object (STATE, LWT, ...) pass every
+stage untouched, and readings that no stage rewrote are forwarded with
+their original bytes.
+
+Stages:
+    deadband  forward a reading only when Power, Voltage or Current moved by
+              more than a threshold since the last forwarded reading of the
+              same topic, or once per heartbeat period when nothing changed
+    summary   replace raw readings with one reading per topic and period;
+              ENERGY keeps its shape with Power/Voltage/Current set to the
+              period mean (other fields from the last sample), and a
+              "Summary" object adds the sample count and min/mean/max
+"""
+
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+EDGE_FIELDS = ("Power", "Voltage", "Current")
+
+
+@dataclass
+class Reading:
+    topic: str
+    payload: bytes
+    timestamp: float
+    data: Optional[dict] = None  # Parsed payload; None if it is not a JSON object
+    is_json: Optional[bool] = None  # Whether payload parsed as JSON; None if it was not parsed
+
+    @property
+    def energy(self) -> Optional[dict]:
+        """The Tasmota ENERGY object, if this is a SENSOR reading."""
+        if self.data is None:
+            return None
+        energy = self.data.get("ENERGY")
+        return energy if isinstance(energy, dict) else None
+
+
+def parse_reading(topic: str, payload: bytes, timestamp: float) -> Reading:
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return Reading(topic, payload, timestamp, None, False)
+    return Reading(topic, payload, timestamp, data if isinstance(data, dict) else None, True)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class EdgeStage:
+    """A processing step. The base class passes every reading through."""
+
+    name = "passthrough"
+
+    def process(self, reading: Reading) -> List[Reading]:
+        return [reading]
+
+    def flush(self, now: float) -> List[Reading]:
+        """Readings held back that are due by now (math.inf flushes everything)."""
+        return []
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class DeadbandStage(EdgeStage):
+    """Suppresses readings that did not move by more than a threshold."""
+
+    name = "deadband"
+
+    def __init__(self, thresholds: Dict[str, float], heartbeat: float = 60.0):
+        self.thresholds = thresholds
+        self.heartbeat = heartbeat
+        # topic -> (time, values) of the last forwarded reading
+        self._last: Dict[str, Tuple[float, Dict[str, object]]] = {}
+        self.suppressed = 0
+        self.heartbeats = 0
+
+    def _changed(self, values: Dict[str, object], last_values: Dict[str, object]) -> bool:
+        for name, threshold in self.thresholds.items():
+            value, last = values.get(name), last_values.get(name)
+            if _is_number(value) and _is_number(last):
+                if abs(value - last) > threshold:
+                    return True
+            elif value != last:
+                return True
+        return False
+
+    def process(self, reading: Reading) -> List[Reading]:
+        energy = reading.energy
+        if energy is None:
+            return [reading]
+        values = {name: energy.get(name) for name in self.thresholds}
+        last = self._last.get(reading.topic)
+        if last is not None and not self._changed(values, last[1]):
+            if reading.timestamp - last[0] < self.heartbeat:
+                self.suppressed += 1
+                return []
+            self.heartbeats += 1
+        self._last[reading.topic] = (reading.timestamp, values)
+        return [reading]
+
+    def stats(self) -> Dict[str, int]:
+        return {"suppressed": self.suppressed, "heartbeats": self.heartbeats}
+
+
+class _Window:
+    __slots__ = ("start", "count", "minimum", "total", "maximum", "last")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.minimum: Dict[str, float] = {}
+        self.total: Dict[str, float] = {}
+        self.maximum: Dict[str, float] = {}
+        self.last: Optional[Reading] = None
+
+    def add(self, reading: Reading, energy: dict, fields: Sequence[str]) -> None:
+        self.count += 1
+        self.last = reading
+        for name in fields:
+            value = energy.get(name)
+            if not _is_number(value):
+                continue
+            if name in self.total:
+                self.minimum[name] = min(self.minimum[name], value)
+                self.maximum[name] = max(self.maximum[name], value)
+                self.total[name] += value
+            else:
+                self.minimum[name] = self.maximum[name] = self.total[name] = value
+
+
+class SummaryStage(EdgeStage):
+    """Emits one min/mean/max summary per topic and period instead of raw readings."""
+
+    name = "summary"
+
+    def __init__(self, period: float = 60.0, fields: Sequence[str] = EDGE_FIELDS):
+        self.period = period
+        self.fields = fields
+        self._windows: Dict[str, _Window] = {}
+        self.summarized = 0
+        self.summaries = 0
+
+    def process(self, reading: Reading) -> List[Reading]:
+        energy = reading.energy
+        if energy is None:
+            return [reading]
+        start = reading.timestamp - reading.timestamp % self.period
+        emitted = []
+        window = self._windows.get(reading.topic)
+        if window is not None and window.start != start:
+            emitted.append(self._summarize(window))
+            window = None
+        if window is None:
+            window = self._windows[reading.topic] = _Window(start)
+        window.add(reading, energy, self.fields)
+        self.summarized += 1
+        return emitted
+
+    def flush(self, now: float) -> List[Reading]:
+        due = [topic for topic, window in self._windows.items() if now >= window.start + self.period]
+        return [self._summarize(self._windows.pop(topic)) for topic in due]
+
+    def _summarize(self, window: _Window) -> Reading:
+        last = window.last
+        energy = dict(last.energy)
+        summary = {"Period": self.period, "Samples": window.count}
+        for name, total in window.total.items():
+            mean = round(total / window.count, 3)
+            energy[name] = mean
+            summary[name] = {"Min": window.minimum[name], "Mean": mean, "Max": window.maximum[name]}
+        data = dict(last.data, ENERGY=energy, Summary=summary)
+        self.summaries += 1
+        return Reading(last.topic, json.dumps(data, separators=(",", ":")).encode(), last.timestamp, data, True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"summarized": self.summarized, "summaries": self.summaries}
+
+
+class EdgePipeline:
+    """Runs readings through the stages in order and counts what goes in and out."""
+
+    def __init__(self, stages: Sequence[EdgeStage]):
+        self.stages = list(stages)
+        # The MQTT thread processes, the forwarder's flush timer flushes
+        self._lock = threading.Lock()
+        self.received = 0
+        self.forwarded = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def process(self, topic: str, payload: bytes, timestamp: Optional[float] = None) -> List[Reading]:
+        timestamp = time.time() if timestamp is None else timestamp
+        if not self.stages:
+            reading = Reading(topic, payload, timestamp)
+        else:
+            reading = parse_reading(topic, payload, timestamp)
+        with self._lock:
+            self.received += 1
+            self.bytes_in += len(payload)
+            return self._count(self._run([reading], self.stages))
+
+    def flush(self, now: Optional[float] = None) -> List[Reading]:
+        """Due summaries (and anything else stages held back), run through the later stages."""
+        now = time.time() if now is None else now
+        with self._lock:
+            readings = []
+            for index, stage in enumerate(self.stages):
+                readings.extend(self._run(stage.flush(now), self.stages[index + 1:]))
+            return self._count(readings)
+
+    @staticmethod
+    def _run(readings: List[Reading], stages: Sequence[EdgeStage]) -> List[Reading]:
+        for stage in stages:
+            if not readings:
+                break
+            readings = [out for reading in readings for out in stage.process(reading)]
+        return readings
+
+    def _count(self, readings: List[Reading]) -> List[Reading]:
+        self.forwarded += len(readings)
+        self.bytes_out += sum(len(reading.payload) for reading in readings)
+        return readings
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = {
+                "received": self.received,
+                "forwarded": self.forwarded,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                # How many times fewer messages / bytes leave than arrive
+                "message_ratio": round(self.received / self.forwarded, 2) if self.forwarded else math.inf,
+                "compression_ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else math.inf,
+            }
+            for stage in self.stages:
+                for key, value in stage.stats().items():
+                    stats[f"{stage.name}_{key}"] = value
+            return stats
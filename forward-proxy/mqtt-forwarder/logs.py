@@ -0,0 +1,73 @@
+"""Structured, rate-limited logging for the forwarder.
+
+Every record is one JSON line: {"time": ..., "level": ..., "message": ..., <fields>}.
+Lifecycle events are always written. Events that can repeat per message
+go through limited() (at most one record per key and interval, carrying
+how many were suppressed in between) or sampled() (every Nth occurrence;
+off when N is 0). Nothing is formatted for records that are not written.
+"""
+
+import json
+import math
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO, Tuple
+
+
+def _json_default(value):
+    return str(value)
+
+
+def finite_or_none(value):
+    """JSON has no Infinity/NaN; such values are written as null."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class StructuredLogger:
+    def __init__(self, stream: Optional[TextIO] = None, rate_limit_seconds: float = 10.0):
+        self.stream = stream or sys.stdout
+        self.rate_limit_seconds = rate_limit_seconds
+        self._lock = threading.Lock()
+        # key -> (time of the last written record, records suppressed since)
+        self._limited: Dict[str, Tuple[float, int]] = {}
+        self._sampled: Dict[str, int] = {}
+
+    def log(self, message: str, level: str = "info", **fields) -> None:
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level,
+            "message": message,
+        }
+        for key, value in fields.items():
+            record[key] = finite_or_none(value)
+        line = json.dumps(record, default=_json_default)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def limited(self, key: str, message: str, level: str = "warning", **fields) -> None:
+        """Write at most one record per key every rate_limit_seconds."""
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._limited.get(key, (-math.inf, 0))
+            if now - last < self.rate_limit_seconds:
+                self._limited[key] = (last, suppressed + 1)
+                return
+            self._limited[key] = (now, 0)
+        if suppressed:
+            fields["suppressed"] = suppressed
+        self.log(message, level, **fields)
+
+    def sampled(self, key: str, every: int, message: str, level: str = "info", **fields) -> None:
+        """Write every Nth record for key; every <= 0 writes none."""
+        if every <= 0:
+            return
+        with self._lock:
+            count = self._sampled.get(key, 0) + 1
+            self._sampled[key] = count
+        if count % every == 0:
+            self.log(message, level, sample_every=every, **fields)
@@ -0,0 +1,207 @@
+"""Runtime metrics of the forwarder, served on a small local HTTP endpoint.
+
+    GET /metrics   Prometheus text exposition
+    GET /stats     the same numbers as one JSON object
+
+Counters are incremented by the MQTT callback, the edge stage and the
+sender pool. Values that other components already keep (spool depth,
+sends in flight, edge statistics, sink reconnects) are read through
+callbacks at scrape time. Enqueue and dequeue rates are averaged over the
+last rate_window seconds from once-per-second samples taken by tick().
+"""
+
+import bisect
+import json
+import math
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Tuple
+
+from logs import finite_or_none
+
+# Uplink send latencies, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+COUNTERS = {
+    "messages_received": "MQTT messages received from the local broker",
+    "messages_enqueued": "Messages written to the spool (after edge processing)",
+    "messages_forwarded": "Spooled messages acknowledged by the uplink",
+    "uplink_messages": "Uplink messages accepted (a batch counts once)",
+    "uplink_bytes": "Uplink message body bytes accepted",
+    "send_failures": "Failed uplink sends (each retry counts)",
+    "reconnects": "Connections re-established after being lost, by link",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs, ending with +Inf."""
+        pairs = []
+        running = 0
+        for bound, count in zip(list(self.buckets) + [math.inf], self.counts):
+            running += count
+            pairs.append(("+Inf" if bound == math.inf else repr(bound), running))
+        return pairs
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class ForwarderMetrics:
+    def __init__(self, rate_window: float = 60.0):
+        self.rate_window = rate_window
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self.send_latency = Histogram()
+        # name -> (help, callback returning a number or a {suffix: number} dict)
+        self._gauges: Dict[str, Tuple[str, Callable]] = {}
+        self._samples: Deque[Tuple[float, float, float]] = deque()
+        self.started = time.time()
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe_send_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.send_latency.observe(seconds)
+
+    def gauge(self, name: str, help: str, callback: Callable) -> None:
+        """Register a value read at scrape time; a dict result yields one gauge per key."""
+        self._gauges[name] = (help, callback)
+
+    def value(self, name: str) -> float:
+        with self._lock:
+            return sum(value for (counter, _), value in self._counters.items() if counter == name)
+
+    def tick(self) -> None:
+        """Sample the enqueue/dequeue counters (called about once per second)."""
+        now = time.monotonic()
+        sample = (now, self.value("messages_enqueued"), self.value("messages_forwarded"))
+        with self._lock:
+            self._samples.append(sample)
+            while len(self._samples) > 1 and now - self._samples[0][0] > self.rate_window:
+                self._samples.popleft()
+
+    def rates(self) -> Dict[str, float]:
+        """Messages per second enqueued and forwarded over the rate window."""
+        with self._lock:
+            if len(self._samples) < 2:
+                return {"enqueue_rate": 0.0, "dequeue_rate": 0.0}
+            (start, enqueued_0, forwarded_0), (end, enqueued_1, forwarded_1) = self._samples[0], self._samples[-1]
+        elapsed = end - start
+        return {
+            "enqueue_rate": round((enqueued_1 - enqueued_0) / elapsed, 2),
+            "dequeue_rate": round((forwarded_1 - forwarded_0) / elapsed, 2),
+        }
+
+    def _gauge_values(self) -> Dict[str, Tuple[str, float]]:
+        values = {}
+        for name, (help, callback) in self._gauges.items():
+            try:
+                result = callback()
+            except Exception:
+                continue  # A component that is not up yet reports nothing
+            if isinstance(result, dict):
+                for key, value in result.items():
+                    if isinstance(value, (int, float)):
+                        values[f"{name}_{key}"] = (help, value)
+            elif result is not None:
+                values[name] = (help, result)
+        for name, value in self.rates().items():
+            values[name] = ("Messages per second over the last rate window", value)
+        return values
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counters = dict(self._counters)
+            latency = {
+                "count": self.send_latency.count,
+                "sum": round(self.send_latency.sum, 6),
+                "buckets": dict(self.send_latency.cumulative()),
+            }
+        stats: Dict[str, object] = {"uptime_seconds": round(time.time() - self.started, 1)}
+        for (name, labels), value in sorted(counters.items()):
+            key = "_".join([name] + [label_value for _, label_value in labels])
+            stats[key] = value
+        for name, (_, value) in self._gauge_values().items():
+            stats[name] = finite_or_none(value)
+        stats["send_latency_seconds"] = latency
+        return stats
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            buckets = self.send_latency.cumulative()
+            latency_sum, latency_count = self.send_latency.sum, self.send_latency.count
+        lines = []
+        for name, help in COUNTERS.items():
+            lines.append(f"# HELP forwarder_{name}_total {help}")
+            lines.append(f"# TYPE forwarder_{name}_total counter")
+            if name != "reconnects" and (name, ()) not in counters:
+                lines.append(f"forwarder_{name}_total 0")
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    label_text = ",".join(f'{key}="{label_value}"' for key, label_value in labels)
+                    lines.append(f"forwarder_{name}_total{{{label_text}}} {_format(value)}" if labels
+                                 else f"forwarder_{name}_total {_format(value)}")
+        lines.append("# HELP forwarder_send_latency_seconds Uplink send latency until acknowledgement")
+        lines.append("# TYPE forwarder_send_latency_seconds histogram")
+        for bound, count in buckets:
+            lines.append(f'forwarder_send_latency_seconds_bucket{{le="{bound}"}} {count}')
+        lines.append(f"forwarder_send_latency_seconds_sum {latency_sum:.6f}")
+        lines.append(f"forwarder_send_latency_seconds_count {latency_count}")
+        for name, (help, value) in self._gauge_values().items():
+            lines.append(f"# HELP forwarder_{name} {help}")
+            lines.append(f"# TYPE forwarder_{name} gauge")
+            lines.append(f"forwarder_{name} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics: ForwarderMetrics, host: str, port: int) -> ThreadingHTTPServer:
+    """Serve /metrics and /stats from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body, content_type = metrics.render().encode(), "text/plain; version=0.0.4"
+            elif path == "/stats":
+                body, content_type = json.dumps(metrics.snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # Scrapes are not worth a log line each
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
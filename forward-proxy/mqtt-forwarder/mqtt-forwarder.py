@@ -1,13 +1,22 @@
+import asyncio
 import base64
 import hashlib
 import hmac
 import os
 import traceback
 import paho.mqtt.client as mqtt
-from azure.iot.device import ProvisioningDeviceClient, IoTHubDeviceClient, Message, exceptions
-import queue
+from azure.iot.device import ProvisioningDeviceClient, exceptions
 import threading
-from datetime import datetime
+import time
+
+from batching import Batcher
+from edge import DeadbandStage, EdgePipeline, SummaryStage
+from logs import StructuredLogger
+from metrics import ForwarderMetrics, serve_metrics
+from sender import SenderPool
+from shutdown import shut_down, stop_on_sigterm
+from sinks import FileSink, HttpSink, IoTHubSink
+from spool import DiskSpool
 
 # --- Environment Variables ---
 ID_SCOPE = os.getenv("ID_SCOPE")
@@ -16,55 +25,195 @@ GROUP_PRIMARY_KEY = os.getenv("GROUP_PRIMARY_KEY")
 MQTT_USER = os.getenv("MQTT_USER")
 MQTT_PASS = os.getenv("MQTT_PASS")
 
+# --- Store-and-forward spool (survives uplink outages and restarts) ---
+SPOOL_DIR = os.getenv("SPOOL_DIR", "spool")
+SPOOL_SEGMENT_BYTES = int(os.getenv("SPOOL_SEGMENT_BYTES", 4 * 1024 * 1024))
+SPOOL_MAX_DISK_BYTES = int(os.getenv("SPOOL_MAX_DISK_BYTES", 256 * 1024 * 1024))
+SPOOL_MEMORY_RECORDS = int(os.getenv("SPOOL_MEMORY_RECORDS", 10000))
+SPOOL_FSYNC_INTERVAL_MS = int(os.getenv("SPOOL_FSYNC_INTERVAL_MS", 200))
+SPOOL_FSYNC_BATCH = int(os.getenv("SPOOL_FSYNC_BATCH", 256))
+
+# --- Uplink sender ---
+# "iothub", or a local stand-in: "file:<path>" or an http(s):// URL
+UPLINK_SINK = os.getenv("UPLINK_SINK", "iothub")
+SENDER_MAX_IN_FLIGHT = int(os.getenv("SENDER_MAX_IN_FLIGHT", 8))
+SEND_RETRY_BASE_SECONDS = 0.5
+SEND_RETRY_MAX_SECONDS = 30
+
+# --- Uplink batching (one IoT Hub message per batch; 1 message disables it) ---
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", 200))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", 128 * 1024))
+BATCH_MAX_DELAY_MS = int(os.getenv("BATCH_MAX_DELAY_MS", 500))
+BATCH_ENCODING = os.getenv("BATCH_ENCODING", "gzip")  # none, gzip or zstd
+
+# --- Edge processing (comma-separated stages: deadband, summary; empty disables) ---
+EDGE_STAGES = [name.strip() for name in os.getenv("EDGE_STAGES", "deadband").split(",") if name.strip()]
+DEADBAND_POWER = float(os.getenv("DEADBAND_POWER", 1.0))  # W
+DEADBAND_VOLTAGE = float(os.getenv("DEADBAND_VOLTAGE", 2.0))  # V
+DEADBAND_CURRENT = float(os.getenv("DEADBAND_CURRENT", 0.01))  # A
+HEARTBEAT_SECONDS = float(os.getenv("HEARTBEAT_SECONDS", 60))
+SUMMARY_PERIOD_SECONDS = float(os.getenv("SUMMARY_PERIOD_SECONDS", 60))
+EDGE_STATS_INTERVAL_SECONDS = float(os.getenv("EDGE_STATS_INTERVAL_SECONDS", 300))
+
+# --- Metrics endpoint and logging ---
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))  # 0 disables the endpoint
+LOG_RATE_LIMIT_SECONDS = float(os.getenv("LOG_RATE_LIMIT_SECONDS", 10))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 0))  # Log every Nth uplink message; 0 = off
+
 # --- MQTT Topics ---
 LOCAL_SENSORS_TOPIC = "tele/#"
-message_queue = queue.Queue()
+message_spool = None
+edge_pipeline = None
+edge_stop = threading.Event()
+logger = StructuredLogger(rate_limit_seconds=LOG_RATE_LIMIT_SECONDS)
+forwarder_metrics = ForwarderMetrics()
+mqtt_connections = 0
 
-def log_message(message):
-    """Prints a message with a timestamp."""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-    print(f"[{timestamp}] {message}", flush=True)
+def log_message(message, level="info", **fields):
+    """Writes one structured (JSON) log record."""
+    logger.log(message, level, **fields)
 
 # --- MQTT Client Callbacks ---
 def on_connect(client, userdata, flags, rc):
     """Callback for when the client connects to the local broker."""
+    global mqtt_connections
     if rc == 0:
+        mqtt_connections += 1
+        if mqtt_connections > 1:
+            forwarder_metrics.inc("reconnects", link="mqtt")
         log_message("Connected to local Mosquitto broker successfully.")
         client.subscribe(LOCAL_SENSORS_TOPIC)
         log_message(f"Subscribed to local topic: {LOCAL_SENSORS_TOPIC}")
     else:
-        log_message(f"Failed to connect to local Mosquitto broker, return code {rc}\n")
+        logger.limited("mqtt_connect_failed", "Failed to connect to local Mosquitto broker", rc=rc)
+
+def on_disconnect(client, userdata, rc):
+    """Callback for when the connection to the local broker is lost; paho reconnects."""
+    if rc != 0:
+        logger.limited("mqtt_disconnected", "Lost connection to local Mosquitto broker", rc=rc)
 
 def on_message(client, userdata, msg):
     """
     Callback for when a message is received from the local broker.
+    Whatever the edge stages let through is written to the spool before the
+    callback returns, so it survives the forwarder being killed; the fsync
+    that also covers a power loss follows within SPOOL_FSYNC_INTERVAL_MS.
     """
-    message_queue.put(msg)
+    forwarder_metrics.inc("messages_received")
+    spool_readings(edge_pipeline.process(msg.topic, msg.payload))
+
+# --- Edge Processing ---
+def build_edge_pipeline():
+    """Builds the edge stages named in EDGE_STAGES, in that order."""
+    stages = []
+    for name in EDGE_STAGES:
+        if name == "deadband":
+            thresholds = {"Power": DEADBAND_POWER, "Voltage": DEADBAND_VOLTAGE, "Current": DEADBAND_CURRENT}
+            stages.append(DeadbandStage(thresholds, heartbeat=HEARTBEAT_SECONDS))
+        elif name == "summary":
+            stages.append(SummaryStage(period=SUMMARY_PERIOD_SECONDS))
+        else:
+            raise ValueError(f"Unknown edge stage '{name}' in EDGE_STAGES")
+    return EdgePipeline(stages)
+
+def spool_readings(readings):
+    for reading in readings:
+        message_spool.put(reading.topic, reading.payload, reading.timestamp, reading.is_json)
+    if readings:
+        forwarder_metrics.inc("messages_enqueued", len(readings))
+
+def edge_flush_thread():
+    """
+    Spools summaries as their periods end, samples the metric rates and
+    logs the edge statistics.
+    """
+    next_stats = time.monotonic() + EDGE_STATS_INTERVAL_SECONDS
+    while not edge_stop.wait(1):
+        spool_readings(edge_pipeline.flush())
+        forwarder_metrics.tick()
+        if time.monotonic() >= next_stats:
+            next_stats += EDGE_STATS_INTERVAL_SECONDS
+            log_message("Edge statistics", **edge_pipeline.stats())
+
+# --- Uplink Sender ---
+def create_sink():
+    """The configured uplink; for IoT Hub this provisions the device with DPS first."""
+    if UPLINK_SINK.startswith("file:"):
+        return FileSink(UPLINK_SINK[len("file:"):])
+    if UPLINK_SINK.startswith(("http://", "https://")):
+        return HttpSink(UPLINK_SINK)
+
+    # 1. Derive the unique device key from the group key
+    derived_device_key = derive_device_key(DEVICE_ID, GROUP_PRIMARY_KEY)
+
+    # 2. Use the DERIVED key to create the provisioning client
+    provisioning_client = ProvisioningDeviceClient.create_from_symmetric_key(
+        provisioning_host="global.azure-devices-provisioning.net",
+        registration_id=DEVICE_ID,
+        id_scope=ID_SCOPE,
+        symmetric_key=derived_device_key,
+    )
+
+    log_message("Provisioning device with Azure DPS...")
+    registration_result = provisioning_client.register()
+
+    if registration_result.status != "assigned":
+        log_message(f"Device provisioning failed with status: {registration_result.status}", "error")
+        exit(1)
 
-# --- Azure Sender Thread ---
-def azure_sender_thread(_azure_client):
+    log_message(f"Device was assigned to IoT Hub: {registration_result.registration_state.assigned_hub}")
+    # 3. Use the DERIVED key again to connect to the assigned IoT Hub
+    return IoTHubSink(
+        hostname=registration_result.registration_state.assigned_hub,
+        device_id=registration_result.registration_state.device_id,
+        symmetric_key=derived_device_key,
+    )
+
+async def run_sender(sink):
     """
-    A dedicated thread that pulls messages from the queue and sends them to Azure.
-    This decouples receiving from sending.
+    Pulls messages from the spool and sends them with up to SENDER_MAX_IN_FLIGHT
+    awaiting acknowledgement. This decouples receiving from sending. Messages are
+    acknowledged (and eventually deleted from disk) only after the sink accepted them.
     """
-    log_message("Starting Azure sender thread...")
-    while True:
-        try:
-            msg = message_queue.get()
-            if msg is None:
-                break
-
-            log_message(f"Dequeued message on topic '{msg.topic}'. Forwarding to Azure...")
-            if _azure_client and _azure_client.connected:
-                azure_msg = Message(msg.payload)
-                # Add custom properties if needed, e.g., to retain the original topic
-                azure_msg.custom_properties["original-topic"] = msg.topic
-                _azure_client.send_message(azure_msg)
-                log_message("Successfully forwarded message to Azure IoT Hub.")
-
-        except Exception as ex:
-            log_message(f"Error in Azure sender thread: {ex}")
-            traceback.print_exc()
+    def on_reconnect():
+        forwarder_metrics.inc("reconnects", link="uplink")
+        log_message(f"Reconnected to {sink.describe()}.", "warning")
+
+    sink.on_reconnect = on_reconnect
+    await sink.connect()
+    log_message(f"Successfully connected to {sink.describe()}.")
+    batcher = None
+    if BATCH_MAX_MESSAGES > 1:
+        batcher = Batcher(
+            message_spool,
+            max_messages=BATCH_MAX_MESSAGES,
+            max_bytes=BATCH_MAX_BYTES,
+            max_delay=BATCH_MAX_DELAY_MS / 1000,
+            encoding=BATCH_ENCODING,
+        )
+        log_message(
+            f"Batching up to {BATCH_MAX_MESSAGES} messages / {BATCH_MAX_BYTES} bytes / "
+            f"{BATCH_MAX_DELAY_MS} ms per uplink message ({batcher.encoding} encoding)."
+        )
+    pool = SenderPool(
+        message_spool,
+        sink,
+        batcher=batcher,
+        max_in_flight=SENDER_MAX_IN_FLIGHT,
+        retry_base=SEND_RETRY_BASE_SECONDS,
+        retry_max=SEND_RETRY_MAX_SECONDS,
+        metrics=forwarder_metrics,
+        logger=logger,
+        log_sample_every=LOG_SAMPLE_EVERY,
+    )
+    forwarder_metrics.gauge("sends_in_flight", "Uplink sends awaiting acknowledgement", lambda: pool.in_flight)
+    log_message(f"Starting uplink sender with up to {SENDER_MAX_IN_FLIGHT} sends in flight...")
+    try:
+        await pool.run()
+    finally:
+        await sink.close()
+        log_message(f"Disconnected from {sink.describe()}.")
 
 # --- Helper function to derive the device key ---
 def derive_device_key(device_id, group_symmetric_key):
@@ -76,46 +225,45 @@ def derive_device_key(device_id, group_symmetric_key):
         device_key_encoded = base64.b64encode(signed_hmac.digest())
         return device_key_encoded.decode("utf-8")
     except Exception as ex:
-        log_message(f"Error deriving device key: {ex}")
+        log_message(f"Error deriving device key: {ex}", "error")
         raise
 
 # --- Main Execution ---
-azure_client = None
 local_client = None
-sender_thread = None
+edge_thread = None
+# docker stop sends SIGTERM; shut down through the finally block below, as on Ctrl+C
+stop_on_sigterm()
 try:
-    # 1. Derive the unique device key from the group key
-    derived_device_key = derive_device_key(DEVICE_ID, GROUP_PRIMARY_KEY)
+    sink = create_sink()
 
-    # 2. Use the DERIVED key to create the provisioning client
-    provisioning_client = ProvisioningDeviceClient.create_from_symmetric_key(
-        provisioning_host="global.azure-devices-provisioning.net",
-        registration_id=DEVICE_ID,
-        id_scope=ID_SCOPE,
-        symmetric_key=derived_device_key,
+    message_spool = DiskSpool(
+        SPOOL_DIR,
+        segment_bytes=SPOOL_SEGMENT_BYTES,
+        max_disk_bytes=SPOOL_MAX_DISK_BYTES,
+        memory_records=SPOOL_MEMORY_RECORDS,
+        fsync_interval=SPOOL_FSYNC_INTERVAL_MS / 1000,
+        fsync_batch=SPOOL_FSYNC_BATCH,
     )
+    backlog = message_spool.stats()["backlog"]
+    if backlog:
+        log_message("Replaying spooled messages from a previous run.", backlog=backlog)
+    forwarder_metrics.gauge("spool", "Spool state (backlog is the queue depth)", message_spool.stats)
 
-    log_message("Provisioning device with Azure DPS...")
-    registration_result = provisioning_client.register()
+    edge_pipeline = build_edge_pipeline()
+    edge_thread = threading.Thread(target=edge_flush_thread, daemon=True)
+    edge_thread.start()
+    log_message(f"Edge stages: {', '.join(EDGE_STAGES) or 'none'}.")
+    forwarder_metrics.gauge("edge", "Edge processing statistics", edge_pipeline.stats)
 
-    if registration_result.status == "assigned":
-        log_message(f"Device was assigned to IoT Hub: {registration_result.registration_state.assigned_hub}")
-        # 3. Use the DERIVED key again to connect to the assigned IoT Hub
-        azure_client = IoTHubDeviceClient.create_from_symmetric_key(
-            symmetric_key=derived_device_key,
-            hostname=registration_result.registration_state.assigned_hub,
-            device_id=registration_result.registration_state.device_id,
-        )
-        azure_client.connect()
-        log_message("Successfully connected to Azure IoT Hub.")
-    else:
-        log_message(f"Device provisioning failed with status: {registration_result.status}")
-        exit(1)
+    if METRICS_PORT:
+        serve_metrics(forwarder_metrics, METRICS_HOST, METRICS_PORT)
+        log_message(f"Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
 
     # Set up the Paho MQTT client to connect to the local Mosquitto broker
     local_client = mqtt.Client(client_id="python-azure-bridge")
     local_client.on_connect = on_connect
     local_client.on_message = on_message
+    local_client.on_disconnect = on_disconnect
 
     if MQTT_USER and MQTT_PASS:
         local_client.username_pw_set(MQTT_USER, MQTT_PASS)
@@ -126,38 +274,33 @@ try:
     # Use loop_start() to run the client in a background thread
     local_client.loop_start()
 
-    # Start the dedicated Azure sender thread
-    sender_thread = threading.Thread(target=azure_sender_thread, args=(azure_client,), daemon=True)
-    sender_thread.start()
-
-    log_message(f"Bridge is running. Forwarding messages from local '{LOCAL_SENSORS_TOPIC}' to Azure.")
+    log_message(f"Bridge is running. Forwarding messages from local '{LOCAL_SENSORS_TOPIC}' to {sink.describe()}.")
 
-    # Keep the main thread alive and wait for the sender thread to finish
-    sender_thread.join()
+    # The sender runs on this thread's event loop until the bridge stops
+    asyncio.run(run_sender(sink))
 
 except (KeyboardInterrupt, SystemExit):
     log_message("Bridge stopping...")
     raise
 except exceptions.CredentialError as e:
-    log_message("An error occurred: Azure Credential Error. Check your ID_SCOPE, DEVICE_ID, and GROUP_PRIMARY_KEY.")
-    log_message(f"Original error: {e}")
+    log_message("An error occurred: Azure Credential Error. Check your ID_SCOPE, DEVICE_ID, and GROUP_PRIMARY_KEY.", "error")
+    log_message(f"Original error: {e}", "error")
     traceback.print_exc()
 except exceptions.ConnectionFailedError as e:
-    log_message("An error occurred: Azure Connection Failed. This could be a network or DNS issue.")
-    log_message(f"Original error: {e}")
+    log_message("An error occurred: Azure Connection Failed. This could be a network or DNS issue.", "error")
+    log_message(f"Original error: {e}", "error")
     traceback.print_exc()
 except Exception as e:
-    log_message("A general, unexpected error occurred.")
-    log_message(f"Original error: {e}")
+    log_message("A general, unexpected error occurred.", "error")
+    log_message(f"Original error: {e}", "error")
     traceback.print_exc()
 finally:
-    if sender_thread:
-        message_queue.put(None)
-        sender_thread.join()
-    if azure_client and azure_client.connected:
-        azure_client.disconnect()
-        log_message("Disconnected from Azure IoT Hub.")
-    if local_client:
-        local_client.loop_stop()
-        local_client.disconnect()
-        log_message("Disconnected from local Mosquitto broker.")
+    shut_down(
+        log_message,
+        spool=message_spool,
+        mqtt_client=local_client,
+        edge_thread=edge_thread,
+        edge_stop=edge_stop,
+        edge_pipeline=edge_pipeline,
+        spool_readings=spool_readings,
+    )
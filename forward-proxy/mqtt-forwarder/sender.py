@@ -0,0 +1,164 @@
+"""Concurrent asyncio sender: spool -> sink with several sends in flight.
+
+Records (or batches, see batching.py) are taken from the spool in order
+and sent through a Sink with up to max_in_flight sends awaiting their
+acknowledgement at once, so throughput is no longer one round trip per
+message. Messages of the same topic still go out in spool order: a send
+waits until every earlier send sharing one of its topics has finished, so
+batches mixing every topic go out one at a time whatever max_in_flight is.
+Failed sends are retried with full-jitter exponential backoff until they
+succeed or the spool is closed; records are acknowledged in the spool only
+after the sink accepted them. Send latency, failures and volumes go to
+ForwarderMetrics; forwarded messages are logged only when sampled.
+"""
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set
+
+from batching import BATCH_FORMAT, Batch, Batcher
+from logs import StructuredLogger
+from metrics import ForwarderMetrics
+from sinks import Sink, Uplink
+from spool import DiskSpool, SpoolRecord
+
+# How often the dispatcher wakes up from a blocking spool read
+_POLL_SECONDS = 0.5
+
+
+def record_uplink(record: SpoolRecord) -> Uplink:
+    """One uplink message per MQTT message."""
+    # Retain the original topic as a message property
+    return Uplink([record], record.payload, {"original-topic": record.topic})
+
+
+def batch_uplink(batch: Batch) -> Uplink:
+    """One uplink message carrying a whole batch; topics are kept per entry."""
+    properties = {
+        "batch-format": BATCH_FORMAT,
+        "batch-encoding": batch.encoding,
+        "batch-count": str(len(batch.records)),
+    }
+    if batch.topic:
+        properties["original-topic"] = batch.topic
+    return Uplink(batch.records, batch.body, properties)
+
+
+class SenderPool:
+    def __init__(
+        self,
+        spool: DiskSpool,
+        sink: Sink,
+        batcher: Optional[Batcher] = None,
+        max_in_flight: int = 8,
+        retry_base: float = 0.5,
+        retry_max: float = 30.0,
+        metrics: Optional[ForwarderMetrics] = None,
+        logger: Optional[StructuredLogger] = None,
+        log_sample_every: int = 0,
+    ):
+        self.spool = spool
+        self.sink = sink
+        self.batcher = batcher
+        self.max_in_flight = max(1, max_in_flight)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.metrics = metrics or ForwarderMetrics()
+        self.logger = logger
+        self.log_sample_every = log_sample_every
+        self.sent = 0
+        self.retries = 0
+        self.in_flight = 0
+        # Blocking spool reads run here, off the event loop
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spool-reader")
+        self._slots: Optional[asyncio.Semaphore] = None
+        # topic -> completion of the latest send carrying that topic
+        self._tails: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _next_uplink(self) -> Optional[Uplink]:
+        if self.batcher is not None:
+            batch = self.batcher.next_batch(timeout=_POLL_SECONDS)
+            return batch_uplink(batch) if batch else None
+        record = self.spool.get(timeout=_POLL_SECONDS)
+        return record_uplink(record) if record else None
+
+    async def run(self) -> None:
+        """Send until the spool is closed, then wait for the sends in flight."""
+        loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        try:
+            while not self.spool.closed:
+                uplink = await loop.run_in_executor(self._reader, self._next_uplink)
+                if uplink is None:
+                    continue
+                await self._slots.acquire()
+                topics = uplink.topics
+                previous = {self._tails[topic] for topic in topics if topic in self._tails}
+                done = loop.create_future()
+                for topic in topics:
+                    self._tails[topic] = done
+                self.in_flight += 1
+                task = asyncio.create_task(self._send_in_order(uplink, previous, done))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            self._reader.shutdown(wait=False)
+
+    async def _send_in_order(self, uplink: Uplink, previous: Set[asyncio.Future], done: asyncio.Future) -> None:
+        try:
+            if previous:
+                await asyncio.wait(previous)
+            if await self._send_until_acknowledged(uplink):
+                for record in uplink.records:
+                    self.spool.ack(record.seq)
+                self.sent += len(uplink.records)
+                self.metrics.inc("messages_forwarded", len(uplink.records))
+                self.metrics.inc("uplink_messages")
+                self.metrics.inc("uplink_bytes", len(uplink.body))
+                if self.logger and self.log_sample_every > 0:
+                    self.logger.sampled(
+                        "forwarded", self.log_sample_every, "Forwarded uplink message",
+                        records=len(uplink.records), bytes=len(uplink.body),
+                        topic=uplink.properties.get("original-topic"),
+                    )
+        finally:
+            self.in_flight -= 1
+            done.set_result(None)
+            for topic in uplink.topics:
+                if self._tails.get(topic) is done:
+                    del self._tails[topic]
+            self._slots.release()
+
+    async def _send_until_acknowledged(self, uplink: Uplink) -> bool:
+        """
+        Retries with full-jitter backoff until the sink accepts the message.
+        While the uplink is down the backlog stays in the spool; gives up
+        (leaving the records unacknowledged) once the spool is closed.
+        """
+        attempt = 0
+        while True:
+            start_time = time.perf_counter()
+            try:
+                await self.sink.send(uplink)
+                self.metrics.observe_send_latency(time.perf_counter() - start_time)
+                return True
+            except Exception as ex:
+                self.metrics.inc("send_failures")
+                if self.spool.closed:
+                    return False
+                # Capped exponent: 2 ** attempt overflows a float after a long enough outage
+                delay = random.uniform(0, min(self.retry_max, self.retry_base * 2 ** min(attempt, 16)))
+                attempt += 1
+                self.retries += 1
+                if self.logger:
+                    self.logger.limited(
+                        "send_failed", "Send failed, retrying",
+                        retry_in=round(delay, 2), attempt=attempt,
+                        backlog=self.spool.stats()["backlog"], error=str(ex),
+                    )
+                await asyncio.sleep(delay)
@@ -0,0 +1,48 @@
+"""Graceful stop on SIGTERM.
+
+docker stop sends SIGTERM. Python's default action kills the process
+without running any cleanup, and as PID 1 in a container the forwarder
+ignores it entirely until docker gives up and sends SIGKILL.
+stop_on_sigterm() turns SIGTERM into SystemExit in the main thread
+instead, so try/finally cleanup (stopping the MQTT loop, closing the
+spool) runs exactly as on Ctrl+C. shut_down() is that cleanup.
+"""
+
+import math
+import signal
+
+
+def _raise_system_exit(signum, frame):
+    # A repeated SIGTERM must not interrupt the cleanup started by the first
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise SystemExit(0)
+
+
+def stop_on_sigterm() -> None:
+    """Install the handler; must be called from the main thread."""
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+
+
+def shut_down(log, spool=None, mqtt_client=None, edge_thread=None, edge_stop=None, edge_pipeline=None,
+              spool_readings=None) -> None:
+    """
+    The forwarder's cleanup, in order: stop receiving from MQTT, spool the
+    summaries of edge periods still open, close the spool, then disconnect.
+    Parts that startup did not get to are skipped.
+    """
+    if mqtt_client:
+        # Stop receiving before the spool closes
+        mqtt_client.loop_stop()
+    if edge_thread:
+        edge_stop.set()
+        edge_thread.join()
+        try:
+            spool_readings(edge_pipeline.flush(math.inf))
+        except Exception as e:
+            log("Could not spool open edge summaries", "error", error=str(e))
+        log("Edge statistics", **edge_pipeline.stats())
+    if spool:
+        spool.close()
+    if mqtt_client:
+        mqtt_client.disconnect()
+        log("Disconnected from local Mosquitto broker.")
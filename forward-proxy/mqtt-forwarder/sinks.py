@@ -0,0 +1,150 @@
+"""Uplink sinks: where the sender pool delivers messages.
+
+A sink sends one uplink message (a body plus string properties) and
+returns once the far end accepted it, raising on failure. Sends are
+awaited concurrently, so a sink must allow several in flight.
+
+    IoTHubSink  Azure IoT Hub through the asyncio device client
+    FileSink    appends JSON lines to a local file (optional simulated latency)
+    HttpSink    POSTs each message to a local HTTP endpoint
+"""
+
+import asyncio
+import base64
+import json
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+try:
+    from azure.iot.device import Message
+    from azure.iot.device.aio import IoTHubDeviceClient
+except ImportError:  # Only the IoT Hub sink needs the SDK
+    Message = IoTHubDeviceClient = None
+
+from spool import SpoolRecord
+
+
+@dataclass
+class Uplink:
+    """One uplink message and the spooled records it delivers."""
+
+    records: List[SpoolRecord]
+    body: bytes
+    properties: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def topics(self) -> set:
+        return {record.topic for record in self.records}
+
+
+class Sink(ABC):
+    # Called when a lost connection has been re-established
+    on_reconnect: Optional[Callable[[], None]] = None
+
+    async def connect(self) -> None:
+        pass
+
+    @abstractmethod
+    async def send(self, uplink: Uplink) -> None:
+        """Deliver one message; raises if it was not accepted."""
+
+    async def close(self) -> None:
+        pass
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+
+class IoTHubSink(Sink):
+    def __init__(self, hostname: str, device_id: str, symmetric_key: str):
+        self.hostname = hostname
+        self.device_id = device_id
+        self.symmetric_key = symmetric_key
+        self.client = None
+        self._was_connected = False
+
+    async def connect(self) -> None:
+        self.client = IoTHubDeviceClient.create_from_symmetric_key(
+            symmetric_key=self.symmetric_key,
+            hostname=self.hostname,
+            device_id=self.device_id,
+        )
+        self.client.on_connection_state_change = self._connection_state_changed
+        await self.client.connect()
+
+    def _connection_state_changed(self) -> None:
+        if self.client.connected:
+            if self._was_connected and self.on_reconnect:
+                self.on_reconnect()
+            self._was_connected = True
+
+    async def send(self, uplink: Uplink) -> None:
+        azure_msg = Message(uplink.body)
+        azure_msg.custom_properties.update(uplink.properties)
+        await self.client.send_message(azure_msg)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.shutdown()
+
+    def describe(self) -> str:
+        return f"Azure IoT Hub {self.hostname}"
+
+
+class FileSink(Sink):
+    """Local stand-in: one JSON line per message, body base64 encoded."""
+
+    def __init__(self, path: str, latency: float = 0.0):
+        self.path = path
+        self.latency = latency
+        self._file = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        self._file = open(self.path, "a")
+
+    async def send(self, uplink: Uplink) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        line = json.dumps({
+            "properties": uplink.properties,
+            "body": base64.b64encode(uplink.body).decode(),
+        })
+        async with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def describe(self) -> str:
+        return f"file {self.path}"
+
+
+class HttpSink(Sink):
+    """Local stand-in: POSTs the body, with properties as X-Uplink-* headers."""
+
+    def __init__(self, url: str, timeout: float = 10.0, max_connections: int = 32):
+        self.url = url
+        self.timeout = timeout
+        # Blocking requests run here rather than in the loop's small default executor
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="http-sink")
+
+    def _post(self, uplink: Uplink) -> None:
+        headers = {f"X-Uplink-{name}": value for name, value in uplink.properties.items()}
+        request = urllib.request.Request(self.url, data=uplink.body, headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def send(self, uplink: Uplink) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._post, uplink)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def describe(self) -> str:
+        return f"HTTP {self.url}"
@@ -0,0 +1,425 @@
+"""Disk-backed store-and-forward spool for the MQTT forwarder.
+
+Every received message is appended to a segment file before the sender
+sees it, and stays there until the sender acknowledges that IoT Hub
+accepted it. Recent messages are also kept in a bounded in-memory buffer,
+so while the uplink keeps up nothing is read back from disk. During an
+outage the backlog accumulates on disk only and is replayed oldest first
+once the sender can send again, including after a restart.
+
+put() hands every record to the OS before it returns, so a killed or
+crashed forwarder loses nothing; only the fsync that protects against a
+power loss is batched (fsync_interval / fsync_batch).
+
+On-disk layout (SPOOL_DIR):
+    <first seq>.seg   append-only records, rotated at segment_bytes
+    acked             every record below this sequence number was acknowledged
+
+Record format: crc32, seq, timestamp, topic length, payload length, topic,
+payload. A torn record at the end of the newest segment (crash mid-write)
+fails its checksum and is truncated on startup.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import BinaryIO, Deque, Iterator, List, Optional, Set, Tuple
+
+_CRC = struct.Struct("<I")
+# seq, timestamp, topic length, payload length
+_FIELDS = struct.Struct("<QdHI")
+_HEADER_SIZE = _CRC.size + _FIELDS.size
+_SEGMENT_SUFFIX = ".seg"
+_ACK_FILE = "acked"
+
+
+@dataclass(frozen=True)
+class SpoolRecord:
+    seq: int
+    timestamp: float
+    topic: str
+    payload: bytes
+    # Whether payload is JSON, if known when it was spooled; not persisted, so
+    # records read back from disk carry None
+    is_json: Optional[bool] = None
+
+
+@dataclass
+class _Segment:
+    first_seq: int
+    path: str
+    size: int
+
+
+def _encode(seq: int, timestamp: float, topic: bytes, payload: bytes) -> bytes:
+    body = _FIELDS.pack(seq, timestamp, len(topic), len(payload)) + topic + payload
+    return _CRC.pack(zlib.crc32(body)) + body
+
+
+def _read_record(stream: BinaryIO) -> Optional[Tuple[SpoolRecord, int]]:
+    """Read one record; returns (record, bytes read) or None at EOF or a torn record."""
+    header = stream.read(_HEADER_SIZE)
+    if len(header) < _HEADER_SIZE:
+        return None
+    (crc,) = _CRC.unpack_from(header)
+    seq, timestamp, topic_length, payload_length = _FIELDS.unpack_from(header, _CRC.size)
+    data = stream.read(topic_length + payload_length)
+    if len(data) < topic_length + payload_length or zlib.crc32(header[_CRC.size:] + data) != crc:
+        return None
+    record = SpoolRecord(
+        seq=seq,
+        timestamp=timestamp,
+        topic=data[:topic_length].decode("utf-8", errors="replace"),
+        payload=data[topic_length:],
+    )
+    return record, _HEADER_SIZE + len(data)
+
+
+def _scan(path: str) -> Iterator[Tuple[SpoolRecord, int]]:
+    """Yield (record, end offset) for every intact record of a segment."""
+    with open(path, "rb") as stream:
+        offset = 0
+        while True:
+            result = _read_record(stream)
+            if result is None:
+                return
+            record, length = result
+            offset += length
+            yield record, offset
+
+
+class DiskSpool:
+    """
+    Persistent FIFO between the MQTT callback thread and the sender.
+
+    put() is called by the MQTT thread, get() and ack() by the sender.
+    Delivery is at-least-once: records handed out but not acknowledged
+    before a crash are sent again after the restart.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 4 * 1024 * 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        memory_records: int = 10000,
+        fsync_interval: float = 0.2,
+        fsync_batch: int = 256,
+    ):
+        """
+        Open (or recover) the spool in directory.
+
+        Args:
+            directory: Where segment files are kept; should be a persistent volume
+            segment_bytes: Size at which the active segment is rotated
+            max_disk_bytes: Disk budget; beyond it the oldest segments are dropped
+            memory_records: Records kept in RAM for the sender in addition to disk
+            fsync_interval: Longest time an appended record waits for fsync (seconds)
+            fsync_batch: Appended records that trigger an fsync before the interval
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_records = memory_records
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+
+        self._lock = threading.Condition()
+        self._segments: Deque[_Segment] = deque()
+        self._memory: Deque[SpoolRecord] = deque()
+        self._writer: Optional[BinaryIO] = None
+        self._reader: Optional[BinaryIO] = None
+        self._reader_segment: Optional[int] = None
+        self._reader_seq = -1  # Sequence number of the record at the reader position
+        self._acked_pending: Set[int] = set()
+        self._unsynced = 0
+        self._synced_watermark = -1
+        self._closed = False
+
+        self.next_seq = 0
+        self.acked_watermark = 0  # Every record below this was acknowledged
+        self.read_seq = 0  # Next record handed to the sender
+        self.disk_bytes = 0
+        self.dropped = 0
+        self.fsyncs = 0
+        self.disk_reads = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="spool-fsync", daemon=True)
+        self._flusher.start()
+
+    # Recovery ----------------------------------------------------------------
+
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"{first_seq:020d}{_SEGMENT_SUFFIX}")
+
+    def _recover(self) -> None:
+        ack_path = os.path.join(self.directory, _ACK_FILE)
+        try:
+            with open(ack_path) as ack_file:
+                self.acked_watermark = int(ack_file.read().strip() or 0)
+        except (OSError, ValueError):
+            self.acked_watermark = 0
+        self._synced_watermark = self.acked_watermark
+
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(_SEGMENT_SUFFIX))
+        for name in names:
+            path = os.path.join(self.directory, name)
+            self._segments.append(
+                _Segment(int(name[: -len(_SEGMENT_SUFFIX)]), path, os.path.getsize(path))
+            )
+
+        self.next_seq = self.acked_watermark
+        if self._segments:
+            # Only the newest segment can end in a torn record
+            active = self._segments[-1]
+            valid_size = 0
+            self.next_seq = max(self.next_seq, active.first_seq)
+            for record, end in _scan(active.path):
+                self.next_seq = record.seq + 1
+                valid_size = end
+            if valid_size < active.size:
+                with open(active.path, "r+b") as stream:
+                    stream.truncate(valid_size)
+                active.size = valid_size
+
+        self.disk_bytes = sum(segment.size for segment in self._segments)
+        self.acked_watermark = min(self.acked_watermark, self.next_seq)
+        self._truncate_acked()
+        if self._segments:
+            self.acked_watermark = max(self.acked_watermark, self._segments[0].first_seq)
+        self.read_seq = self.acked_watermark
+        self._open_writer()
+
+    def _open_writer(self) -> None:
+        if not self._segments:
+            self._segments.append(_Segment(self.next_seq, self._segment_path(self.next_seq), 0))
+        self._writer = open(self._segments[-1].path, "ab")
+
+    # Writing -----------------------------------------------------------------
+
+    def put(
+        self, topic: str, payload: bytes, timestamp: Optional[float] = None, is_json: Optional[bool] = None
+    ) -> int:
+        """
+        Append a message; returns its sequence number.
+
+        is_json (whether the payload is JSON, when the caller already parsed
+        it) travels with the in-memory copy only.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("spool is closed")
+            seq = self.next_seq
+            data = _encode(seq, timestamp, topic.encode("utf-8"), payload)
+            active = self._segments[-1]
+            if active.size and active.size + len(data) > self.segment_bytes:
+                self._rotate(seq)
+                active = self._segments[-1]
+            self._writer.write(data)
+            # Into the page cache now; survives the process, fsync is batched
+            self._writer.flush()
+            active.size += len(data)
+            self.disk_bytes += len(data)
+            self.next_seq += 1
+            self._unsynced += 1
+
+            # Keep the RAM buffer a contiguous run starting at the read position
+            if (not self._memory and seq == self.read_seq) or (
+                self._memory
+                and self._memory[-1].seq == seq - 1
+                and len(self._memory) < self.memory_records
+            ):
+                self._memory.append(SpoolRecord(seq, timestamp, topic, payload, is_json))
+
+            if self.disk_bytes > self.max_disk_bytes:
+                self._drop_oldest()
+            if self._unsynced >= self.fsync_batch:
+                self._sync()
+            self._lock.notify()
+        return seq
+
+    def _rotate(self, first_seq: int) -> None:
+        self._sync()
+        self._writer.close()
+        self._segments.append(_Segment(first_seq, self._segment_path(first_seq), 0))
+        self._writer = open(self._segments[-1].path, "ab")
+
+    def _sync(self) -> None:
+        """Flush appended records to disk and persist the ack watermark."""
+        self._writer.flush()
+        if self._unsynced:
+            os.fsync(self._writer.fileno())
+            self.fsyncs += 1
+            self._unsynced = 0
+        if self.acked_watermark != self._synced_watermark:
+            tmp_path = os.path.join(self.directory, _ACK_FILE + ".tmp")
+            with open(tmp_path, "w") as ack_file:
+                ack_file.write(str(self.acked_watermark))
+            os.replace(tmp_path, os.path.join(self.directory, _ACK_FILE))
+            self._synced_watermark = self.acked_watermark
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self.fsync_interval)
+            with self._lock:
+                if self._closed:
+                    return
+                self._sync()
+
+    def _drop_oldest(self) -> None:
+        """Delete the oldest segments until the spool fits max_disk_bytes again."""
+        while self.disk_bytes > self.max_disk_bytes and len(self._segments) > 1:
+            oldest = self._segments.popleft()
+            next_first = self._segments[0].first_seq
+            self.dropped += max(0, next_first - max(oldest.first_seq, self.acked_watermark))
+            self.disk_bytes -= oldest.size
+            self._delete_segment(oldest)
+            self.acked_watermark = max(self.acked_watermark, next_first)
+            self._acked_pending = {seq for seq in self._acked_pending if seq >= next_first}
+            if self.read_seq < next_first:
+                self.read_seq = next_first
+            while self._memory and self._memory[0].seq < self.read_seq:
+                self._memory.popleft()
+
+    def _delete_segment(self, segment: _Segment) -> None:
+        if self._reader_segment == segment.first_seq:
+            self._close_reader()
+        try:
+            os.remove(segment.path)
+        except OSError:
+            pass
+
+    # Reading -----------------------------------------------------------------
+
+    def get(self, timeout: Optional[float] = None) -> Optional[SpoolRecord]:
+        """
+        Next record for the sender, oldest first.
+
+        Returns:
+            The record, or None on timeout or once the spool is closed
+        """
+        with self._lock:
+            if not self._lock.wait_for(
+                lambda: self._closed or self.read_seq < self.next_seq, timeout
+            ):
+                return None
+            if self._closed:
+                return None
+            if self._memory:
+                record = self._memory.popleft()
+            else:
+                record = self._read_from_disk()
+                if record is None:
+                    return None
+            self.read_seq = record.seq + 1
+            return record
+
+    def _read_from_disk(self) -> Optional[SpoolRecord]:
+        """Read the record at read_seq from the segment files (lock held)."""
+        self._writer.flush()
+        self.disk_reads += 1
+        if self._reader is None or self._reader_seq != self.read_seq:
+            self._seek(self.read_seq)
+        while True:
+            result = _read_record(self._reader)
+            if result is not None:
+                record = result[0]
+                self._reader_seq = record.seq + 1
+                return record
+            # End of this segment: continue with the next one. Records missing
+            # from a damaged segment are counted as dropped and skipped.
+            following = [s.first_seq for s in self._segments if s.first_seq > self._reader_segment]
+            resume_at = following[0] if following else self.next_seq
+            if resume_at > self.read_seq:
+                self.dropped += resume_at - self.read_seq
+                self.read_seq = resume_at
+            if not following:
+                return None
+            self._seek(self.read_seq)
+
+    def _seek(self, seq: int) -> None:
+        """Position the reader at the record with sequence number seq."""
+        segment = self._segments[0]
+        for candidate in self._segments:
+            if candidate.first_seq > seq:
+                break
+            segment = candidate
+        self._close_reader()
+        self._reader = open(segment.path, "rb")
+        self._reader_segment = segment.first_seq
+        offset = 0
+        for record, end in _scan(segment.path):
+            if record.seq >= seq:
+                break
+            offset = end
+        self._reader.seek(offset)
+        self._reader_seq = seq
+
+    def _close_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+            self._reader_segment = None
+
+    # Acknowledgement -----------------------------------------------------------
+
+    def ack(self, seq: int) -> None:
+        """Mark a record as delivered; fully delivered segments are deleted."""
+        with self._lock:
+            if seq < self.acked_watermark:
+                return
+            if seq != self.acked_watermark:
+                self._acked_pending.add(seq)
+                return
+            self.acked_watermark += 1
+            while self.acked_watermark in self._acked_pending:
+                self._acked_pending.remove(self.acked_watermark)
+                self.acked_watermark += 1
+            self._truncate_acked()
+
+    def _truncate_acked(self) -> None:
+        while len(self._segments) > 1 and self._segments[1].first_seq <= self.acked_watermark:
+            segment = self._segments.popleft()
+            self.disk_bytes -= segment.size
+            self._delete_segment(segment)
+
+    # Lifecycle -----------------------------------------------------------------
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Flush everything to disk and wake up a sender blocked in get()."""
+        with self._lock:
+            if self._closed:
+                return
+            self._sync()
+            self._closed = True
+            self._writer.close()
+            self._close_reader()
+            self._lock.notify_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "unacked": self.next_seq - self.acked_watermark,
+                "backlog": self.next_seq - self.read_seq,
+                "memory_records": len(self._memory),
+                "disk_bytes": self.disk_bytes,
+                "segments": len(self._segments),
+                "dropped": self.dropped,
+                "fsyncs": self.fsyncs,
+            }
+
+    def segment_paths(self) -> List[str]:
+        with self._lock:
+            return [segment.path for segment in self._segments]
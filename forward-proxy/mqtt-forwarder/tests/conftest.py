@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The forwarder's modules are top-level scripts next to mqtt-forwarder.py
+FORWARDER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(FORWARDER_DIR))
@@ -0,0 +1,53 @@
+import gzip
+import json
+
+import batching
+from batching import Batcher, encode_entry
+from edge import EdgePipeline, EdgeStage
+from spool import DiskSpool, SpoolRecord
+
+
+def test_entry_splices_json_payload():
+    record = SpoolRecord(0, 1735689600.5, "tele/plug/SENSOR", b'{"ENERGY":{"Power":5}}', True)
+    entry = json.loads(encode_entry(record))
+    assert entry == {
+        "original-topic": "tele/plug/SENSOR",
+        "timestamp": 1735689600.5,
+        "payload": {"ENERGY": {"Power": 5}},
+    }
+
+
+def test_entry_carries_non_json_payload_as_text():
+    for flag in (False, None):
+        entry = json.loads(encode_entry(SpoolRecord(0, 0.0, "tele/plug/LWT", b"Online", flag)))
+        assert entry["payload_text"] == "Online"
+
+
+def test_known_validity_skips_the_parse(monkeypatch):
+    calls = []
+    monkeypatch.setattr(batching, "is_json", lambda payload: calls.append(payload) or True)
+    encode_entry(SpoolRecord(0, 0.0, "tele/plug/SENSOR", b"{}", True))
+    encode_entry(SpoolRecord(1, 0.0, "tele/plug/LWT", b"Online", False))
+    assert calls == []
+    encode_entry(SpoolRecord(2, 0.0, "tele/plug/SENSOR", b"{}"))
+    assert calls == [b"{}"]
+
+
+def test_edge_validity_reaches_the_sender_from_ram_but_not_from_disk(tmp_path):
+    # A passthrough stage makes the pipeline parse each message once
+    pipeline = EdgePipeline([EdgeStage()])
+    spool = DiskSpool(str(tmp_path))
+    for topic, payload in (("tele/plug/SENSOR", b'{"ENERGY":{"Power":1}}'), ("tele/plug/LWT", b"Offline")):
+        for reading in pipeline.process(topic, payload, 1735689600.0):
+            spool.put(reading.topic, reading.payload, reading.timestamp, reading.is_json)
+    assert [spool.get(timeout=1).is_json for _ in range(2)] == [True, False]
+    spool.close()
+
+    # Unacknowledged records come back from disk without the flag and are parsed
+    spool = DiskSpool(str(tmp_path))
+    batch = Batcher(spool, max_delay=0.05).next_batch(timeout=1)
+    spool.close()
+    assert [record.is_json for record in batch.records] == [None, None]
+    entries = json.loads(gzip.decompress(batch.body))["entries"]
+    assert entries[0]["payload"] == {"ENERGY": {"Power": 1}}
+    assert entries[1]["payload_text"] == "Offline"
@@ -0,0 +1,132 @@
+import json
+import math
+
+from edge import DeadbandStage, EdgePipeline, SummaryStage
+
+T0 = 1735689600.0  # Start of a summary period for any period dividing a day
+THRESHOLDS = {"Power": 1.0, "Voltage": 2.0, "Current": 0.01}
+
+
+def sensor(power, voltage=230, current=0.5, **energy):
+    return json.dumps({"Time": "2025-01-01T00:00:00", "ENERGY": dict(
+        energy, Power=power, Voltage=voltage, Current=current)}).encode()
+
+
+def deadband(heartbeat=60.0):
+    return EdgePipeline([DeadbandStage(THRESHOLDS, heartbeat=heartbeat)])
+
+
+def test_deadband_forwards_only_moves_beyond_a_threshold():
+    pipeline = deadband()
+    forwarded = [
+        bool(pipeline.process("tele/plug/SENSOR", payload, T0 + i))
+        for i, payload in enumerate([
+            sensor(100),  # First reading of the topic
+            sensor(100.9),  # Within every threshold
+            sensor(101.5),  # Power moved by 1.5 W from the last forwarded 100
+            sensor(101.5, voltage=233),  # Voltage by 3 V
+            sensor(101.5, voltage=233, current=0.505),  # Current by 0.005 A only
+            sensor(101.5, voltage=233, current=0.52),
+        ])
+    ]
+    assert forwarded == [True, False, True, True, False, True]
+    stats = pipeline.stats()
+    assert (stats["deadband_suppressed"], stats["forwarded"]) == (2, 4)
+
+
+def test_deadband_compares_against_the_last_forwarded_reading():
+    # Slow drift adds up: 0.6 W steps are suppressed until 1.2 W away
+    pipeline = deadband()
+    forwarded = [bool(pipeline.process("tele/plug/SENSOR", sensor(100 + 0.6 * i), T0 + i)) for i in range(4)]
+    assert forwarded == [True, False, True, False]
+
+
+def test_deadband_keeps_state_per_topic():
+    pipeline = deadband()
+    assert pipeline.process("tele/plug-a/SENSOR", sensor(100), T0)
+    assert pipeline.process("tele/plug-b/SENSOR", sensor(100), T0)
+    assert not pipeline.process("tele/plug-a/SENSOR", sensor(100), T0 + 1)
+    assert pipeline.process("tele/plug-b/SENSOR", sensor(150), T0 + 1)
+
+
+def test_deadband_heartbeat_forwards_unchanged_readings():
+    pipeline = deadband(heartbeat=60)
+    forwarded = [t for t in range(0, 150, 10) if pipeline.process("tele/plug/SENSOR", sensor(100), T0 + t)]
+    assert forwarded == [0, 60, 120]
+    assert pipeline.stats()["deadband_heartbeats"] == 2
+
+
+def test_deadband_treats_a_missing_or_non_numeric_field_as_a_change():
+    pipeline = deadband()
+    assert pipeline.process("tele/plug/SENSOR", sensor(100), T0)
+    payload = json.dumps({"ENERGY": {"Power": 100, "Voltage": 230}}).encode()
+    assert pipeline.process("tele/plug/SENSOR", payload, T0 + 1)
+
+
+def test_messages_without_energy_pass_every_stage_untouched():
+    pipeline = EdgePipeline([DeadbandStage(THRESHOLDS), SummaryStage(period=60)])
+    for topic, payload in [
+        ("tele/plug/STATE", b'{"POWER":"ON"}'),
+        ("tele/plug/LWT", b"Online"),
+        ("tele/plug/SENSOR", b'{"ENERGY":"n/a"}'),
+        ("tele/plug/SENSOR", b"[1,2]"),
+    ]:
+        for i in range(2):
+            (reading,) = pipeline.process(topic, payload, T0 + i)
+            assert reading.payload == payload
+    assert pipeline.flush(math.inf) == []
+
+
+def test_summary_emits_min_mean_max_per_period():
+    pipeline = EdgePipeline([SummaryStage(period=60)])
+    for i, (power, current) in enumerate([(10, 0.1), (30, 0.3), (20, 0.2)]):
+        assert pipeline.process("tele/plug/SENSOR", sensor(power, current=current, Total=5 + i), T0 + i) == []
+
+    (reading,) = pipeline.process("tele/plug/SENSOR", sensor(99), T0 + 60)  # Next period closes the first
+    data = json.loads(reading.payload)
+    assert reading.timestamp == T0 + 2
+    assert data["Time"] == "2025-01-01T00:00:00"
+    assert data["ENERGY"]["Power"] == 20.0
+    assert data["ENERGY"]["Current"] == 0.2
+    assert data["ENERGY"]["Total"] == 7  # Non-summarized fields come from the last sample
+    assert data["Summary"] == {
+        "Period": 60,
+        "Samples": 3,
+        "Power": {"Min": 10, "Mean": 20.0, "Max": 30},
+        "Voltage": {"Min": 230, "Mean": 230.0, "Max": 230},
+        "Current": {"Min": 0.1, "Mean": 0.2, "Max": 0.3},
+    }
+    assert reading.data == data and reading.is_json
+
+
+def test_summary_flush_emits_periods_that_ended():
+    pipeline = EdgePipeline([SummaryStage(period=60)])
+    pipeline.process("tele/plug-a/SENSOR", sensor(1), T0)
+    pipeline.process("tele/plug-b/SENSOR", sensor(2), T0 + 30)
+    pipeline.process("tele/plug-b/SENSOR", sensor(4), T0 + 61)
+
+    (reading,) = pipeline.flush(T0 + 60)
+    assert reading.topic == "tele/plug-a/SENSOR"
+    (reading,) = pipeline.flush(T0 + 120)
+    assert json.loads(reading.payload)["Summary"]["Samples"] == 1  # plug-b's second period
+    assert pipeline.flush(math.inf) == []
+
+    stats = pipeline.stats()
+    assert (stats["summary_summarized"], stats["summary_summaries"]) == (3, 3)
+    assert (stats["received"], stats["forwarded"], stats["message_ratio"]) == (3, 3, 1.0)
+
+
+def test_summary_skips_non_numeric_fields():
+    pipeline = EdgePipeline([SummaryStage(period=60)])
+    pipeline.process("tele/plug/SENSOR", json.dumps({"ENERGY": {"Power": 5, "Voltage": None}}).encode(), T0)
+    (reading,) = pipeline.flush(math.inf)
+    summary = json.loads(reading.payload)["Summary"]
+    assert "Voltage" not in summary and summary["Power"]["Max"] == 5
+
+
+def test_deadband_before_summary_summarizes_only_forwarded_readings():
+    pipeline = EdgePipeline([DeadbandStage(THRESHOLDS), SummaryStage(period=60)])
+    for i, power in enumerate([100, 100, 100, 110]):
+        assert pipeline.process("tele/plug/SENSOR", sensor(power), T0 + i) == []
+    (reading,) = pipeline.flush(math.inf)
+    assert json.loads(reading.payload)["Summary"]["Samples"] == 2
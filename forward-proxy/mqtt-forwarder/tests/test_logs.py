@@ -0,0 +1,63 @@
+import io
+import json
+import math
+from pathlib import Path
+
+import logs
+from logs import StructuredLogger
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+def records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_log_writes_one_json_line_per_record():
+    stream = io.StringIO()
+    StructuredLogger(stream).log("Edge statistics", received=3, message_ratio=math.inf, spool=Path("spool"))
+
+    (record,) = records(stream)
+    assert record["level"] == "info"
+    assert record["message"] == "Edge statistics"
+    assert record["received"] == 3
+    assert record["message_ratio"] is None
+    assert record["spool"] == "spool"
+
+
+def test_limited_writes_once_per_interval_with_the_suppressed_count(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(logs, "time", clock)
+    stream = io.StringIO()
+    logger = StructuredLogger(stream, rate_limit_seconds=10)
+
+    for second in range(25):
+        clock.now = 1000.0 + second
+        logger.limited("send_failed", "Send failed, retrying", attempt=second)
+        if second == 5:
+            logger.limited("mqtt_disconnected", "Lost connection", rc=7)
+
+    written = records(stream)
+    assert [(r["message"], r.get("attempt"), r.get("suppressed")) for r in written] == [
+        ("Send failed, retrying", 0, None),
+        ("Lost connection", None, None),  # Keys are limited independently
+        ("Send failed, retrying", 10, 9),
+        ("Send failed, retrying", 20, 9),
+    ]
+    assert all(r["level"] == "warning" for r in written)
+
+
+def test_sampled_writes_every_nth_record():
+    stream = io.StringIO()
+    logger = StructuredLogger(stream)
+    for i in range(10):
+        logger.sampled("forwarded", 4, "Forwarded uplink message", records=i)
+        logger.sampled("off", 0, "Never written")
+
+    assert [(r["records"], r["sample_every"]) for r in records(stream)] == [(3, 4), (7, 4)]
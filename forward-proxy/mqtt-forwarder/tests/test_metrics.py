@@ -0,0 +1,85 @@
+import json
+import math
+
+import metrics
+from metrics import ForwarderMetrics
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+def test_render_exposes_counters_histogram_and_gauges():
+    forwarder_metrics = ForwarderMetrics()
+    forwarder_metrics.inc("messages_received", 3)
+    forwarder_metrics.inc("reconnects", link="mqtt")
+    forwarder_metrics.inc("reconnects", 2, link="uplink")
+    forwarder_metrics.observe_send_latency(0.02)
+    forwarder_metrics.observe_send_latency(0.3)
+    forwarder_metrics.gauge("sends_in_flight", "Uplink sends awaiting acknowledgement", lambda: 4)
+    forwarder_metrics.gauge("edge", "Edge processing statistics", lambda: {"received": 10, "message_ratio": math.inf})
+
+    lines = forwarder_metrics.render().splitlines()
+    assert "forwarder_messages_received_total 3" in lines
+    assert "forwarder_messages_forwarded_total 0" in lines  # Counters exist before their first increment
+    assert 'forwarder_reconnects_total{link="mqtt"} 1' in lines
+    assert 'forwarder_reconnects_total{link="uplink"} 2' in lines
+    assert "# TYPE forwarder_send_latency_seconds histogram" in lines
+    assert 'forwarder_send_latency_seconds_bucket{le="0.025"} 1' in lines
+    assert 'forwarder_send_latency_seconds_bucket{le="0.5"} 2' in lines
+    assert 'forwarder_send_latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "forwarder_send_latency_seconds_count 2" in lines
+    assert "forwarder_sends_in_flight 4" in lines
+    assert "forwarder_edge_received 10" in lines
+    assert "forwarder_edge_message_ratio +Inf" in lines
+
+
+def test_snapshot_is_plain_json():
+    forwarder_metrics = ForwarderMetrics()
+    forwarder_metrics.inc("uplink_bytes", 512)
+    forwarder_metrics.inc("reconnects", link="uplink")
+    forwarder_metrics.observe_send_latency(0.02)
+    forwarder_metrics.gauge("edge", "Edge processing statistics", lambda: {"message_ratio": math.inf})
+
+    stats = json.loads(json.dumps(forwarder_metrics.snapshot(), allow_nan=False))
+    assert stats["uplink_bytes"] == 512
+    assert stats["reconnects_uplink"] == 1
+    assert stats["edge_message_ratio"] is None
+    assert stats["send_latency_seconds"]["count"] == 1
+    assert stats["send_latency_seconds"]["buckets"]["0.025"] == 1
+
+
+def test_failing_gauge_reports_nothing():
+    def not_up_yet():
+        raise AttributeError("spool")
+
+    forwarder_metrics = ForwarderMetrics()
+    forwarder_metrics.gauge("spool", "Spool state", not_up_yet)
+    assert "forwarder_spool" not in forwarder_metrics.render()
+    assert "spool" not in forwarder_metrics.snapshot()
+
+
+def test_rates_average_over_the_window(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(metrics, "time", clock)
+    forwarder_metrics = ForwarderMetrics(rate_window=10)
+    assert forwarder_metrics.rates() == {"enqueue_rate": 0.0, "dequeue_rate": 0.0}
+
+    for second in range(30):
+        clock.now = 1000.0 + second
+        # 10 msg/s enqueued throughout; forwarding stalls after 20 seconds
+        forwarder_metrics.inc("messages_enqueued", 10)
+        if second < 20:
+            forwarder_metrics.inc("messages_forwarded", 5)
+        forwarder_metrics.tick()
+
+    # Only samples of the last rate_window seconds count
+    assert forwarder_metrics.rates() == {"enqueue_rate": 10.0, "dequeue_rate": 0.0}
+    assert forwarder_metrics.snapshot()["enqueue_rate"] == 10.0
@@ -0,0 +1,126 @@
+import asyncio
+import base64
+import gzip
+import json
+
+from batching import Batcher
+from sender import SenderPool, record_uplink
+from sinks import FileSink
+from spool import DiskSpool
+
+
+class OutageFileSink(FileSink):
+    """FileSink that rejects every send while the uplink is down."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.down = True
+        self.rejected = 0
+
+    async def send(self, uplink):
+        if self.down:
+            self.rejected += 1
+            raise ConnectionError("uplink down")
+        await super().send(uplink)
+
+
+def delivered(path):
+    """(topic, payload) of every reading the sink accepted, unpacking batches."""
+    readings = []
+    with open(path) as stream:
+        for line in stream:
+            message = json.loads(line)
+            body = base64.b64decode(message["body"])
+            properties = message["properties"]
+            if "batch-format" not in properties:
+                readings.append((properties["original-topic"], json.loads(body)))
+                continue
+            if properties["batch-encoding"] == "gzip":
+                body = gzip.decompress(body)
+            for entry in json.loads(body)["entries"]:
+                readings.append((entry["original-topic"], entry["payload"]))
+    return readings
+
+
+async def send_until_drained(spool, sink, batcher=None, outage_seconds=0.3):
+    await sink.connect()
+    pool = SenderPool(spool, sink, batcher=batcher, max_in_flight=4, retry_base=0.01, retry_max=0.05)
+    task = asyncio.create_task(pool.run())
+    await asyncio.sleep(outage_seconds)
+    assert spool.stats()["unacked"] > 0  # Nothing was acknowledged during the outage
+    sink.down = False
+    while spool.stats()["unacked"]:
+        await asyncio.sleep(0.02)
+    spool.close()
+    await task
+    await sink.close()
+    return pool
+
+
+def spool_readings(spool, count):
+    expected = []
+    for i in range(count):
+        topic = f"tele/plug-{i % 4}/SENSOR"
+        payload = {"ENERGY": {"Power": i}}
+        spool.put(topic, json.dumps(payload).encode())
+        expected.append((topic, payload))
+    return expected
+
+
+def test_outage_backlog_drains_in_order(tmp_path):
+    spool = DiskSpool(str(tmp_path / "spool"), memory_records=50)
+    expected = spool_readings(spool, 300)
+    sink = OutageFileSink(str(tmp_path / "uplink.jsonl"))
+
+    pool = asyncio.run(send_until_drained(spool, sink))
+
+    assert sink.rejected > 0
+    assert pool.sent == 300
+    readings = delivered(sink.path)
+    assert sorted(readings, key=lambda r: r[1]["ENERGY"]["Power"]) == expected
+    for topic in {topic for topic, _ in expected}:
+        # Same-topic messages stay in spool order despite concurrent sends
+        assert [r for r in readings if r[0] == topic] == [r for r in expected if r[0] == topic]
+
+
+def test_backlog_from_before_a_restart_drains_in_batches(tmp_path):
+    spool = DiskSpool(str(tmp_path / "spool"))
+    expected = spool_readings(spool, 250)
+    spool.close()
+
+    spool = DiskSpool(str(tmp_path / "spool"))
+    sink = OutageFileSink(str(tmp_path / "uplink.jsonl"))
+    batcher = Batcher(spool, max_messages=100, max_delay=0.05, encoding="gzip")
+
+    asyncio.run(send_until_drained(spool, sink, batcher=batcher))
+
+    assert delivered(sink.path) == expected
+    spool = DiskSpool(str(tmp_path / "spool"))
+    assert spool.stats()["unacked"] == 0
+    spool.close()
+
+
+def test_backoff_stays_capped_through_a_long_outage(tmp_path, monkeypatch):
+    # Past ~1024 attempts an uncapped 2 ** attempt would overflow the float delay
+    delays = []
+
+    async def no_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    spool = DiskSpool(str(tmp_path / "spool"))
+    sink = OutageFileSink(str(tmp_path / "uplink.jsonl"))
+    pool = SenderPool(spool, sink, retry_base=0.5, retry_max=30.0)
+    spool.put("tele/plug/SENSOR", b'{"ENERGY":{"Power":1}}')
+    uplink = record_uplink(spool.get(timeout=1))
+
+    async def flaky_send(uplink):
+        sink.rejected += 1
+        if sink.rejected <= 2000:
+            raise ConnectionError("uplink down")
+
+    sink.send = flaky_send
+    assert asyncio.run(pool._send_until_acknowledged(uplink))
+    assert pool.retries == 2000
+    assert len(delays) == 2000 and max(delays) <= 30.0
+    spool.close()
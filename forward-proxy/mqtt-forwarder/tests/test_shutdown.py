@@ -0,0 +1,126 @@
+import json
+import math
+import signal
+import subprocess
+import sys
+import textwrap
+import threading
+
+from conftest import FORWARDER_DIR
+from edge import EdgePipeline, SummaryStage
+from shutdown import shut_down
+from spool import DiskSpool
+
+# Runs the forwarder's own shut_down() from the finally block that SIGTERM
+# now reaches, with the edge summaries of a period still open
+FORWARDER = textwrap.dedent("""
+    import json, sys, threading, time
+    sys.path.insert(0, sys.argv[1])
+    from edge import EdgePipeline, SummaryStage
+    from shutdown import shut_down, stop_on_sigterm
+    from spool import DiskSpool
+
+    def spool_readings(readings):
+        for reading in readings:
+            spool.put(reading.topic, reading.payload, reading.timestamp, reading.is_json)
+
+    stop_on_sigterm()
+    spool = DiskSpool(sys.argv[2])
+    pipeline = EdgePipeline([SummaryStage(period=3600)])
+    edge_stop = threading.Event()
+    edge_thread = threading.Thread(target=edge_stop.wait, daemon=True)
+    edge_thread.start()
+    try:
+        for i in range(30):
+            topic = f"tele/plug-{i % 2}/SENSOR"
+            payload = json.dumps({"ENERGY": {"Power": i, "Voltage": 230, "Current": 0.1}}).encode()
+            spool_readings(pipeline.process(topic, payload, 1735689600.0 + i))
+        print("ready", flush=True)
+        while True:
+            time.sleep(1)
+    finally:
+        shut_down(lambda *args, **fields: None, spool=spool, edge_thread=edge_thread, edge_stop=edge_stop,
+                  edge_pipeline=pipeline, spool_readings=spool_readings)
+""")
+
+
+class FakeClient:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def loop_stop(self):
+        self.calls.append("loop_stop")
+
+    def disconnect(self):
+        self.calls.append("disconnect")
+
+
+class FakeSpool:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def close(self):
+        self.calls.append("close")
+
+
+def test_sigterm_spools_open_summaries(tmp_path):
+    process = subprocess.Popen(
+        [sys.executable, "-c", FORWARDER, str(FORWARDER_DIR), str(tmp_path)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout.readline().strip() == "ready"
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=10) == 0
+
+    spool = DiskSpool(str(tmp_path))
+    records = []
+    while (record := spool.get(timeout=0.1)) is not None:
+        records.append(record)
+    spool.close()
+
+    summaries = {record.topic: json.loads(record.payload)["Summary"] for record in records}
+    assert len(records) == 2
+    assert summaries["tele/plug-0/SENSOR"]["Samples"] == 15
+    assert summaries["tele/plug-1/SENSOR"]["Power"] == {"Min": 1, "Mean": 15.0, "Max": 29}
+
+
+def test_flush_at_infinity_empties_every_stage():
+    pipeline = EdgePipeline([SummaryStage(period=60)])
+    for i in range(5):
+        payload = json.dumps({"ENERGY": {"Power": i}}).encode()
+        assert pipeline.process("tele/plug/SENSOR", payload, 1735689600.0 + i) == []
+    assert pipeline.flush(1735689600.0 + 30) == []  # Period still open
+
+    (summary,) = pipeline.flush(math.inf)
+    assert json.loads(summary.payload)["Summary"]["Samples"] == 5
+    assert pipeline.flush(math.inf) == []
+
+
+def test_shut_down_stops_receiving_before_the_spool_closes():
+    calls = []
+    pipeline = EdgePipeline([SummaryStage(period=60)])
+    pipeline.process("tele/plug/SENSOR", json.dumps({"ENERGY": {"Power": 1}}).encode(), 1735689600.0)
+    edge_stop = threading.Event()
+    edge_thread = threading.Thread(target=edge_stop.wait)
+    edge_thread.start()
+    logged = []
+
+    shut_down(
+        lambda message, level="info", **fields: logged.append(message),
+        spool=FakeSpool(calls),
+        mqtt_client=FakeClient(calls),
+        edge_thread=edge_thread,
+        edge_stop=edge_stop,
+        edge_pipeline=pipeline,
+        spool_readings=lambda readings: calls.extend(reading.topic for reading in readings),
+    )
+    assert calls == ["loop_stop", "tele/plug/SENSOR", "close", "disconnect"]
+    assert not edge_thread.is_alive()
+    assert logged == ["Edge statistics", "Disconnected from local Mosquitto broker."]
+
+
+def test_shut_down_skips_what_startup_did_not_reach():
+    calls = []
+    shut_down(lambda *args, **fields: calls.append(args[0]), spool=FakeSpool(calls))
+    assert calls == ["close"]
@@ -0,0 +1,135 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import FORWARDER_DIR
+from spool import DiskSpool
+
+# Spools records, reports how many, then waits to be stopped; fsync is pushed
+# out of reach so only what put() itself wrote can survive a kill
+WRITER = textwrap.dedent("""
+    import sys, time
+    sys.path.insert(0, sys.argv[1])
+    from shutdown import stop_on_sigterm
+    from spool import DiskSpool
+
+    stop_on_sigterm()
+    spool = DiskSpool(sys.argv[2], fsync_interval=3600, fsync_batch=10**9)
+    try:
+        for i in range(int(sys.argv[3])):
+            spool.put(f"tele/plug-{i % 3}/SENSOR", b'{"n":%d}' % i, 1735689600.0 + i)
+        print("ready", flush=True)
+        while True:
+            time.sleep(1)
+    finally:
+        spool.close()
+        print("closed", flush=True)
+""")
+
+
+def run_writer(directory, count, signum):
+    process = subprocess.Popen(
+        [sys.executable, "-c", WRITER, str(FORWARDER_DIR), str(directory), str(count)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout.readline().strip() == "ready"
+    process.send_signal(signum)
+    output, _ = process.communicate(timeout=10)
+    return process.returncode, output
+
+
+def drain(spool):
+    records = []
+    while True:
+        record = spool.get(timeout=0.1)
+        if record is None:
+            return records
+        records.append(record)
+
+
+@pytest.mark.parametrize("signum", [signal.SIGTERM, signal.SIGKILL], ids=["sigterm", "crash"])
+def test_put_survives_process_stop(tmp_path, signum):
+    returncode, output = run_writer(tmp_path, 500, signum)
+    if signum == signal.SIGTERM:
+        assert returncode == 0
+        assert output.strip() == "closed"
+    else:
+        assert returncode == -signal.SIGKILL
+
+    spool = DiskSpool(str(tmp_path))
+    records = drain(spool)
+    spool.close()
+    assert [record.seq for record in records] == list(range(500))
+    assert records[7].topic == "tele/plug-1/SENSOR"
+    assert records[7].payload == b'{"n":7}'
+    assert records[7].timestamp == 1735689607.0
+
+
+def test_recovery_resumes_after_acknowledged_records(tmp_path):
+    spool = DiskSpool(str(tmp_path), segment_bytes=1024)
+    for i in range(100):
+        spool.put("tele/plug/SENSOR", b'{"n":%d}' % i)
+    for record in drain(spool)[:60]:
+        spool.ack(record.seq)
+    spool.close()
+
+    spool = DiskSpool(str(tmp_path), segment_bytes=1024)
+    records = drain(spool)
+    spool.close()
+    assert [record.seq for record in records] == list(range(60, 100))
+
+
+def test_torn_record_is_truncated_on_recovery(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    for i in range(10):
+        spool.put("tele/plug/SENSOR", b'{"n":%d}' % i)
+    spool.close()
+    (segment,) = [name for name in os.listdir(tmp_path) if name.endswith(".seg")]
+    with open(tmp_path / segment, "r+b") as stream:
+        stream.truncate(os.path.getsize(tmp_path / segment) - 3)
+
+    spool = DiskSpool(str(tmp_path))
+    assert [record.seq for record in drain(spool)] == list(range(9))
+    assert spool.put("tele/plug/SENSOR", b"{}") == 9
+    spool.close()
+
+
+def test_disk_budget_drops_the_oldest_segments_first(tmp_path):
+    spool = DiskSpool(str(tmp_path), segment_bytes=1024, max_disk_bytes=4096, memory_records=10)
+    for i in range(400):
+        spool.put("tele/plug/SENSOR", b'{"n":%d}' % i)
+    stats = spool.stats()
+    records = drain(spool)
+    spool.close()
+
+    assert stats["disk_bytes"] <= 4096
+    first = records[0].seq
+    assert stats["dropped"] == first > 0
+    # What is left is the newest, gap-free run of records
+    assert [record.seq for record in records] == list(range(first, 400))
+
+    spool = DiskSpool(str(tmp_path), segment_bytes=1024, max_disk_bytes=4096)
+    assert [record.seq for record in drain(spool)] == list(range(first, 400))
+    spool.close()
+
+
+def test_dropped_counts_only_records_that_were_never_acknowledged(tmp_path):
+    spool = DiskSpool(str(tmp_path), segment_bytes=1024, max_disk_bytes=4096)
+    for i in range(20):
+        spool.put("tele/plug/SENSOR", b'{"n":%d}' % i)
+    for record in drain(spool):
+        if record.seq < 15:
+            spool.ack(record.seq)
+    for i in range(20, 400):
+        spool.put("tele/plug/SENSOR", b'{"n":%d}' % i)
+    records = drain(spool)
+    dropped = spool.stats()["dropped"]
+    spool.close()
+
+    # Records 15-19 were handed out but never acknowledged when their segment went
+    assert dropped == records[0].seq - 15
@@ -0,0 +1,92 @@
+"""Unbatching throughput of process_iot_hub_message, without the Functions host.
+
+Builds forwarder-style batch bodies locally and times unpacking them into
+the per-reading documents the function sends to Service Bus.
+
+    python benchmarks/unbatch_benchmark.py --batches 200 --batch-size 200
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from unbatch import BATCH_FORMAT, unpack_batch, zstandard  # noqa: E402
+
+
+def tasmota_payload(i: int) -> dict:
+    return {
+        "Time": "2025-01-01T00:00:00",
+        "ENERGY": {
+            "TotalStartTime": "2024-12-01T00:00:00",
+            "Total": 123.456 + i / 1000,
+            "Yesterday": 1.234,
+            "Today": 0.567,
+            "Power": 100 + i % 50,
+            "ApparentPower": 110,
+            "ReactivePower": 20,
+            "Factor": 0.91,
+            "Voltage": 230,
+            "Current": 0.48,
+        },
+    }
+
+
+def build_body(batch_size: int, encoding: str) -> bytes:
+    raw = json.dumps({"format": BATCH_FORMAT, "entries": [
+        {"original-topic": f"tele/plug-{i % 8}/SENSOR", "timestamp": 1735689600 + i, "payload": tasmota_payload(i)}
+        for i in range(batch_size)
+    ]}, separators=(",", ":")).encode()
+    if encoding == "gzip":
+        return gzip.compress(raw, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def bench(encoding: str, batches: int, batch_size: int) -> None:
+    body = build_body(batch_size, encoding)
+    documents = 0
+    out_bytes = 0
+    start = time.perf_counter()
+    for batch in range(batches):
+        enqueued_at = datetime.now(timezone.utc).isoformat()
+        for index, entry in enumerate(unpack_batch(body, encoding)):
+            document = json.dumps({
+                "id": f"plug-{batch}-{index}",
+                "deviceId": "plug",
+                "originalPayload": entry["payload"],
+                "processingTimestamp": enqueued_at,
+                "status": "processed",
+                "messageSource": "AzureFunction-IoTHubProcessor",
+                "readingTimestamp": datetime.fromtimestamp(entry["timestamp"], tz=timezone.utc).isoformat(),
+            })
+            documents += 1
+            out_bytes += len(document)
+    elapsed = time.perf_counter() - start
+
+    print(f"{encoding:<5} {documents / elapsed:>10,.0f} readings/s  "
+          f"{len(body) * batches / 1e3:>9,.1f} kB in ({len(body) / batch_size:6.1f} B/reading)  "
+          f"{out_bytes / 1e3:>9,.1f} kB out to Service Bus")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    for encoding in ("none", "gzip", "zstd"):
+        if encoding == "zstd" and zstandard is None:
+            print("zstd  skipped (zstandard not installed)")
+            continue
+        bench(encoding, args.batches, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,58 @@
 import json
 import logging
+import os
+from datetime import datetime, timezone
+
 import azure.functions as func
+from azure.servicebus import ServiceBusClient, ServiceBusMessage
+
+from unbatch import is_batch, unpack_batch
 
 app = func.FunctionApp()
 
+# The output binding sends one message per invocation, so forwarder batches
+# go out through the SDK; the sender is reused across invocations
+_topic_sender = None
+
+
+def get_topic_sender():
+    global _topic_sender
+    if _topic_sender is None:
+        client = ServiceBusClient.from_connection_string(os.environ["SERVICE_BUS_CONNECTION"])
+        _topic_sender = client.get_topic_sender(topic_name=os.environ["SERVICE_BUS_TOPIC_NAME"])
+    return _topic_sender
+
+
+def send_documents(sender, documents) -> None:
+    """Send documents as one ServiceBusMessageBatch, splitting only if they exceed its size limit."""
+    batch = sender.create_message_batch()
+    for document in documents:
+        message = ServiceBusMessage(document)
+        try:
+            batch.add_message(message)
+        except ValueError:  # MessageSizeExceededError: the batch is full
+            sender.send_messages(batch)
+            batch = sender.create_message_batch()
+            batch.add_message(message)
+    if len(batch):
+        sender.send_messages(batch)
+
+
+def build_document(device_id, document_id, payload, processing_timestamp, reading_timestamp=None) -> str:
+    document = {
+        "id": document_id,
+        "deviceId": device_id,
+        "originalPayload": payload,
+        "processingTimestamp": processing_timestamp,
+        "status": "processed",
+        "messageSource": "AzureFunction-IoTHubProcessor"
+    }
+    if reading_timestamp is not None:
+        # When the forwarder received a batched reading
+        document["readingTimestamp"] = reading_timestamp
+    return json.dumps(document)
+
+
 @app.function_name(name="process_iot_hub_message")
 @app.event_hub_message_trigger(
     arg_name="event",
@@ -16,22 +65,31 @@ app = func.FunctionApp()
     connection="SERVICE_BUS_CONNECTION")
 def process_iot_hub_message(event: func.EventHubEvent, output: func.Out[str]) -> None:
     try:
-        body_dict = json.loads(event.get_body().decode('utf-8'))
         device_id = event.metadata['SystemProperties'].get('iothub-connection-device-id')
+        properties = event.metadata.get('Properties') or {}
         sequence_number = event.sequence_number
+        processing_timestamp = event.enqueued_time.isoformat()
 
-        modified_payload = {
-            "id": f"{device_id}-{sequence_number}",
-            "deviceId": device_id,
-            "originalPayload": body_dict,
-            "processingTimestamp": event.enqueued_time.isoformat(),
-            "status": "processed",
-            "messageSource": "AzureFunction-IoTHubProcessor"
-        }
+        if not is_batch(properties):
+            body_dict = json.loads(event.get_body().decode('utf-8'))
+            output.set(build_document(device_id, f"{device_id}-{sequence_number}", body_dict, processing_timestamp))
+            logging.info(f"Processed message from device: {device_id}")
+            return
 
-        output.set(json.dumps(modified_payload))
+        # A forwarder batch: one document per reading, as if sent one by one
+        documents = []
+        for index, entry in enumerate(unpack_batch(event.get_body(), properties.get('batch-encoding'))):
+            if "payload" not in entry:
+                logging.warning(f"Skipping non-JSON entry on topic '{entry.get('original-topic')}'")
+                continue
+            received_at = datetime.fromtimestamp(entry["timestamp"], tz=timezone.utc).isoformat()
+            documents.append(build_document(
+                device_id, f"{device_id}-{sequence_number}-{index}", entry["payload"],
+                processing_timestamp, received_at
+            ))
+        send_documents(get_topic_sender(), documents)
 
-        logging.info(f"Processed message from device: {device_id}")
+        logging.info(f"Processed batch of {len(documents)} messages from device: {device_id}")
 
     except Exception as e:
         logging.error(f"Failed to process message: {e}")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# function_app.py and unbatch.py are top-level modules of the function app
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
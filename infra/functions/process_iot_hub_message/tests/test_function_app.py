@@ -0,0 +1,115 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+from azure.servicebus import ServiceBusMessageBatch
+
+import function_app
+from unbatch import BATCH_FORMAT, unpack_batch
+
+ENQUEUED = datetime(2025, 1, 1, 12, 0, 5, tzinfo=timezone.utc)
+
+
+class FakeEvent:
+    """The parts of func.EventHubEvent the function reads."""
+
+    def __init__(self, body: bytes, properties=None, sequence_number=7):
+        self._body = body
+        self.metadata = {
+            "SystemProperties": {"iothub-connection-device-id": "plug"},
+            "Properties": properties,
+        }
+        self.sequence_number = sequence_number
+        self.enqueued_time = ENQUEUED
+
+    def get_body(self) -> bytes:
+        return self._body
+
+
+class FakeOut:
+    def __init__(self):
+        self.values = []
+
+    def set(self, value):
+        self.values.append(value)
+
+
+class FakeSender:
+    def __init__(self, max_size_in_bytes=256 * 1024):
+        self.max_size_in_bytes = max_size_in_bytes
+        self.sent = []
+
+    def create_message_batch(self):
+        return ServiceBusMessageBatch(max_size_in_bytes=self.max_size_in_bytes)
+
+    def send_messages(self, batch):
+        self.sent.append([json.loads(str(message)) for message in batch._messages])
+
+
+def batch_event(entries, encoding="gzip"):
+    body = json.dumps({"format": BATCH_FORMAT, "entries": entries}).encode()
+    if encoding == "gzip":
+        body = gzip.compress(body)
+    properties = {"batch-format": BATCH_FORMAT, "batch-encoding": encoding, "batch-count": str(len(entries))}
+    return FakeEvent(body, properties)
+
+
+@pytest.fixture
+def sender(monkeypatch):
+    fake = FakeSender()
+    monkeypatch.setattr(function_app, "get_topic_sender", lambda: fake)
+    return fake
+
+
+def test_single_message_goes_to_the_output_binding_as_one_string(sender):
+    output = FakeOut()
+    function_app.process_iot_hub_message(FakeEvent(b'{"ENERGY":{"Power":5}}'), output)
+
+    [value] = output.values
+    assert isinstance(value, str)
+    document = json.loads(value)
+    assert document["id"] == "plug-7"
+    assert document["originalPayload"] == {"ENERGY": {"Power": 5}}
+    assert document["processingTimestamp"] == ENQUEUED.isoformat()
+    assert "readingTimestamp" not in document
+    assert sender.sent == []
+
+
+def test_batch_is_sent_as_one_message_batch(sender):
+    entries = [
+        {"original-topic": "tele/plug/SENSOR", "timestamp": 1735732800.5, "payload": {"ENERGY": {"Power": 1}}},
+        {"original-topic": "tele/plug/LWT", "timestamp": 1735732801.0, "payload_text": "Online"},
+        {"original-topic": "tele/plug/SENSOR", "timestamp": 1735732802.0, "payload": {"ENERGY": {"Power": 2}}},
+    ]
+    output = FakeOut()
+    function_app.process_iot_hub_message(batch_event(entries), output)
+
+    assert output.values == []
+    [documents] = sender.sent
+    # The non-JSON entry is skipped, the others keep their position in the batch
+    assert [document["id"] for document in documents] == ["plug-7-0", "plug-7-2"]
+    assert [document["originalPayload"]["ENERGY"]["Power"] for document in documents] == [1, 2]
+    assert all(document["processingTimestamp"] == ENQUEUED.isoformat() for document in documents)
+    assert documents[0]["readingTimestamp"] == datetime.fromtimestamp(1735732800.5, tz=timezone.utc).isoformat()
+
+
+def test_batch_larger_than_the_size_limit_is_split(monkeypatch):
+    fake = FakeSender(max_size_in_bytes=1024)
+    monkeypatch.setattr(function_app, "get_topic_sender", lambda: fake)
+    entries = [
+        {"original-topic": "tele/plug/SENSOR", "timestamp": 1735732800.0 + i, "payload": {"ENERGY": {"Power": i}}}
+        for i in range(20)
+    ]
+    function_app.process_iot_hub_message(batch_event(entries, encoding="none"), FakeOut())
+
+    assert len(fake.sent) > 1
+    assert [d["originalPayload"]["ENERGY"]["Power"] for batch in fake.sent for d in batch] == list(range(20))
+
+
+def test_unpack_batch_rejects_other_formats():
+    body = gzip.compress(json.dumps({"format": "other", "entries": []}).encode())
+    with pytest.raises(ValueError):
+        unpack_batch(body, "gzip")
+    with pytest.raises(ValueError):
+        unpack_batch(body, "brotli")
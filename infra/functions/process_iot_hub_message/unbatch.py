@@ -0,0 +1,46 @@
+"""Unpacks uplink batches sent by the MQTT forwarder (see its batching.py).
+
+A batched IoT Hub message carries the custom properties batch-format,
+batch-encoding and batch-count; its body is a JSON envelope
+
+    {"format": "forwarder-batch/v1", "entries": [
+        {"original-topic": "...", "timestamp": 1735689600.123, "payload": {...}},
+        ...
+    ]}
+
+compressed with gzip or zstd, or sent as-is.
+"""
+
+import gzip
+import json
+
+try:
+    import zstandard
+except ImportError:  # Only needed when the forwarder sends zstd batches
+    zstandard = None
+
+BATCH_FORMAT = "forwarder-batch/v1"
+
+
+def is_batch(properties) -> bool:
+    return bool(properties) and properties.get("batch-format") == BATCH_FORMAT
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd batch received but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding in ("none", "", None):
+        return body
+    raise ValueError(f"Unknown batch encoding '{encoding}'")
+
+
+def unpack_batch(body: bytes, encoding: str) -> list:
+    """The individual entries of a batch, in the order the forwarder received them."""
+    envelope = json.loads(decompress(body, encoding))
+    if envelope.get("format") != BATCH_FORMAT:
+        raise ValueError(f"Unexpected batch format '{envelope.get('format')}'")
+    return envelope["entries"]
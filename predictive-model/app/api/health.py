@@ -9,7 +9,11 @@ from app.models.forecaster import forecaster
 from app.models.anomaly_detector import anomaly_detector
 from app.services.data_service import data_service
 from app.config import settings
+from app.core.compute import compute_scheduler
+from app.core.coordination import cluster_coordinator
 from app.core.lifecycle import get_scheduler_status
+from app.core.training_worker import training_worker
+from app.services.change_stream import change_stream_listener
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +88,20 @@ async def detailed_health():
     # Check scheduler health
     scheduler_status = get_scheduler_status()
     health_status["services"]["scheduler"] = scheduler_status
+    health_status["services"]["coordination"] = cluster_coordinator.get_status()
+    health_status["compute"] = compute_scheduler.get_metrics()
+    if settings.TRAINING_WORKER_ENABLED and cluster_coordinator.is_leader:
+        health_status["services"]["training_worker"] = training_worker.get_status()
+
+    # Change-stream listener and dataset catalog (informational, never degrade status)
+    if settings.ENABLE_CHANGE_STREAM:
+        health_status["services"]["change_stream"] = change_stream_listener.get_status()
+    health_status["dataset"] = data_service.catalog.get_status()
+    if data_service.latest_reading_at is not None:
+        health_status["latest_reading_at"] = data_service.latest_reading_at.isoformat()
+        health_status["data_age_seconds"] = round(
+            (datetime.utcnow() - data_service.latest_reading_at).total_seconds(), 1
+        )
 
     # Return appropriate response based on status
     if health_status["status"] == "healthy":
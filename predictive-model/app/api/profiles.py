@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.profiler import admin_token_matches, profile_store
+from app.exceptions import AdminAccessDeniedError
+
+router = APIRouter(prefix="/debug/profiles")
+
+
+def _require_admin(token: Optional[str]) -> None:
+    if not admin_token_matches(token):
+        raise AdminAccessDeniedError("Profile access")
+
+
+@router.get("")
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Stored request profiles, newest first."""
+    _require_admin(x_admin_token)
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """A profile as folded stacks (flamegraph.pl, inferno or speedscope input)."""
+    _require_admin(x_admin_token)
+    folded = profile_store.read(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return PlainTextResponse(folded)
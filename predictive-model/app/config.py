@@ -14,24 +14,80 @@ class Settings(BaseSettings):
     DATABASE_MAX_IDLE_TIME_MS: int = 30000
     DATABASE_SERVER_SELECTION_TIMEOUT_MS: int = 5000
     DATABASE_CONNECT_TIMEOUT_MS: int = 5000
+    DATABASE_FETCH_BATCH_SIZE: int = 5000  # Documents per cursor batch for columnar fetches
+
+    # Dataset catalog (cached oldest/newest timestamps and hourly counts)
+    CATALOG_REFRESH_SECONDS: int = 60  # Background incremental refresh interval
+    CATALOG_WINDOW_DAYS: int = 30  # Hourly counts kept for this many days
+    CATALOG_OLDEST_REFRESH_HOURS: int = 24  # Re-read the oldest timestamp this often
+    CATALOG_GAP_MIN_HOURS: int = 2  # Empty hours in a row reported as a gap
+    CATALOG_SHARED_FILE: str = "dataset_catalog.json"  # Published by the training leader, in MODEL_CACHE_DIR
 
     # Model parameters
     RETRAIN_INTERVAL_HOURS: int = 24
     MIN_TRAINING_DATA_POINTS: int = 48
     MIN_RELIABLE_DATA_DAYS: int = 0
 
+    # Model persistence (trained artifacts survive restarts)
+    MODEL_CACHE_DIR: str = "models_cache"
+    MODEL_ARTIFACT_RETENTION: int = 3  # Versions kept per model
+    TRAINING_SNAPSHOT_MAX_POINTS: int = 200000  # Raw readings kept in the shared training snapshot
+
+    # Training worker (training and tuning run in a separate, lower-priority process)
+    TRAINING_WORKER_ENABLED: bool = True
+    TRAINING_WORKER_CPUS: int = 0  # Cores the worker is pinned to (0 = available CPUs - TUNING_RESERVED_CPUS)
+    TRAINING_WORKER_NICE: int = 10  # Niceness added to the worker process (0-19)
+    TRAINING_WORKER_JOB_TIMEOUT_SECONDS: int = 7200  # Worker is restarted if a job runs longer
+    TRAINING_WORKER_KILL_TIMEOUT_SECONDS: int = 5  # Grace period after SIGTERM before the worker's process group is killed
+
+    # Shared compute lanes (admission control for in-process model work)
+    COMPUTE_INTERACTIVE_WORKERS: int = 4  # Threads for request-path inference
+    COMPUTE_INTERACTIVE_QUEUE_LIMIT: int = 16  # Waiting tasks before requests are rejected with 429
+    COMPUTE_BACKGROUND_WORKERS: int = 2  # Threads for training, tuning and cache refreshes
+    COMPUTE_BACKGROUND_QUEUE_LIMIT: int = 32  # Waiting background tasks before new ones are rejected
+    COMPUTE_BACKGROUND_NICE: int = 5  # Niceness added to background threads (Linux)
+
+    # Metrics (/metrics in Prometheus text format)
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROCESS: bool = True  # Merge samples of all uvicorn workers on this host
+    METRICS_DIR: str = "metrics"  # Per-process snapshot files, inside MODEL_CACHE_DIR
+    METRICS_SNAPSHOT_SECONDS: int = 5  # How often each process publishes its snapshot
+
+    # Request diagnostics (Server-Timing header and admin-only request profiling)
+    SERVER_TIMING_ENABLED: bool = True
+    ADMIN_TOKEN: str = ""  # X-Admin-Token value for admin-only features; empty disables them
+    PROFILE_SAMPLE_INTERVAL_MS: int = 5  # Stack sampling interval of the request profiler
+    PROFILE_DIR: str = "profiles"  # Folded-stack profiles, inside MODEL_CACHE_DIR
+    PROFILE_RETENTION: int = 20  # Profiles kept before the oldest are deleted
+
+    # Cluster coordination (one training leader across uvicorn workers and replicas)
+    COORDINATION_BACKEND: str = "file"  # "file" (lock in MODEL_CACHE_DIR), "mongo" (lease document) or "none"
+    COORDINATION_LOCK_FILE: str = "trainer.lock"  # Stored in MODEL_CACHE_DIR (must be a shared volume)
+    COORDINATION_LEASE_COLLECTION: str = "service-leases"
+    COORDINATION_LEASE_SECONDS: int = 90  # Mongo lease lifetime without renewal
+    COORDINATION_POLL_SECONDS: int = 30  # Lease renewal and follower artifact check interval
+
     # Hyperparameter tuning settings
     TUNING_INTERVAL_DAYS: int = 7
     TUNING_CV_FOLDS: int = 4
     TUNING_MIN_TRAIN_DAYS: int = 3
     BEST_PARAMS_FILE: str = "best_params.json"
     ENABLE_AUTO_TUNING: bool = True
+    TUNING_MAX_WORKERS: int = 0  # Processes for parallel Prophet fits (0 = available CPUs - reserved)
+    TUNING_RESERVED_CPUS: int = 1  # CPUs left free for the API while tuning
+    TUNING_STRATEGY: str = "halving"  # "halving" (grid), "random" (sampled ranges + halving) or "grid"
+    TUNING_HALVING_ETA: int = 2  # Successive halving keeps the best 1/eta each round
+    TUNING_RANDOM_SAMPLES: int = 24  # Parameter sets drawn by the "random" strategy
+    TUNING_TIME_BUDGET_SECONDS: int = 0  # Wall-clock cap for tune_all (0 = unlimited)
+    TUNING_RESULT_STORE_FILE: str = "tuning_results.json"  # Stored next to BEST_PARAMS_FILE
+    TUNING_RESULT_STORE_MAX_ENTRIES: int = 5000  # Least recently used results evicted beyond this
 
     # Resource limits
     MAX_QUERY_LIMIT: int = 50000
     MAX_FORECAST_HOURS: int = 48
     MAX_ANOMALY_HOURS: int = 48
     REQUEST_TIMEOUT_SECONDS: int = 30
+    DEADLINE_CHECK_ROWS: int = 5000  # Rows scored between cooperative deadline checks
 
     # Input validation bounds
     MIN_HOURS: int = 1
@@ -46,12 +102,31 @@ class Settings(BaseSettings):
     ANOMALY_SEVERITY_MEDIUM_COUNT: int = 10  # Count threshold for medium severity
     ANOMALY_SEVERITY_HIGH_SCORE: float = 0.8  # Score threshold for high severity
     ANOMALY_SEVERITY_MEDIUM_SCORE: float = 0.6  # Score threshold for medium severity
+    ANOMALY_SCORE_CACHE_SIZE: int = 8  # Scored windows kept for re-filtering by sensitivity
+    ANOMALY_RECENT_DATA_LIMIT: int = 10000  # Max readings analyzed per anomaly window
+    ANOMALY_BUFFER_CAPACITY: int = 20000  # Scored readings kept for incremental polling
 
     # Feature extraction settings
     ROLLING_WINDOW_SIZE: int = 24  # Window size for rolling statistics (24 hours captures daily patterns)
 
     # Forecaster cache settings
     FORECAST_CACHE_TTL_SECONDS: int = 3600  # 1 hour cache TTL
+    FORECAST_TABLE_LOOKAHEAD_HOURS: int = 24  # Extra hours precomputed beyond MAX_FORECAST_HOURS
+    FORECAST_TABLE_REFRESH_MARGIN_HOURS: int = 6  # Rebuild when remaining lookahead drops below this
+
+    # Fast prediction mode (skips Prophet's 1000-draw uncertainty sampling); opt-in, intervals
+    # then come from FORECAST_INTERVAL_METHOD instead of Prophet's sampled uncertainty
+    FORECAST_FAST_MODE: bool = False
+    FORECAST_INTERVAL_METHOD: str = "residual"  # "residual" (training-time quantiles) or "sampled"
+    FORECAST_UNCERTAINTY_SAMPLES: int = 100  # Posterior draws when FORECAST_INTERVAL_METHOD="sampled"
+
+    # Change-stream listener (pushes new readings instead of waiting for queries)
+    ENABLE_CHANGE_STREAM: bool = False
+    CHANGE_STREAM_BATCH_SIZE: int = 500  # Max readings fanned out per batch
+    CHANGE_STREAM_MAX_AWAIT_MS: int = 1000  # Server-side wait for new events
+    CHANGE_STREAM_POLL_INTERVAL_SECONDS: int = 5  # Tail-poll interval without change streams
+    CHANGE_STREAM_RESUME_TOKEN_FILE: str = "change_stream_resume.json"  # Stored in MODEL_CACHE_DIR
+    CHANGE_STREAM_FORECAST_REFRESH_SECONDS: int = 300  # Min interval between reading-triggered table refreshes
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,249 @@
+"""Shared, bounded thread pools for model computation with admission control.
+
+All CPU-bound model work in the API process runs on one of two lanes:
+interactive (request-path inference) and background (training, tuning,
+cache refreshes, pushed-reading scoring). Each lane has its own threads and
+a queue-depth limit; a saturated lane rejects new work immediately with
+ResourceLimitError (HTTP 429 with Retry-After) instead of letting it wait
+until the request times out.
+"""
+
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.config import settings
+from app.core.metrics import compute_queue_wait, metrics
+from app.exceptions import DeadlineExceededError, ResourceLimitError
+from app.utils.deadline import get_deadline, is_expired
+from app.utils.timing import record_span
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Weight of the newest sample in the moving averages
+_EWMA_ALPHA = 0.2
+
+
+class ComputeLane:
+    """
+    A thread pool with a bounded queue and wait/run time statistics.
+
+    Admission is checked on the event loop before submission, so rejected
+    work costs nothing; counters are shared with the pool threads under a lock.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        queue_limit: int,
+        niceness: int = 0,
+        enforce_deadlines: bool = False,
+    ):
+        """
+        Initialize the lane.
+
+        Args:
+            name: Lane name used in errors and metrics
+            max_workers: Threads running tasks concurrently
+            queue_limit: Tasks allowed to wait for a thread (0 = unbounded)
+            niceness: Scheduling priority increment for the lane's threads (Linux)
+            enforce_deadlines: Skip tasks whose request deadline passed while
+                               queued, and run tasks in the submitter's context
+                               so they can check the deadline cooperatively
+        """
+        self.name = name
+        self.enforce_deadlines = enforce_deadlines
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = queue_limit
+        self.niceness = niceness
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"compute-{name}",
+            initializer=self._init_thread,
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.max_wait_seconds = 0.0
+        self.avg_wait_seconds = 0.0
+        self.avg_run_seconds = 0.0
+
+    def _init_thread(self) -> None:
+        if self.niceness <= 0:
+            return
+        try:
+            # Per-thread on Linux: lowers only this pool thread's priority
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"Could not lower {self.name} compute thread priority: {e}")
+
+    @property
+    def is_saturated(self) -> bool:
+        """Whether new work would exceed the queue limit."""
+        if self.queue_limit <= 0:
+            return False
+        return self.queued + self.running >= self.max_workers + self.queue_limit
+
+    def retry_after_seconds(self) -> int:
+        """Estimated time for the current backlog to drain, for Retry-After."""
+        backlog = self.queued + self.running
+        estimate = backlog * max(self.avg_run_seconds, 0.1) / self.max_workers
+        return max(1, min(60, math.ceil(estimate)))
+
+    def _record(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on the lane's threads.
+
+        Raises:
+            ResourceLimitError: If the lane's queue is full
+            DeadlineExceededError: If the request deadline passed before the task started
+        """
+        if self.enforce_deadlines and is_expired():
+            self._record(expired=1)
+            raise DeadlineExceededError(f"{self.name} compute admission")
+        if self.is_saturated:
+            self._record(rejected=1)
+            raise ResourceLimitError(
+                f"{self.name} compute",
+                f"{self.queued} tasks queued (limit {self.queue_limit})",
+                retry_after=self.retry_after_seconds(),
+            )
+
+        enqueued_at = time.monotonic()
+        deadline = get_deadline() if self.enforce_deadlines else None
+        # Executor threads do not inherit context variables (the request deadline)
+        context = contextvars.copy_context() if self.enforce_deadlines else None
+        self._record(queued=1, submitted=1)
+
+        def task():
+            started = time.monotonic()
+            wait = started - enqueued_at
+            compute_queue_wait.observe(wait, self.name)
+            if context is not None:
+                context.run(record_span, "compute_queue", wait)
+            with self._lock:
+                self.queued -= 1
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+                self.avg_wait_seconds += _EWMA_ALPHA * (wait - self.avg_wait_seconds)
+                if deadline is not None and started >= deadline:
+                    # The request already timed out; do not spend CPU on it
+                    self.expired += 1
+                    raise DeadlineExceededError(f"{self.name} compute queue")
+                self.running += 1
+            try:
+                if context is not None:
+                    return context.run(fn, *args)
+                return fn(*args)
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self.running -= 1
+                    self.avg_run_seconds += _EWMA_ALPHA * (elapsed - self.avg_run_seconds)
+
+        try:
+            result = await asyncio.get_event_loop().run_in_executor(self._executor, task)
+        except DeadlineExceededError:
+            raise
+        except Exception:
+            self._record(failed=1)
+            raise
+        self._record(completed=1)
+        return result
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and wait/run time averages."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self.running,
+                "queued": self.queued,
+                "queue_limit": self.queue_limit,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "avg_wait_seconds": round(self.avg_wait_seconds, 4),
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+                "avg_run_seconds": round(self.avg_run_seconds, 4),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ComputeScheduler:
+    """The API process's compute lanes, shared by every model."""
+
+    def __init__(self):
+        self.lanes: Dict[str, ComputeLane] = {
+            INTERACTIVE: ComputeLane(
+                INTERACTIVE,
+                settings.COMPUTE_INTERACTIVE_WORKERS,
+                settings.COMPUTE_INTERACTIVE_QUEUE_LIMIT,
+                enforce_deadlines=True,
+            ),
+            BACKGROUND: ComputeLane(
+                BACKGROUND,
+                settings.COMPUTE_BACKGROUND_WORKERS,
+                settings.COMPUTE_BACKGROUND_QUEUE_LIMIT,
+                niceness=settings.COMPUTE_BACKGROUND_NICE,
+            ),
+        }
+
+    async def run(self, lane: str, fn: Callable, *args) -> Any:
+        """Run fn(*args) on a lane; raises ResourceLimitError when it is saturated."""
+        return await self.lanes[lane].run(fn, *args)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-lane metrics for health checks."""
+        return {name: lane.get_metrics() for name, lane in self.lanes.items()}
+
+    def shutdown(self) -> None:
+        for lane in self.lanes.values():
+            lane.shutdown()
+
+
+def _lane_values(field: str) -> Dict[Any, float]:
+    return {(name,): getattr(lane, field) for name, lane in compute_scheduler.lanes.items()}
+
+
+# Global singleton instance
+compute_scheduler = ComputeScheduler()
+
+metrics.callback(
+    "compute_queue_depth", "Tasks waiting for a compute lane thread", "gauge", ("lane",),
+    lambda: _lane_values("queued"),
+)
+metrics.callback(
+    "compute_running_tasks", "Tasks running on a compute lane", "gauge", ("lane",),
+    lambda: _lane_values("running"),
+)
+metrics.callback(
+    "compute_rejected_total", "Tasks rejected because a lane was saturated", "counter", ("lane",),
+    lambda: _lane_values("rejected"),
+)
+metrics.callback(
+    "compute_expired_total", "Tasks skipped because their request deadline passed", "counter",
+    ("lane",), lambda: _lane_values("expired"),
+)
@@ -0,0 +1,277 @@
+"""Leader election so only one process per deployment trains models.
+
+Every uvicorn worker and container replica serves requests from the same
+persisted artifacts. One of them holds the trainer lease and runs the
+training and tuning jobs; the others poll the artifact store and hot-reload
+new versions as the leader publishes them.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.models.artifact_store import artifact_store
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "trainer"
+
+
+class LeaderLease:
+    """Base class: a lease that at most one process holds at a time."""
+
+    backend = "none"
+
+    def __init__(self, identity: str):
+        self.identity = identity
+
+    async def acquire(self) -> bool:
+        """Acquire or renew the lease. Returns True while this process holds it."""
+        return True
+
+    async def release(self) -> None:
+        """Give the lease up so another process can take over immediately."""
+
+
+class FileLease(LeaderLease):
+    """
+    Exclusive flock() on a file in a shared directory.
+
+    The kernel drops the lock when the holder exits, so a crashed leader is
+    replaced on the next poll. Suited to uvicorn workers on one host or
+    replicas sharing a local volume; use the Mongo lease across hosts.
+    """
+
+    backend = "file"
+
+    def __init__(self, identity: str, path: Path):
+        super().__init__(identity)
+        self.path = path
+        self._file = None
+
+    async def acquire(self) -> bool:
+        import fcntl
+
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{self.identity}\n")
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    async def release(self) -> None:
+        import fcntl
+
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class MongoLease(LeaderLease):
+    """
+    Lease document renewed by its holder and taken over once expired.
+
+    Works across hosts. A holder that cannot reach MongoDB keeps leading
+    only until its lease would have expired, so two leaders never overlap.
+    """
+
+    backend = "mongo"
+
+    def __init__(self, identity: str, collection, lease_seconds: int):
+        super().__init__(identity)
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self._held_until: Optional[datetime] = None
+
+    async def acquire(self) -> bool:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        try:
+            lease = await self.collection.find_one_and_update(
+                {
+                    "_id": LEASE_NAME,
+                    "$or": [{"holder": self.identity}, {"expires_at": {"$lt": now}}],
+                },
+                {"$set": {"holder": self.identity, "expires_at": expires_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # The document exists and is held by someone else
+            self._held_until = None
+            return False
+        except Exception as e:
+            logger.warning(f"Lease renewal failed: {e}")
+            return self._held_until is not None and datetime.utcnow() < self._held_until
+
+        if lease is not None and lease.get("holder") == self.identity:
+            self._held_until = expires_at
+            return True
+        self._held_until = None
+        return False
+
+    async def release(self) -> None:
+        if self._held_until is None:
+            return
+        self._held_until = None
+        try:
+            await self.collection.delete_one({"_id": LEASE_NAME, "holder": self.identity})
+        except Exception as e:
+            logger.warning(f"Failed to release lease: {e}")
+
+
+class ClusterCoordinator:
+    """
+    Elects the training leader and keeps follower models in sync.
+
+    Every COORDINATION_POLL_SECONDS the lease is acquired or renewed. The
+    leader runs on_elected when it takes over and on_demoted when it loses
+    the lease; followers reload any model whose newest artifact version
+    differs from the one they serve.
+    """
+
+    def __init__(self):
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease: LeaderLease = LeaderLease(self.identity)
+        self.is_leader = False
+        self.leader_since: Optional[datetime] = None
+        self.reloads = 0
+        # model name -> newest artifact version that failed to load; not retried
+        self._rejected: Dict[str, str] = {}
+        self._models: List[Any] = []
+        self._on_elected: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_demoted: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_reloaded: Optional[Callable[[Any], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(
+        self,
+        lease: LeaderLease,
+        models: List[Any],
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        on_reloaded: Callable[[Any], Awaitable[None]],
+    ) -> None:
+        """
+        Set the lease backend and the models followers keep in sync.
+
+        Args:
+            lease: Lease backend (see build_lease)
+            models: BaseModelAsync instances backed by the artifact store
+            on_elected: Awaited when this process becomes the leader
+            on_demoted: Awaited when this process loses leadership
+            on_reloaded: Awaited with each model a follower hot-reloaded
+        """
+        self.lease = lease
+        self._models = models
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._on_reloaded = on_reloaded
+
+    async def start(self) -> None:
+        """Run the first election now, then keep polling in the background."""
+        await self._tick()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling and release the lease."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.lease.release()
+        self.is_leader = False
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.COORDINATION_POLL_SECONDS)
+            try:
+                await self._tick()
+            except Exception as e:
+                logger.error(f"Cluster coordination failed: {e}")
+
+    async def _tick(self) -> None:
+        held = await self.lease.acquire()
+        if held and not self.is_leader:
+            self.is_leader = True
+            self.leader_since = datetime.utcnow()
+            logger.info(f"{self.identity} is now the training leader ({self.lease.backend} lease)")
+            if self._on_elected is not None:
+                await self._on_elected()
+        elif not held and self.is_leader:
+            self.is_leader = False
+            self.leader_since = None
+            logger.warning(f"{self.identity} lost the training lease")
+            if self._on_demoted is not None:
+                await self._on_demoted()
+
+        if not self.is_leader:
+            await self.sync_artifacts()
+
+    async def sync_artifacts(self) -> None:
+        """Hot-reload models whose newest artifact version is not the one served."""
+        for model in self._models:
+            versions = artifact_store.list_versions(model.model_name)
+            if not versions or versions[0] in (model.model_version, self._rejected.get(model.model_name)):
+                continue
+            if await model.reload_artifact_async():
+                self.reloads += 1
+                if self._on_reloaded is not None:
+                    await self._on_reloaded(model)
+            if model.model_version != versions[0]:
+                # Corrupt or incompatible: skip it until the leader publishes a newer one
+                logger.warning(f"Not serving {model.model_name} artifact {versions[0]}; it failed to load")
+                self._rejected[model.model_name] = versions[0]
+
+    def get_status(self) -> Dict[str, Any]:
+        """Coordination state for health checks."""
+        return {
+            "backend": self.lease.backend,
+            "identity": self.identity,
+            "role": "leader" if self.is_leader else "follower",
+            "leader_since": self.leader_since.isoformat() if self.leader_since else None,
+            "artifact_reloads": self.reloads,
+        }
+
+
+def build_lease(identity: str, lease_collection: Callable[[], Any]) -> LeaderLease:
+    """
+    Lease backend for the COORDINATION_BACKEND setting.
+
+    Args:
+        identity: Holder identity written into the lease
+        lease_collection: Returns the Motor collection for Mongo leases
+    """
+    backend = settings.COORDINATION_BACKEND
+    if backend == "file":
+        return FileLease(identity, Path(settings.MODEL_CACHE_DIR) / settings.COORDINATION_LOCK_FILE)
+    if backend == "mongo":
+        return MongoLease(identity, lease_collection(), settings.COORDINATION_LEASE_SECONDS)
+    if backend == "none":
+        return LeaderLease(identity)
+    raise ValueError(f"Unknown coordination backend: {backend}")
+
+
+# Global singleton instance
+cluster_coordinator = ClusterCoordinator()
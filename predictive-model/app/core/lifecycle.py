@@ -1,35 +1,95 @@
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import Dict, Optional
 
 from app.config import settings
+from app.core.compute import BACKGROUND, compute_scheduler
+from app.core.coordination import build_lease, cluster_coordinator
+from app.core.metrics import metrics, training_duration, tuning_duration
+from app.core.training_worker import training_worker
 from app.models.forecaster import forecaster
 from app.models.anomaly_detector import anomaly_detector
+from app.services.change_stream import change_stream_listener
 from app.services.data_service import data_service
+from app.services.training_snapshot import TrainingSnapshot
 from app.tuning.hyperparameter_tuner import tuner
+from app.utils.deadline import clear_deadline
 
 logger = logging.getLogger(__name__)
 
 # Global scheduler reference for health checks
 scheduler = None
 
+_SERVED_MODELS = (forecaster, anomaly_detector)
+
+metrics.callback(
+    "model_training_data_points", "Readings the served model was trained on", "gauge",
+    ("model",), lambda: {(m.model_name,): m.data_points_used for m in _SERVED_MODELS if m.is_trained},
+)
+metrics.callback(
+    "model_artifact_age_seconds", "Time since the served model was trained", "gauge",
+    ("model",),
+    lambda: {
+        (m.model_name,): (datetime.utcnow() - m.last_trained).total_seconds()
+        for m in _SERVED_MODELS
+        if m.last_trained
+    },
+)
+
+
+def has_training_data(days: int) -> bool:
+    """Whether the dataset catalog could yield enough points for training.
+
+    Only rules out hopeless fetches; before the first catalog refresh the
+    training fetch itself decides.
+    """
+    catalog = data_service.catalog
+    if not catalog.is_loaded:
+        return True
+    available = catalog.count_since(datetime.utcnow() - timedelta(days=days))
+    if available < settings.MIN_TRAINING_DATA_POINTS:
+        logger.warning(
+            f"Dataset catalog reports {available} readings in the last {days} days, "
+            f"need {settings.MIN_TRAINING_DATA_POINTS}"
+        )
+        return False
+    return True
+
 
 async def tune_models_job():
     """Background task to tune hyperparameters (runs weekly)."""
+    clear_deadline()
     if not settings.ENABLE_AUTO_TUNING:
         logger.info("Auto-tuning disabled, skipping")
         return
 
+    if not cluster_coordinator.is_leader:
+        logger.info("Not the training leader, skipping tuning")
+        return
+
     logger.info("Starting scheduled hyperparameter tuning...")
+    if not has_training_data(days=7):
+        return
     try:
-        data = await data_service.get_training_data(days=7)
+        snapshot = await data_service.get_training_snapshot(days=7)
+        data = snapshot.hourly
         if data and len(data) >= settings.MIN_TRAINING_DATA_POINTS:
-            # Run tuning in thread pool (CPU-intensive)
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, tuner.tune_all, data)
+            start_time = time.perf_counter()
+            if training_worker.is_running:
+                result = await training_worker.submit("tune", snapshot)
+                # The worker wrote BEST_PARAMS_FILE; refresh this process's copy
+                tuner.load_params()
+                lookups = result.get("result_store", {})
+                tuner.result_store.record_lookups(lookups.get("hits", 0), lookups.get("misses", 0))
+            else:
+                # Run tuning on the background compute lane (CPU-intensive)
+                await compute_scheduler.run(BACKGROUND, tuner.tune_all, data)
+            tuning_duration.observe(time.perf_counter() - start_time)
             logger.info("Hyperparameter tuning completed successfully")
-            # Trigger retraining with new params
-            await train_models_job()
+            # Trigger retraining with new params on the same snapshot
+            await train_models_job(snapshot)
         else:
             logger.warning(
                 f"Insufficient data for tuning: {len(data) if data else 0} points"
@@ -38,34 +98,57 @@ async def tune_models_job():
         logger.error(f"Hyperparameter tuning failed: {e}")
 
 
-async def train_models_job():
+async def train_models_job(snapshot: Optional[TrainingSnapshot] = None):
     """Background task to retrain both forecaster and anomaly detector.
 
     Uses parallel training for Prophet and Isolation Forest to reduce
-    total training time by ~40%.
+    total training time by ~40%. Both train from one snapshot of the
+    window: the forecaster on its hourly resample, the detector on the
+    raw readings.
+
+    Args:
+        snapshot: Snapshot already fetched by the caller (fetched if None)
     """
+    clear_deadline()
+    if not cluster_coordinator.is_leader:
+        logger.info("Not the training leader, skipping training")
+        return
+
     logger.info("Starting scheduled model training...")
+    if not has_training_data(days=7):
+        return
     try:
         # Load any cached params before training
         tuner.load_params()
 
-        # Fetch hourly downsampled data for forecaster (fast training)
-        forecaster_data = await data_service.get_training_data(
-            days=7, downsample_hourly=True
-        )
-        # Fetch raw data for anomaly detector (needs granular data)
-        anomaly_data = await data_service.get_training_data(
-            days=7, downsample_hourly=False
-        )
+        if snapshot is None:
+            snapshot = await data_service.get_training_snapshot(days=7)
+        # Hourly means for the forecaster (fast training)
+        forecaster_data = snapshot.hourly
+        # Raw data for the anomaly detector (needs granular data)
+        anomaly_data = snapshot.raw_tail(settings.MAX_QUERY_LIMIT)
 
         if not forecaster_data and not anomaly_data:
             logger.warning("No data found for training")
             return
 
+        if training_worker.is_running:
+            result = await training_worker.submit("train", snapshot)
+            for model_name, seconds in result.get("model_durations", {}).items():
+                training_duration.observe(seconds, model_name)
+            for model_name, error in result["errors"].items():
+                logger.error(f"{model_name} training failed: {error}")
+            await install_published_models(result["versions"])
+            return
+
         # Train both models in parallel for faster completion
         async def train_forecaster():
             if forecaster_data:
-                success = await forecaster.train_async(forecaster_data)
+                start_time = time.perf_counter()
+                try:
+                    success = await forecaster.train_async(forecaster_data)
+                finally:
+                    training_duration.observe(time.perf_counter() - start_time, forecaster.model_name)
                 if success:
                     logger.info("Forecaster training successful")
                     await forecaster.warm_cache()
@@ -74,7 +157,13 @@ async def train_models_job():
 
         async def train_anomaly_detector():
             if anomaly_data:
-                success = await anomaly_detector.train_async(anomaly_data)
+                start_time = time.perf_counter()
+                try:
+                    success = await anomaly_detector.train_async(anomaly_data)
+                finally:
+                    training_duration.observe(
+                        time.perf_counter() - start_time, anomaly_detector.model_name
+                    )
                 if success:
                     logger.info("Anomaly detector training successful")
                 return success
@@ -96,11 +185,49 @@ async def train_models_job():
         logger.error(f"Training failed: {e}")
 
 
+async def install_published_models(versions: Dict[str, str]) -> None:
+    """Hot-swap to artifacts the training worker has just published.
+
+    Args:
+        versions: Artifact version per model name, as reported by the worker
+    """
+    for model in (forecaster, anomaly_detector):
+        if model.model_name not in versions:
+            continue
+        if await model.reload_artifact_async():
+            logger.info(f"{model.model_name} hot-swapped to {model.model_version}")
+        else:
+            logger.warning(
+                f"{model.model_name} artifact {versions[model.model_name]} "
+                f"could not be loaded, keeping {model.model_version}"
+            )
+    if forecaster.model_name in versions:
+        await forecaster.warm_cache()
+
+
+def load_model_artifacts() -> None:
+    """Restore the newest persisted models so restarts can skip retraining."""
+    forecaster.load_artifact()
+    anomaly_detector.load_artifact()
+
+
 def is_model_stale(max_age_hours: int = 24) -> bool:
-    """Check if any model is older than the specified age."""
+    """Check if any model is older than the specified age or was trained with outdated params."""
     if not forecaster.is_trained or not anomaly_detector.is_trained:
         return True
 
+    # Models restored from disk may predate the latest tuning run
+    if forecaster.training_params is not None and (
+        forecaster.training_params != tuner.get_prophet_params()
+    ):
+        logger.info("Forecaster was trained with outdated hyperparameters")
+        return True
+    if anomaly_detector.training_params is not None and (
+        anomaly_detector.training_params != tuner.get_isolation_forest_params()
+    ):
+        logger.info("Anomaly detector was trained with outdated hyperparameters")
+        return True
+
     now = datetime.utcnow()
     max_age = timedelta(hours=max_age_hours)
 
@@ -117,6 +244,53 @@ def is_model_stale(max_age_hours: int = 24) -> bool:
     return False
 
 
+async def become_leader() -> None:
+    """Take over training and catalog refreshes; retrain if the served models are stale."""
+    # Publish the dataset catalog for the followers now instead of at the next interval
+    if scheduler is not None and scheduler.get_job("catalog_refresh_job") is not None:
+        scheduler.modify_job("catalog_refresh_job", next_run_time=datetime.now())
+
+    if settings.TRAINING_WORKER_ENABLED and not training_worker.is_running:
+        try:
+            training_worker.start()
+        except Exception as e:
+            logger.error(f"Training worker failed to start, training in-process: {e}")
+
+    # Check model freshness - retrain if stale or not trained
+    # This handles the case where container restarts and models are outdated
+    if is_model_stale(max_age_hours=settings.RETRAIN_INTERVAL_HOURS):
+        logger.info("Models are stale or not trained - triggering immediate training")
+        asyncio.create_task(train_models_job())
+    else:
+        logger.info("Models are fresh - skipping startup training")
+        asyncio.create_task(forecaster.warm_cache())
+
+
+async def step_down() -> None:
+    """Stop training after losing the lease; the new leader takes over."""
+    await training_worker.stop()
+
+
+async def on_model_reloaded(model) -> None:
+    """Follower hook: rebuild the forecast table after a hot-reloaded forecaster."""
+    if model is forecaster:
+        await forecaster.warm_cache()
+
+
+def start_change_stream() -> None:
+    """Subscribe the models and data service to pushed readings and start listening."""
+
+    async def score_new_readings(frame):
+        await anomaly_detector.ingest_async(
+            frame, contiguous_since=change_stream_listener.live_since
+        )
+
+    change_stream_listener.subscribe(score_new_readings)
+    change_stream_listener.subscribe(forecaster.note_new_readings)
+    change_stream_listener.subscribe(data_service.note_new_readings)
+    change_stream_listener.start(data_service.collection)
+
+
 def get_scheduler_status() -> dict:
     """Get scheduler status for health checks."""
     if scheduler is None:
@@ -165,6 +339,15 @@ async def setup_lifespan(app, db_client):
     )
     logger.info(f"Scheduled model training every {settings.RETRAIN_INTERVAL_HOURS} hours")
 
+    # Dataset catalog refresh (keeps sufficiency checks off the request path)
+    scheduler.add_job(
+        data_service.refresh_catalog,
+        "interval",
+        seconds=settings.CATALOG_REFRESH_SECONDS,
+        id="catalog_refresh_job",
+        next_run_time=datetime.now(),
+    )
+
     # Weekly hyperparameter tuning job
     if settings.ENABLE_AUTO_TUNING:
         scheduler.add_job(
@@ -179,18 +362,38 @@ async def setup_lifespan(app, db_client):
 
     scheduler.start()
 
+    if settings.METRICS_ENABLED:
+        metrics.start()
+
+    if settings.ENABLE_CHANGE_STREAM:
+        start_change_stream()
+
     # Load cached params
     tuner.load_params()
 
-    # Check model freshness on startup - retrain if stale or not trained
-    # This handles the case where container restarts and models are outdated
-    if is_model_stale(max_age_hours=settings.RETRAIN_INTERVAL_HOURS):
-        logger.info("Models are stale or not trained - triggering immediate training")
-        asyncio.create_task(train_models_job())
-    else:
-        logger.info("Models are fresh - skipping startup training")
+    # Restore persisted models so a restart does not force a full retrain
+    load_model_artifacts()
+
+    # Elect one training leader across workers and replicas; the leader
+    # starts the training worker, followers hot-reload its artifacts
+    cluster_coordinator.configure(
+        build_lease(cluster_coordinator.identity, lambda: data_service.lease_collection),
+        models=[forecaster, anomaly_detector],
+        on_elected=become_leader,
+        on_demoted=step_down,
+        on_reloaded=on_model_reloaded,
+    )
+    await cluster_coordinator.start()
+    if not cluster_coordinator.is_leader:
+        logger.info("Following the training leader - serving its persisted models")
+        asyncio.create_task(forecaster.warm_cache())
 
     yield
 
+    await change_stream_listener.stop()
     scheduler.shutdown()
+    await cluster_coordinator.stop()
+    await training_worker.stop()
+    compute_scheduler.shutdown()
+    metrics.stop()
     db_client.close()
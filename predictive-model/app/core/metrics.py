@@ -0,0 +1,385 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+Counters and histograms keep one cell per thread: only the owning thread
+writes its cell, so the request path never takes a lock (the registry lock
+is taken once per thread and metric, when the cell is created). Scrapes sum
+the cells. Gauges, and counters that other components already keep, are
+read through callbacks at scrape time.
+
+With several uvicorn workers, each process writes its samples to a snapshot
+file in METRICS_DIR; /metrics merges the snapshots of all live processes on
+this host, summing counters and histograms and labelling gauges by pid.
+"""
+
+import asyncio
+import bisect
+import functools
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Request and query latencies, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Training and tuning runs, in seconds
+DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+class _Metric:
+    """Base class: per-thread cells mapping label values to a sample."""
+
+    type = "untyped"
+
+    def __init__(
+        self, registry: "MetricsRegistry", name: str, help: str, labelnames: Sequence[str]
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._registry = registry
+        self._local = threading.local()
+        self._cells: List[Dict[LabelValues, Any]] = []
+
+    def _cell(self) -> Dict[LabelValues, Any]:
+        cell = getattr(self._local, "cell", None)
+        if cell is None:
+            cell = {}
+            self._local.cell = cell
+            with self._registry.lock:
+                self._cells.append(cell)
+        return cell
+
+    def _snapshot_cells(self) -> List[List[Tuple[LabelValues, Any]]]:
+        # list() of a dict is a single C-level copy, safe against the owner's writes
+        return [list(cell.items()) for cell in list(self._cells)]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        cell = self._cell()
+        cell[labelvalues] = cell.get(labelvalues, 0.0) + amount
+
+    def collect(self) -> Dict[LabelValues, float]:
+        totals: Dict[LabelValues, float] = {}
+        for items in self._snapshot_cells():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum."""
+
+    type = "histogram"
+
+    def __init__(
+        self, registry, name, help, labelnames, buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        cell = self._cell()
+        sample = cell.get(labelvalues)
+        if sample is None:
+            # Per-bucket counts (non-cumulative) + overflow, then sum
+            sample = [0] * (len(self.buckets) + 1) + [0.0]
+            cell[labelvalues] = sample
+        sample[bisect.bisect_left(self.buckets, value)] += 1
+        sample[-1] += value
+
+    def collect(self) -> Dict[LabelValues, List[float]]:
+        totals: Dict[LabelValues, List[float]] = {}
+        for items in self._snapshot_cells():
+            for labels, sample in items:
+                merged = totals.setdefault(labels, [0] * len(sample))
+                for i, value in enumerate(list(sample)):
+                    merged[i] += value
+        return totals
+
+
+class _Callback:
+    """Samples read from other components' state at scrape time."""
+
+    def __init__(self, name: str, help: str, type: str, labelnames: Sequence[str], fn: Callable):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def collect(self) -> Dict[LabelValues, float]:
+        try:
+            return {
+                tuple(str(v) for v in labels): float(value) for labels, value in self.fn().items()
+            }
+        except Exception as e:
+            logger.debug(f"Metrics callback {self.name} failed: {e}")
+            return {}
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders the exposition format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+        self.pid = os.getpid()
+        self.host = socket.gethostname()
+        self._writer: Optional[asyncio.Task] = None
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self, name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    def callback(
+        self, name: str, help: str, type: str, labelnames: Sequence[str], fn: Callable[[], Dict]
+    ) -> None:
+        """
+        Register samples computed at scrape time.
+
+        Args:
+            type: "gauge" (labelled by pid when merged) or "counter" (summed)
+            fn: Returns {label values tuple: value}
+        """
+        self._add(_Callback(name, help, type, labelnames, fn))
+
+    # Snapshots ---------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All current samples of this process, JSON-serializable."""
+        metrics = {}
+        for name, metric in self._metrics.items():
+            entry = {"type": metric.type, "help": metric.help, "labels": list(metric.labelnames)}
+            if isinstance(metric, Histogram):
+                entry["buckets"] = list(metric.buckets)
+            entry["samples"] = [[list(labels), value] for labels, value in metric.collect().items()]
+            metrics[name] = entry
+        return {"pid": self.pid, "host": self.host, "written_at": time.time(), "metrics": metrics}
+
+    def _snapshot_dir(self) -> Path:
+        return Path(settings.MODEL_CACHE_DIR) / settings.METRICS_DIR
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return self._snapshot_dir() / f"{self.host}-{pid}.json"
+
+    def write_snapshot(self) -> None:
+        """Atomically write this process's samples for the other workers to merge."""
+        path = self._snapshot_path(self.pid)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    def _peer_snapshots(self) -> List[Dict[str, Any]]:
+        """Snapshots of other live processes on this host."""
+        snapshots = []
+        for path in self._snapshot_dir().glob(f"{self.host}-*.json"):
+            try:
+                pid = int(path.stem.rsplit("-", 1)[1])
+            except ValueError:
+                continue
+            if pid == self.pid:
+                continue
+            if not _pid_alive(pid):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    async def _write_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.METRICS_SNAPSHOT_SECONDS)
+            await asyncio.get_event_loop().run_in_executor(None, self.write_snapshot)
+
+    def start(self) -> None:
+        """Start publishing snapshots (only needed with several workers per host)."""
+        self.pid = os.getpid()
+        if settings.METRICS_MULTIPROCESS and self._writer is None:
+            self.write_snapshot()
+            self._writer = asyncio.ensure_future(self._write_periodically())
+
+    def stop(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+            self._snapshot_path(self.pid).unlink(missing_ok=True)
+
+    # Exposition --------------------------------------------------------------
+
+    def render(self) -> str:
+        """Prometheus text format (0.0.4) for this process, merged with its peers."""
+        snapshots = [self.snapshot()]
+        if settings.METRICS_MULTIPROCESS:
+            snapshots += self._peer_snapshots()
+        return _render(snapshots)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _render(snapshots: List[Dict[str, Any]]) -> str:
+    """Merge process snapshots and render them."""
+    families: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        pid = str(snapshot["pid"])
+        for name, entry in snapshot["metrics"].items():
+            family = families.setdefault(
+                name,
+                {
+                    "type": entry["type"],
+                    "help": entry["help"],
+                    "labels": entry["labels"],
+                    "buckets": entry.get("buckets"),
+                    "samples": {},
+                },
+            )
+            samples = family["samples"]
+            for labels, value in entry["samples"]:
+                if entry["type"] == "gauge":
+                    samples[tuple(labels) + (pid,)] = value
+                elif entry["type"] == "histogram":
+                    merged = samples.setdefault(tuple(labels), [0] * len(value))
+                    for i, v in enumerate(value):
+                        merged[i] += v
+                else:
+                    samples[tuple(labels)] = samples.get(tuple(labels), 0.0) + value
+
+    lines = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = list(family["labels"])
+        if family["type"] == "gauge":
+            labelnames.append("pid")
+        for labels, value in sorted(family["samples"].items()):
+            if family["type"] == "histogram":
+                cumulative = 0
+                for bound, count in zip(list(family["buckets"]) + [math.inf], value[:-1]):
+                    cumulative += count
+                    bucket_labels = _format_labels(
+                        labelnames + ["le"], list(labels) + [_format_value(bound)]
+                    )
+                    lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+                series = _format_labels(labelnames, labels)
+                lines.append(f"{name}_sum{series} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{series} {_format_value(cumulative)}")
+            else:
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# Global singleton instance
+metrics = MetricsRegistry()
+
+# Hot-path series (components register their own callbacks for state they keep)
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+model_cache_requests = metrics.counter(
+    "model_cache_requests_total",
+    "Stale-while-revalidate cache lookups (hit, stale or miss)",
+    ("model", "result"),
+)
+compute_queue_wait = metrics.histogram(
+    "compute_queue_wait_seconds",
+    "Time tasks waited for a compute lane thread",
+    ("lane",),
+)
+mongo_query_duration = metrics.histogram(
+    "mongo_query_duration_seconds",
+    "MongoDB fetch latency by DataService method",
+    ("method",),
+)
+mongo_documents = metrics.counter(
+    "mongo_documents_returned_total",
+    "Readings returned by DataService fetches",
+    ("method",),
+)
+training_duration = metrics.histogram(
+    "model_training_duration_seconds",
+    "Wall-clock training time per model",
+    ("model",),
+    buckets=DURATION_BUCKETS,
+)
+tuning_duration = metrics.histogram(
+    "tuning_duration_seconds",
+    "Wall-clock hyperparameter tuning time",
+    (),
+    buckets=DURATION_BUCKETS,
+)
+
+
+def observe_query(method: str) -> Callable:
+    """Decorator timing an async DataService fetch and counting the readings it returns."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            result = await fn(*args, **kwargs)
+            mongo_query_duration.observe(time.perf_counter() - start_time, method)
+            if result is not None:
+                mongo_documents.inc(method, amount=len(result))
+            return result
+
+        return wrapper
+
+    return decorator
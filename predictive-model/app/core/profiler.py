@@ -0,0 +1,149 @@
+"""On-demand sampling profiler for single requests.
+
+An admin can ask for any request to be profiled (see the server-timing
+middleware). While it runs, a sampler thread snapshots every thread's
+Python stack every PROFILE_SAMPLE_INTERVAL_MS and the samples are stored as
+folded stacks ("frame;frame;frame count" per line), the input format of
+flamegraph.pl, inferno and speedscope. Only one request is profiled at a
+time, and nothing runs unless a profile is requested.
+"""
+
+import asyncio
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+# Innermost frames of pool threads waiting for work; sampling them only adds noise
+_IDLE_FRAMES = frozenset({"wait", "_worker", "select", "poll", "get", "sleep"})
+
+_INVALID_ID_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def admin_token_matches(token: Optional[str]) -> bool:
+    """Whether token is the configured ADMIN_TOKEN (never true while it is unset)."""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads of this process from a helper thread.
+
+    The thread that started the profiler (the event loop) is always kept;
+    other threads are kept only while they are doing something, so idle
+    pool threads do not bury the request's own work. Each stack is rooted
+    at its thread name, so event loop and compute lane time stay apart.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._target_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self.duration_seconds = 0.0
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Signal the sampler thread and wait for it without blocking the event loop."""
+        self._stop.set()
+        self.duration_seconds = time.perf_counter() - self._started_at
+        if self._thread is not None:
+            # A sample in progress walks every thread's stack; join off the loop
+            await asyncio.get_event_loop().run_in_executor(None, self._thread.join)
+
+    def _run(self) -> None:
+        own_thread = threading.get_ident()
+        names: Dict[int, str] = {}
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if thread_id != self._target_thread and frame.f_code.co_name in _IDLE_FRAMES:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                stack.reverse()
+                self.samples[";".join(stack)] += 1
+            self.sample_count += 1
+
+    def folded(self) -> str:
+        """Samples in folded-stack format, one "stack count" line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Keeps the newest PROFILE_RETENTION profiles under MODEL_CACHE_DIR/PROFILE_DIR."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.MODEL_CACHE_DIR) / settings.PROFILE_DIR
+
+    def try_acquire(self) -> bool:
+        """Claim the single profiling slot; False while another request holds it."""
+        return self._lock.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def save(self, method: str, path: str, profiler: SamplingProfiler) -> str:
+        """Write a profile and prune old ones. Returns the profile id."""
+        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        label = _INVALID_ID_CHARS.sub("_", f"{method}{path}").strip("_")
+        profile_id = f"{timestamp}-{label}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.folded").write_text(profiler.folded())
+        for old in self._paths()[settings.PROFILE_RETENTION:]:
+            old.unlink(missing_ok=True)
+        return profile_id
+
+    def _paths(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob("*.folded"), reverse=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": path.stem, "size_bytes": path.stat().st_size} for path in self._paths()
+        ]
+
+    def read(self, profile_id: str) -> Optional[str]:
+        """Folded stacks of a stored profile, or None if there is no such profile."""
+        if _INVALID_ID_CHARS.search(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.folded"
+        if not path.is_file():
+            return None
+        return path.read_text()
+
+
+# Global singleton instance
+profile_store = ProfileStore()
@@ -0,0 +1,361 @@
+"""Out-of-process training: a supervised worker that trains, tunes and publishes artifacts.
+
+The API process only ships the training snapshot over a local queue and, once
+the worker reports new artifact versions, loads them from the artifact store.
+Prophet and Isolation Forest fits therefore never compete with request
+handling for the API's GIL, and the worker runs niced on its own core budget.
+"""
+
+import asyncio
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.exceptions import ModelTrainingError
+
+logger = logging.getLogger(__name__)
+
+# Native thread pools sized from these variables at import time in the worker
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def worker_cores(cpus: Optional[int] = None) -> List[int]:
+    """
+    Cores the training worker is pinned to.
+
+    Args:
+        cpus: Core count; defaults to TRAINING_WORKER_CPUS, where 0 means all
+              CPUs available to this process minus TUNING_RESERVED_CPUS
+
+    Returns:
+        The highest-numbered available cores, leaving the lowest to the API
+    """
+    if cpus is None:
+        cpus = settings.TRAINING_WORKER_CPUS
+    try:
+        available = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        available = list(range(os.cpu_count() or 1))
+    if cpus <= 0:
+        cpus = len(available) - settings.TUNING_RESERVED_CPUS
+    cpus = max(1, min(cpus, len(available)))
+    return available[-cpus:]
+
+
+def _apply_budget(cores: List[int], niceness: int) -> None:
+    """Pin the current process to cores, cap native threads and lower its priority."""
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(len(cores))
+    try:
+        os.sched_setaffinity(0, cores)
+    except (AttributeError, OSError) as e:
+        logger.warning(f"Could not pin training worker to cores {cores}: {e}")
+    if niceness > 0:
+        try:
+            os.nice(niceness)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not lower training worker priority: {e}")
+
+
+def _train(snapshot) -> Dict[str, Any]:
+    """Train both models on a snapshot and persist them as artifacts."""
+    from app.models.anomaly_detector import anomaly_detector
+    from app.models.forecaster import forecaster
+    from app.tuning.hyperparameter_tuner import tuner
+
+    # Pick up parameters written by a tuning job since the last run
+    tuner.load_params()
+    jobs = (
+        (forecaster, snapshot.hourly),
+        (anomaly_detector, snapshot.raw_tail(settings.MAX_QUERY_LIMIT)),
+    )
+
+    durations: Dict[str, float] = {}
+
+    def train_one(model, data) -> Tuple[str, Optional[str], Optional[str]]:
+        if len(data) < settings.MIN_TRAINING_DATA_POINTS:
+            return model.model_name, None, f"insufficient data: {len(data)} points"
+        started = time.monotonic()
+        try:
+            if model._train_sync(data):
+                return model.model_name, model.model_version, None
+            return model.model_name, None, "training returned no model"
+        except Exception as e:
+            return model.model_name, None, str(e)
+        finally:
+            durations[model.model_name] = round(time.monotonic() - started, 3)
+
+    # Both models in parallel, as in-process training does
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        outcomes = list(pool.map(lambda job: train_one(*job), jobs))
+
+    return {
+        "versions": {name: version for name, version, _ in outcomes if version},
+        "errors": {name: error for name, _, error in outcomes if error},
+        "model_durations": durations,
+    }
+
+
+def _tune(snapshot) -> Dict[str, Any]:
+    """Tune both models on the snapshot's hourly series; writes BEST_PARAMS_FILE."""
+    from app.tuning.hyperparameter_tuner import tuner
+
+    store = tuner.result_store
+    hits, misses = store.hits, store.misses
+    metrics = tuner.tune_all(snapshot.hourly).get("metrics", {})
+    return {
+        "metrics": metrics,
+        # This run's result store lookups, for the API process's /tuning/params
+        "result_store": {"hits": store.hits - hits, "misses": store.misses - misses},
+    }
+
+
+_JOB_HANDLERS = {"train": _train, "tune": _tune}
+
+
+def _worker_main(jobs, results, cores: List[int], niceness: int) -> None:
+    """Worker process entry point: run jobs until the None sentinel arrives."""
+    try:
+        # Lead a process group so the tuning pool's processes are stopped with the worker
+        os.setpgid(0, 0)
+    except (AttributeError, OSError) as e:
+        logger.warning(f"Could not start a process group for the training worker: {e}")
+    _apply_budget(cores, niceness)
+    # The API's reserved CPUs are already outside this process's affinity
+    settings.TUNING_RESERVED_CPUS = 0
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logger.info(f"Training worker {os.getpid()} started on cores {cores} (nice +{niceness})")
+
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            job = jobs.get(timeout=5)
+        except queue.Empty:
+            # Exit with the API process even if it died without stopping us
+            if parent is not None and not parent.is_alive():
+                break
+            continue
+        if job is None:
+            break
+        job_id, kind, snapshot = job
+        started = time.monotonic()
+        try:
+            result = _JOB_HANDLERS[kind](snapshot)
+            result["duration_seconds"] = round(time.monotonic() - started, 2)
+            results.put((job_id, result, None))
+        except Exception as e:
+            logger.error(f"Training worker job {kind} failed: {e}")
+            results.put((job_id, None, str(e)))
+
+
+class TrainingWorker:
+    """
+    Supervises the training worker process from the API process.
+
+    Jobs are submitted with submit() and resolved when the worker reports
+    back. A worker that dies or overruns TRAINING_WORKER_JOB_TIMEOUT_SECONDS
+    fails its pending jobs and is restarted.
+    """
+
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._jobs = None
+        self._results = None
+        self._pending: Dict[int, Tuple[asyncio.Future, float, str]] = {}
+        self._job_ids = itertools.count(1)
+        self._reader: Optional[asyncio.Task] = None
+        # Blocking result-queue reads stay off the default executor
+        self._reader_executor = ThreadPoolExecutor(max_workers=1)
+        self._stopping = False
+        self.cores: List[int] = []
+        self.restarts = 0
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.last_job: Optional[Dict[str, Any]] = None
+        self._exit_hook_registered = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        """Spawn the worker process and start collecting its results."""
+        self._stopping = False
+        self._spawn()
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.ensure_future(self._read_results())
+
+    def _spawn(self) -> None:
+        self.cores = worker_cores()
+        self._jobs = self._context.Queue()
+        self._results = self._context.Queue()
+        # Not daemonic: tuning starts its own process pool from the worker
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(self._jobs, self._results, self.cores, settings.TRAINING_WORKER_NICE),
+            name="training-worker",
+        )
+        self._process.start()
+        if not self._exit_hook_registered:
+            # Registered after multiprocessing's own exit handler so it runs first;
+            # that handler would otherwise wait forever on the non-daemonic worker
+            atexit.register(self._kill)
+            self._exit_hook_registered = True
+        logger.info(f"Started training worker (pid {self._process.pid})")
+
+    def _signal_group(self, signum: int) -> None:
+        """Signal the worker's process group (the worker and its tuning pool)."""
+        try:
+            os.killpg(self._process.pid, signum)
+        except (AttributeError, OSError):
+            pass  # Group already gone, or no process groups on this platform
+
+    def _kill(self) -> None:
+        """Terminate the worker and its tuning pool, killing whatever outlives the grace period."""
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._signal_group(signal.SIGTERM)
+            self._process.terminate()
+            self._process.join(timeout=settings.TRAINING_WORKER_KILL_TIMEOUT_SECONDS)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join(timeout=5)
+        # Pool processes that ignored SIGTERM, or outlived a worker that crashed
+        self._signal_group(signal.SIGKILL)
+
+    def _restart(self, reason: str) -> None:
+        """Fail pending jobs, kill the worker if still running and spawn a new one."""
+        logger.error(f"Restarting training worker: {reason}")
+        self._fail_pending(reason)
+        self._kill()
+        self.restarts += 1
+        self._spawn()
+
+    def _fail_pending(self, reason: str) -> None:
+        for future, _, kind in self._pending.values():
+            if not future.done():
+                future.set_exception(ModelTrainingError("training_worker", f"{kind}: {reason}"))
+        self._pending.clear()
+
+    async def submit(self, kind: str, snapshot) -> Dict[str, Any]:
+        """
+        Run a job in the worker and wait for its result.
+
+        Args:
+            kind: "train" or "tune"
+            snapshot: TrainingSnapshot the job works on
+
+        Returns:
+            Job result; "train" reports the published artifact versions
+
+        Raises:
+            ModelTrainingError: If the job failed or the worker died
+        """
+        if not self.is_running:
+            self._restart("worker not running")
+        job_id = next(self._job_ids)
+        future = asyncio.get_event_loop().create_future()
+        self._pending[job_id] = (future, time.monotonic(), kind)
+        self._jobs.put((job_id, kind, snapshot))
+        return await future
+
+    async def _read_results(self) -> None:
+        """Resolve job futures from the result queue and supervise the worker."""
+        loop = asyncio.get_event_loop()
+        while not self._stopping:
+            results = self._results
+            try:
+                job_id, result, error = await loop.run_in_executor(
+                    self._reader_executor, results.get, True, 1.0
+                )
+            except queue.Empty:
+                self._supervise()
+                continue
+            except Exception as e:
+                if not self._stopping:
+                    logger.error(f"Training worker result queue failed: {e}")
+                    self._restart(str(e))
+                continue
+
+            entry = self._pending.pop(job_id, None)
+            if entry is None:
+                continue
+            future, submitted, kind = entry
+            self.last_job = {
+                "kind": kind,
+                "status": "failed" if error else "completed",
+                "finished_at": datetime.utcnow().isoformat(),
+                "duration_seconds": round(time.monotonic() - submitted, 2),
+                "error": error,
+            }
+            if future.done():
+                continue
+            if error is not None:
+                self.jobs_failed += 1
+                future.set_exception(ModelTrainingError("training_worker", f"{kind}: {error}"))
+            else:
+                self.jobs_completed += 1
+                future.set_result(result)
+
+    def _supervise(self) -> None:
+        if self._stopping:
+            return
+        if not self.is_running:
+            self._restart(f"worker exited with code {self._process.exitcode}")
+            return
+        if self._pending:
+            # Jobs run in submission order, so the oldest one is executing
+            _, submitted, kind = min(self._pending.values(), key=lambda entry: entry[1])
+            if time.monotonic() - submitted > settings.TRAINING_WORKER_JOB_TIMEOUT_SECONDS:
+                self._restart(f"{kind} job exceeded {settings.TRAINING_WORKER_JOB_TIMEOUT_SECONDS}s")
+
+    async def stop(self) -> None:
+        """Ask the worker to exit, killing it if it does not within a few seconds."""
+        self._stopping = True
+        self._fail_pending("worker stopped")
+        if self._process is not None:
+            if self._process.is_alive():
+                self._jobs.put(None)
+                await asyncio.get_event_loop().run_in_executor(
+                    self._reader_executor, self._process.join, 10
+                )
+            self._kill()
+            self._process = None
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Worker state for health checks."""
+        return {
+            "status": "running" if self.is_running else "stopped",
+            "pid": self._process.pid if self._process is not None else None,
+            "cores": self.cores,
+            "niceness": settings.TRAINING_WORKER_NICE,
+            "pending_jobs": len(self._pending),
+            "jobs_completed": self.jobs_completed,
+            "jobs_failed": self.jobs_failed,
+            "restarts": self.restarts,
+            "last_job": self.last_job,
+        }
+
+
+# Global singleton instance
+training_worker = TrainingWorker()
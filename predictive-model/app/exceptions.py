@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class PredictionServiceError(Exception):
     """Base exception for prediction service errors."""
 
@@ -56,8 +59,30 @@ class PredictionError(PredictionServiceError):
 class ResourceLimitError(PredictionServiceError):
     """Raised when resource limits are exceeded."""
 
-    def __init__(self, resource: str, limit: str):
+    def __init__(self, resource: str, limit: str, retry_after: Optional[int] = None):
         super().__init__(
             f"Resource limit exceeded for {resource}: {limit}",
             "RESOURCE_LIMIT_EXCEEDED",
         )
+        # Seconds a client should wait before retrying (sent as Retry-After)
+        self.retry_after = retry_after
+
+
+class AdminAccessDeniedError(PredictionServiceError):
+    """Raised when an admin-only feature is used without a valid admin token."""
+
+    def __init__(self, feature: str):
+        super().__init__(
+            f"{feature} requires a valid X-Admin-Token header",
+            "ADMIN_ACCESS_DENIED",
+        )
+
+
+class DeadlineExceededError(PredictionServiceError):
+    """Raised when work is abandoned because its request deadline has passed."""
+
+    def __init__(self, operation: str):
+        super().__init__(
+            f"Request deadline exceeded during {operation}",
+            "DEADLINE_EXCEEDED",
+        )
@@ -11,6 +11,8 @@ from app.exceptions import (
     ModelTrainingError,
     PredictionError,
     ResourceLimitError,
+    DeadlineExceededError,
+    AdminAccessDeniedError,
 )
 
 logger = logging.getLogger(__name__)
@@ -21,6 +23,8 @@ EXCEPTION_CONFIG = {
     DatabaseConnectionError: (503, "error", "Service temporarily unavailable - database error"),
     PredictionError: (503, "error", "Prediction service temporarily unavailable"),
     ResourceLimitError: (429, "warning", None),
+    DeadlineExceededError: (408, "warning", "Request timeout - server overloaded"),
+    AdminAccessDeniedError: (403, "warning", None),
 }
 
 
@@ -34,9 +38,11 @@ def _create_exception_handler(
         log_func(f"{exc.__class__.__name__}: {exc.message}")
 
         detail = custom_detail if custom_detail else exc.message
+        retry_after = getattr(exc, "retry_after", None)
         return JSONResponse(
             status_code=status_code,
             content={"detail": detail, "error_code": exc.error_code},
+            headers={"Retry-After": str(retry_after)} if retry_after else None,
         )
 
     return handler
@@ -3,12 +3,16 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware import Middleware
 from fastapi.middleware.gzip import GZipMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
 import logging
 
 from app.config import settings
 from app.models.forecaster import forecaster
 from app.models.anomaly_detector import anomaly_detector
+from app.services.change_stream import change_stream_listener
 from app.services.data_service import data_service
+from app.utils.series import SeriesFrame
+from app.utils.timing import timed_json_response
 from app.utils.validation import validate_range
 from app.schemas import (
     ForecastResponse,
@@ -16,9 +20,13 @@ from app.schemas import (
     AnomalyResponse,
     DataCollectionStatus,
 )
+from app.middleware.metrics import metrics_middleware
+from app.middleware.server_timing import server_timing_middleware
 from app.middleware.timeout import timeout_middleware
 from app.handlers.exceptions import setup_exception_handlers
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
+from app.api.profiles import router as profiles_router
 from app.core.lifecycle import setup_lifespan, tune_models_job
 from app.tuning.hyperparameter_tuner import tuner
 
@@ -45,11 +53,21 @@ app = FastAPI(
 )
 
 # Setup middleware and exception handlers
+if settings.SERVER_TIMING_ENABLED:
+    # Innermost, so its spans and profile cover only the request's own work
+    app.middleware("http")(server_timing_middleware)
 app.middleware("http")(timeout_middleware)
+if settings.METRICS_ENABLED:
+    # Registered last, so it runs outermost and also times 408 responses
+    app.middleware("http")(metrics_middleware)
 setup_exception_handlers(app)
 
 # Include routers
 app.include_router(health_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
+if settings.SERVER_TIMING_ENABLED:
+    app.include_router(profiles_router)
 
 
 @app.get("/health")
@@ -113,20 +131,25 @@ async def get_forecast(hours: int = 24, past_context_hours: int = 0):
         hours=hours, past_context_hours=past_context_hours
     )
 
-    return {
+    return timed_json_response({
         "predictions": preds,
         "model_info": {
             "name": "prophet-v1",
             "accuracy_mape": 0.05,  # Placeholder - would calculate real accuracy in train()
             "last_trained": str(forecaster.last_trained),
         },
-    }
+    })
 
 
 @app.get("/anomalies")
 async def get_anomalies(hours: int = 24, sensitivity: float = 0.8):
     """Detect anomalies in recent energy consumption data.
 
+    Only readings newer than the detector's rolling score store are fetched
+    and scored; the full window is fetched when the store does not cover it.
+    While the change-stream listener keeps the store current, no query is
+    made at all.
+
     Returns:
         AnomalyResponse if sufficient data, DataCollectionStatus otherwise
     """
@@ -143,22 +166,51 @@ async def get_anomalies(hours: int = 24, sensitivity: float = 0.8):
         sensitivity, settings.MIN_SENSITIVITY, settings.MAX_SENSITIVITY, "Sensitivity"
     )
 
+    window_start = datetime.utcnow() - timedelta(hours=hours)
+
     # Get recent data for anomaly detection
     # Graceful degradation - return empty results on DB errors instead of failing
     try:
-        data = await data_service.get_recent_data(hours=hours)
-        if not data:
-            return {"anomalies": [], "summary": {"total_count": 0, "severity": "low"}}
+        data = None
+        model_version = anomaly_detector.model_version
+        resume_from = anomaly_detector.resume_point(window_start)
+        if resume_from is not None:
+            if change_stream_listener.is_live and resume_from >= change_stream_listener.live_since:
+                # Pushed readings are already scored into the store
+                data = SeriesFrame.empty()
+            else:
+                data = await data_service.get_data_since(resume_from)
+        if data is None:
+            resume_from = None
+            data = await data_service.get_recent_data(hours=hours, columnar=True)
+            if not data:
+                return {"anomalies": [], "summary": {"total_count": 0, "severity": "low"}}
     except DatabaseConnectionError as e:
         logger.error(f"Database error during anomaly detection: {e.message}")
         return {"anomalies": [], "summary": {"total_count": 0, "severity": "low"}}
 
     # Custom exceptions (ModelNotTrainedError, PredictionError) are handled
     # by the global exception handlers registered in setup_exception_handlers()
-    anomalies = await anomaly_detector.detect_async(data, sensitivity=sensitivity)
+    anomalies = await anomaly_detector.detect_incremental_async(
+        data,
+        window_start,
+        sensitivity=sensitivity,
+        resume=resume_from is not None,
+        model_version=model_version,
+    )
+    if anomalies is None:
+        # Retrained since resume_point(): rescore the full window with the new model
+        try:
+            data = await data_service.get_recent_data(hours=hours, columnar=True)
+        except DatabaseConnectionError as e:
+            logger.error(f"Database error during anomaly detection: {e.message}")
+            return {"anomalies": [], "summary": {"total_count": 0, "severity": "low"}}
+        anomalies = await anomaly_detector.detect_incremental_async(
+            data, window_start, sensitivity=sensitivity, resume=False
+        ) or []
     summary = anomaly_detector.get_summary(anomalies)
 
-    return {"anomalies": anomalies, "summary": summary}
+    return timed_json_response({"anomalies": anomalies, "summary": summary})
 
 
 @app.post("/model/train")
@@ -174,10 +226,12 @@ async def trigger_training(background_tasks: BackgroundTasks):
 async def get_tuning_params():
     """Get current hyperparameters (tuned or default)."""
     params = tuner.load_params()
+    result_store = tuner.result_store.get_stats()
     if params:
         return {
             "status": "tuned",
             "params": params,
+            "result_store": result_store,
         }
     return {
         "status": "default",
@@ -185,6 +239,7 @@ async def get_tuning_params():
             "prophet": tuner.get_prophet_params(),
             "isolation_forest": tuner.get_isolation_forest_params(),
         },
+        "result_store": result_store,
     }
 
 
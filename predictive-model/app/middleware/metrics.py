@@ -0,0 +1,19 @@
+import time
+
+from fastapi import Request
+
+from app.core.metrics import http_request_duration
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Record request latency per route template (not per concrete URL)."""
+    start_time = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    http_request_duration.observe(
+        time.perf_counter() - start_time,
+        request.method,
+        route.path if route is not None else "unmatched",
+        str(response.status_code),
+    )
+    return response
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.core.profiler import SamplingProfiler, admin_token_matches, profile_store
+from app.exceptions import AdminAccessDeniedError
+from app.utils.timing import server_timing_header, start_timing, stop_timing
+
+PROFILE_FLAGS = {"1", "true", "yes"}
+
+
+def _profile_requested(request: Request) -> bool:
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile")
+    return flag is not None and flag.lower() in PROFILE_FLAGS
+
+
+async def server_timing_middleware(request: Request, call_next):
+    """Report per-stage timings in Server-Timing and profile requests on demand.
+
+    An admin requests a profile with "X-Profile: 1" (or ?profile=1) plus a
+    valid X-Admin-Token; the stored profile's id is returned in X-Profile-Id,
+    or X-Profile-Status is "busy" while another request is being profiled.
+    """
+    profiler = None
+    profile_requested = _profile_requested(request)
+    if profile_requested:
+        if not admin_token_matches(request.headers.get("X-Admin-Token")):
+            error = AdminAccessDeniedError("Request profiling")
+            return JSONResponse(
+                status_code=403, content={"detail": error.message, "error_code": error.error_code}
+            )
+        # One profile at a time; concurrent requests are served unprofiled
+        if profile_store.try_acquire():
+            profiler = SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            profiler.start()
+
+    token = start_timing()
+    start_time = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        spans = stop_timing(token)
+        if profiler is not None:
+            await profiler.stop()
+            profile_store.release()
+    response.headers["Server-Timing"] = server_timing_header(
+        spans, time.perf_counter() - start_time
+    )
+
+    if profiler is not None:
+        profile_id = await asyncio.get_event_loop().run_in_executor(
+            None, profile_store.save, request.method, request.url.path, profiler
+        )
+        response.headers["X-Profile-Id"] = profile_id
+    elif profile_requested:
+        response.headers["X-Profile-Status"] = "busy"
+    return response
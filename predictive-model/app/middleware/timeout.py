@@ -5,12 +5,15 @@ from fastapi import Request
 from fastapi.responses import JSONResponse
 
 from app.config import settings
+from app.utils.deadline import reset_deadline, set_deadline
 
 logger = logging.getLogger(__name__)
 
 
 async def timeout_middleware(request: Request, call_next):
     """Add timeout and resource protection."""
+    # Downstream queries and compute read the deadline and stop once it passes
+    token = set_deadline(settings.REQUEST_TIMEOUT_SECONDS)
     try:
         start_time = time.time()
         response = await asyncio.wait_for(
@@ -32,4 +35,6 @@ async def timeout_middleware(request: Request, call_next):
         return JSONResponse(
             status_code=500, content={"detail": "Internal server error"}
         )
+    finally:
+        reset_deadline(token)
 
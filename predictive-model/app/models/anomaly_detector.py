@@ -1,23 +1,39 @@
+import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 import logging
+import threading
 
 from app.config import settings
+from app.core.compute import BACKGROUND
 from app.models.base_model import BaseModelAsync
+from app.models.score_buffer import RollingScoreBuffer
 from app.tuning.hyperparameter_tuner import tuner, DEFAULT_ISOLATION_FOREST_PARAMS
+from app.utils.deadline import check_deadline
 from app.utils.feature_extraction import extract_time_series_features
+from app.utils.timing import span
+from app.utils.series import SeriesData, SeriesFrame, as_dataframe
 from app.exceptions import (
     InsufficientDataError,
     ModelNotTrainedError,
     ModelTrainingError,
+    DeadlineExceededError,
     PredictionError,
+    ResourceLimitError,
 )
 
 logger = logging.getLogger(__name__)
 
+# Returned by the incremental scorer when the rolling store no longer continues
+# from the caller's resume point (the model was retrained in between)
+_RESUME_LOST = object()
+
 
 def calculate_anomaly_threshold(sensitivity: float, normalized_scores: np.ndarray) -> float:
     """
@@ -61,31 +77,102 @@ def calculate_anomaly_threshold(sensitivity: float, normalized_scores: np.ndarra
     return threshold
 
 
+@dataclass(frozen=True)
+class ScoredWindow:
+    """
+    Result of scoring one data window with the Isolation Forest.
+
+    Independent of sensitivity, so it can be cached and re-filtered cheaply
+    for every sensitivity value.
+    """
+
+    timestamps: pd.DatetimeIndex
+    values: np.ndarray
+    expected: np.ndarray  # Rolling mean of values
+    scores: np.ndarray  # Normalized anomaly scores (0-1, higher = more anomalous)
+    sorted_scores: np.ndarray  # Ascending copy of scores for threshold lookup
+    is_outlier: np.ndarray  # Forest decision (decision_function < 0)
+
+    def classify(self, sensitivity: float) -> List[Dict[str, Any]]:
+        """Apply the sensitivity threshold and classify flagged points."""
+        threshold = calculate_anomaly_threshold(sensitivity, self.sorted_scores)
+        power_diff = np.abs(self.values - self.expected)
+        mask = (
+            self.is_outlier
+            & (self.scores > threshold)
+            & (power_diff >= settings.ANOMALY_MIN_POWER_DIFF)
+        )
+        idx = np.flatnonzero(mask)
+        if len(idx) == 0:
+            return []
+
+        actual = self.values[idx]
+        expected = self.expected[idx]
+        anomaly_types = np.where(
+            actual > expected * settings.ANOMALY_SPIKE_THRESHOLD,
+            "spike",
+            np.where(actual < expected * settings.ANOMALY_DIP_THRESHOLD, "dip", "pattern_change"),
+        )
+
+        return [
+            {
+                "timestamp": timestamp,
+                "actual_power": a,
+                "expected_power": e,
+                "anomaly_score": score,
+                "anomaly_type": str(anomaly_type),
+            }
+            for timestamp, a, e, score, anomaly_type in zip(
+                self.timestamps[idx],
+                actual.tolist(),
+                expected.tolist(),
+                self.scores[idx].tolist(),
+                anomaly_types,
+            )
+        ]
+
+
 class AnomalyDetector(BaseModelAsync):
     """Isolation Forest-based anomaly detection for energy consumption."""
 
+    model_name = "anomaly_detector"
+    artifact_name = "model.joblib"
+
     def __init__(self):
         super().__init__()
         # Contamination is the expected proportion of anomalies
         # Using "auto" lets the algorithm decide based on data distribution
         self.contamination = "auto"
+        # LRU of scored windows keyed by (start, end, length, model version)
+        self._scored_windows: "OrderedDict[Tuple, ScoredWindow]" = OrderedDict()
+        # Rolling store of scored readings for incremental polling
+        self._score_buffer = RollingScoreBuffer(settings.ANOMALY_BUFFER_CAPACITY)
+        self._buffer_lock = threading.Lock()
+
+    def _save_model_file(self, path: Path) -> None:
+        """Serialize the fitted forest uncompressed so it can be memory-mapped."""
+        joblib.dump(self.model, path)
 
-    async def train_async(self, data: List[Dict[str, Any]]) -> bool:
+    def _load_model_file(self, path: Path) -> IsolationForest:
+        """Load the forest with its tree arrays memory-mapped read-only."""
+        return joblib.load(path, mmap_mode="r")
+
+    async def train_async(self, data: SeriesData) -> bool:
         """Async training method that runs in thread pool."""
         async with self._training_lock:
             if len(data) < settings.MIN_TRAINING_DATA_POINTS:
                 raise InsufficientDataError(len(data), settings.MIN_TRAINING_DATA_POINTS)
 
-            result = await self._run_in_executor(self._train_sync, data)
+            result = await self._run_in_executor(self._train_sync, data, lane=BACKGROUND)
             return result if result is not None else False
 
-    def train(self, data: List[Dict[str, Any]]) -> bool:
+    def train(self, data: SeriesData) -> bool:
         """Synchronous training method for backward compatibility."""
         return self._train_sync(data)
 
-    def _train_sync(self, data: List[Dict[str, Any]]) -> bool:
+    def _train_sync(self, data: SeriesData) -> bool:
         """Internal synchronous training method."""
-        df = pd.DataFrame(data)
+        df = as_dataframe(data)
         features = extract_time_series_features(df)
 
         # Load tuned hyperparameters (falls back to defaults if none cached)
@@ -110,90 +197,260 @@ class AnomalyDetector(BaseModelAsync):
             raise ModelTrainingError("anomaly_detector", str(e)) from e
 
         self._update_training_status(len(features))
+        timestamps = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert(None)
+        self._persist_artifact(
+            timestamps.to_numpy(dtype="datetime64[ns]"), df["value"].to_numpy(dtype=float), params
+        )
         logger.info("Anomaly detector training complete.")
         return True
 
-    async def detect_async(
-        self, data: List[Dict[str, Any]], sensitivity: float = 0.8
-    ) -> List[Dict[str, Any]]:
-        """Async anomaly detection method that runs in thread pool."""
-        if not self.is_trained or self.model is None:
-            raise ModelNotTrainedError("anomaly_detector")
-
-        if not data:
-            return []
-
-        result = await self._run_in_executor(self._detect_sync, data, sensitivity)
-        return result if result is not None else []
+    def invalidate_cache(self) -> None:
+        super().invalidate_cache()
+        self._scored_windows.clear()
+        with self._buffer_lock:
+            self._score_buffer.clear()
 
     def detect(
-        self, data: List[Dict[str, Any]], sensitivity: float = 0.8
+        self, data: SeriesData, sensitivity: float = 0.8
     ) -> List[Dict[str, Any]]:
         """Synchronous detection method for backward compatibility."""
         return self._detect_sync(data, sensitivity)
 
     def _detect_sync(
-        self, data: List[Dict[str, Any]], sensitivity: float
+        self, data: SeriesData, sensitivity: float
     ) -> List[Dict[str, Any]]:
         """Internal synchronous detection method."""
+        window = self._score_sync(data)
+        with span("anomaly_classify"):
+            return window.classify(sensitivity)
+
+    def _decision_function(self, features: np.ndarray) -> np.ndarray:
+        """Forest decision scores, computed in chunks with deadline checks between them."""
+        chunk = max(1, settings.DEADLINE_CHECK_ROWS)
+        with span("anomaly_score"):
+            if len(features) <= chunk:
+                check_deadline("anomaly scoring")
+                return self.model.decision_function(features)
+            scores = np.empty(len(features), dtype=np.float64)
+            for start in range(0, len(features), chunk):
+                check_deadline("anomaly scoring")
+                scores[start:start + chunk] = self.model.decision_function(
+                    features[start:start + chunk]
+                )
+            return scores
+
+    def _score_sync(self, data: SeriesData) -> ScoredWindow:
+        """Run the forest over a window once and keep everything classification needs."""
         try:
-            df = pd.DataFrame(data)
-            features = extract_time_series_features(df)
-
-            # Get anomaly scores (-1 for anomalies, 1 for normal)
-            predictions = self.model.predict(features)
-            # Get decision function scores (lower = more anomalous)
-            scores = self.model.decision_function(features)
-
-            # Normalize scores to 0-1 range (higher = more anomalous)
-            min_score, max_score = scores.min(), scores.max()
-            if max_score != min_score:
-                normalized_scores = 1 - (scores - min_score) / (max_score - min_score)
-            else:
-                normalized_scores = np.zeros_like(scores)
-
-            # Calculate expected values using rolling mean
-            df["expected"] = (
-                df["value"]
-                .rolling(window=settings.ROLLING_WINDOW_SIZE, min_periods=1, center=True)
-                .mean()
-            )
+            df = as_dataframe(data)
+            with span("anomaly_features"):
+                features = extract_time_series_features(df)
+
+            # Decision function scores (lower = more anomalous); the forest's
+            # predict() is exactly decision_function < 0, so one pass suffices
+            scores = self._decision_function(features)
+
+            with span("anomaly_window"):
+                return self._build_scored_window(
+                    pd.DatetimeIndex(df["timestamp"]), df["value"].to_numpy(dtype=float), scores
+                )
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            raise PredictionError("anomaly_detector", f"detection failed: {e}") from e
+
+    @staticmethod
+    def _build_scored_window(
+        timestamps: pd.DatetimeIndex, values: np.ndarray, scores: np.ndarray
+    ) -> ScoredWindow:
+        """Normalize raw decision scores over a window and attach expectations."""
+        # Normalize scores to 0-1 range (higher = more anomalous)
+        min_score, max_score = scores.min(), scores.max()
+        if max_score != min_score:
+            normalized_scores = 1 - (scores - min_score) / (max_score - min_score)
+        else:
+            normalized_scores = np.zeros_like(scores)
+
+        # Calculate expected values using rolling mean
+        expected = (
+            pd.Series(values)
+            .rolling(window=settings.ROLLING_WINDOW_SIZE, min_periods=1, center=True)
+            .mean()
+        )
 
-            anomalies = []
-            threshold = calculate_anomaly_threshold(sensitivity, normalized_scores)
-
-            for i, (pred, score) in enumerate(zip(predictions, normalized_scores)):
-                actual = df.iloc[i]["value"]
-                expected = df.iloc[i]["expected"]
-                power_diff = abs(actual - expected)
-                is_statistical_anomaly = pred == -1 and score > threshold
-                is_significant_change = power_diff >= settings.ANOMALY_MIN_POWER_DIFF
-
-                if is_statistical_anomaly and is_significant_change:
-                    timestamp = df.iloc[i]["timestamp"]
-
-                    # Classify anomaly type
-                    if actual > expected * settings.ANOMALY_SPIKE_THRESHOLD:
-                        anomaly_type = "spike"
-                    elif actual < expected * settings.ANOMALY_DIP_THRESHOLD:
-                        anomaly_type = "dip"
-                    else:
-                        anomaly_type = "pattern_change"
-
-                    anomalies.append(
-                        {
-                            "timestamp": timestamp,
-                            "actual_power": float(actual),
-                            "expected_power": float(expected),
-                            "anomaly_score": float(score),
-                            "anomaly_type": anomaly_type,
-                        }
-                    )
-
-            return anomalies
+        return ScoredWindow(
+            timestamps=timestamps,
+            values=values,
+            expected=expected.to_numpy(dtype=float),
+            scores=normalized_scores,
+            sorted_scores=np.sort(normalized_scores),
+            is_outlier=scores < 0,
+        )
+
+    def resume_point(self, window_start: datetime) -> Optional[datetime]:
+        """Timestamp to fetch new readings from, if the rolling store covers the window.
+
+        Returns None when the window has to be fetched and scored in full
+        (empty store, retrained model, or a window reaching further back).
+        """
+        buffer = self._score_buffer
+        if not len(buffer) or buffer.covered_from is None:
+            return None
+        if buffer.covered_from > np.datetime64(window_start):
+            return None
+        return pd.Timestamp(buffer.last_timestamp).to_pydatetime()
+
+    async def detect_incremental_async(
+        self,
+        data: SeriesFrame,
+        window_start: datetime,
+        sensitivity: float = 0.8,
+        resume: bool = True,
+        model_version: Optional[str] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Detect anomalies in [window_start, now] scoring only unseen readings.
+
+        Args:
+            data: Readings since resume_point() (resume=True) or the full window
+            window_start: Start of the analysis window
+            sensitivity: Detection sensitivity
+            resume: Whether data continues the rolling store or replaces it
+            model_version: Model version when resume_point() was taken
+
+        Returns:
+            Anomalies, or None if the model was retrained since resume_point()
+            and the full window has to be fetched and scored (resume=False)
+        """
+        if not self.is_trained or self.model is None:
+            raise ModelNotTrainedError("anomaly_detector")
+
+        window = await self._run_in_executor(
+            self._score_incremental_sync, data, window_start, resume, model_version
+        )
+        if window is _RESUME_LOST:
+            return None
+        if window is None:
+            return []
+        with span("anomaly_classify"):
+            return window.classify(sensitivity)
+
+    def _append_scores(self, data: SeriesFrame) -> None:
+        """Score readings newer than the rolling store and append them.
+
+        Must be called with self._buffer_lock held.
+        """
+        buffer = self._score_buffer
+        last = buffer.last_timestamp
+        if last is not None:
+            newer = data.timestamps > last
+            data = SeriesFrame(timestamps=data.timestamps[newer], values=data.values[newer])
+        if not len(data):
+            return
+
+        # Prepend already-scored points so rolling features of the new tail
+        # match a full recomputation
+        overlap_ts, overlap_values = buffer.tail(settings.ROLLING_WINDOW_SIZE)
+        frame = SeriesFrame(
+            timestamps=np.concatenate([overlap_ts, data.timestamps]),
+            values=np.concatenate([overlap_values, data.values]),
+        )
+        with span("anomaly_features"):
+            features = extract_time_series_features(frame.to_dataframe())
+        scores = self._decision_function(features[len(overlap_ts):])
+        buffer.append(data.timestamps, data.values, scores)
+
+    def _score_incremental_sync(
+        self,
+        data: SeriesFrame,
+        window_start: datetime,
+        resume: bool,
+        model_version: Optional[str] = None,
+    ) -> Optional[ScoredWindow]:
+        """Score new readings into the rolling store and build the window from it."""
+        try:
+            with self._buffer_lock:
+                buffer = self._score_buffer
+                # A retrain since resume_point() cleared the store (or is about
+                # to); appending to it would yield a window of just the new tail
+                if resume and (
+                    model_version != self.model_version
+                    or buffer.covered_from is None
+                    or buffer.covered_from > np.datetime64(window_start, "ns")
+                ):
+                    return _RESUME_LOST
+                if not resume:
+                    buffer.clear()
+                self._append_scores(data)
+                if not resume:
+                    buffer.covered_from = np.datetime64(window_start, "ns")
+
+                timestamps, values, scores = buffer.window(
+                    np.datetime64(window_start, "ns"), settings.ANOMALY_RECENT_DATA_LIMIT
+                )
+                if len(timestamps) == 0:
+                    return None
+
+                key = (timestamps[0], timestamps[-1], len(timestamps), self.model_version)
+                window = self._scored_windows.get(key)
+                if window is not None:
+                    self._scored_windows.move_to_end(key)
+                else:
+                    with span("anomaly_window"):
+                        window = self._build_scored_window(
+                            pd.DatetimeIndex(timestamps).tz_localize("UTC"),
+                            values.copy(),
+                            scores.copy(),
+                        )
+                    self._scored_windows[key] = window
+                    while len(self._scored_windows) > settings.ANOMALY_SCORE_CACHE_SIZE:
+                        self._scored_windows.popitem(last=False)
+                return window
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             raise PredictionError("anomaly_detector", f"detection failed: {e}") from e
 
+    def _ingest_sync(self, data: SeriesFrame, contiguous_since: Optional[datetime]) -> None:
+        with self._buffer_lock:
+            buffer = self._score_buffer
+            # Only extend a store that already covers a window and has no gap
+            # before the pushed readings; otherwise the next request fetches
+            # the missing readings itself
+            if buffer.covered_from is None or buffer.last_timestamp is None:
+                return
+            if contiguous_since is not None and (
+                buffer.last_timestamp < np.datetime64(contiguous_since, "ns")
+            ):
+                return
+            try:
+                self._append_scores(data)
+            except Exception as e:
+                # A failed append would leave a hole the next append skips over
+                logger.error(f"Failed to score pushed readings, resetting score store: {e}")
+                buffer.clear()
+
+    async def ingest_async(
+        self, data: SeriesFrame, contiguous_since: Optional[datetime] = None
+    ) -> None:
+        """Score pushed readings into the rolling score store.
+
+        Args:
+            data: New readings in chronological order
+            contiguous_since: Time from which the sender has delivered every
+                              reading; the store is only extended if it
+                              already reaches this point
+        """
+        if self.is_trained and self.model is not None and len(data):
+            try:
+                await self._run_in_executor(
+                    self._ingest_sync, data, contiguous_since, lane=BACKGROUND
+                )
+            except ResourceLimitError as e:
+                # Dropping this batch would leave a hole in the score store
+                logger.warning(f"Pushed readings not scored, resetting score store: {e.message}")
+                with self._buffer_lock:
+                    self._score_buffer.clear()
+
     def get_summary(self, anomalies: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate a summary of detected anomalies."""
         if not anomalies:
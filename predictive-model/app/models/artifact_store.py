@@ -0,0 +1,156 @@
+"""Versioned on-disk store for trained model artifacts."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout changes so older artifacts are ignored
+ARTIFACT_FORMAT_VERSION = 1
+METADATA_FILE = "metadata.json"
+
+
+def _file_checksum(path: Path) -> str:
+    """SHA-256 of a file, streamed in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Stores one directory per trained model version.
+
+    Layout:
+        <root>/<model_name>/<version>/metadata.json
+        <root>/<model_name>/<version>/<artifact file>
+
+    Versions are written to a temporary directory and renamed into place,
+    so readers never observe a partially written artifact.
+    """
+
+    def __init__(self, root: str, retention: int = 3):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding all model artifacts
+            retention: Number of versions to keep per model
+        """
+        self.root = Path(root)
+        self.retention = max(1, retention)
+
+    @staticmethod
+    def new_version() -> str:
+        """Create a sortable version identifier from the current UTC time."""
+        return datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+
+    def _model_dir(self, model_name: str) -> Path:
+        return self.root / model_name
+
+    def save(
+        self,
+        model_name: str,
+        version: str,
+        artifact_name: str,
+        write_artifact: Callable[[Path], None],
+        metadata: Dict[str, Any],
+    ) -> Path:
+        """
+        Write a new artifact version.
+
+        Args:
+            model_name: Model identifier (e.g. 'forecaster')
+            version: Version identifier (see new_version)
+            artifact_name: File name of the serialized model
+            write_artifact: Callable that writes the model to the given path
+            metadata: Training metadata stored alongside the model
+
+        Returns:
+            Path of the committed version directory
+        """
+        model_dir = self._model_dir(model_name)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = model_dir / f".tmp-{version}-{os.getpid()}"
+        final_dir = model_dir / version
+
+        try:
+            tmp_dir.mkdir()
+            artifact_path = tmp_dir / artifact_name
+            write_artifact(artifact_path)
+
+            full_metadata = {
+                **metadata,
+                "format_version": ARTIFACT_FORMAT_VERSION,
+                "model_name": model_name,
+                "version": version,
+                "artifact": artifact_name,
+                "checksum": _file_checksum(artifact_path),
+            }
+            with open(tmp_dir / METADATA_FILE, "w") as f:
+                json.dump(full_metadata, f, indent=2, default=str)
+
+            os.rename(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"Saved {model_name} artifact version {version}")
+        self._prune(model_name)
+        return final_dir
+
+    def list_versions(self, model_name: str) -> List[str]:
+        """List committed versions, newest first."""
+        model_dir = self._model_dir(model_name)
+        if not model_dir.exists():
+            return []
+        return sorted(
+            (p.name for p in model_dir.iterdir() if p.is_dir() and not p.name.startswith(".")),
+            reverse=True,
+        )
+
+    def _read_valid(self, model_name: str, version: str) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """Return (artifact_path, metadata) if the version is complete and intact."""
+        version_dir = self._model_dir(model_name) / version
+        try:
+            with open(version_dir / METADATA_FILE) as f:
+                metadata = json.load(f)
+            if metadata.get("format_version") != ARTIFACT_FORMAT_VERSION:
+                return None
+            artifact_path = version_dir / metadata["artifact"]
+            if _file_checksum(artifact_path) != metadata.get("checksum"):
+                logger.warning(f"Checksum mismatch for {model_name} artifact {version}")
+                return None
+            return artifact_path, metadata
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring invalid {model_name} artifact {version}: {e}")
+            return None
+
+    def load_latest(self, model_name: str) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """Return (artifact_path, metadata) of the newest valid version, if any."""
+        for version in self.list_versions(model_name):
+            result = self._read_valid(model_name, version)
+            if result is not None:
+                return result
+        return None
+
+    def _prune(self, model_name: str) -> None:
+        """Delete versions beyond the retention limit."""
+        model_dir = self._model_dir(model_name)
+        for version in self.list_versions(model_name)[self.retention:]:
+            shutil.rmtree(model_dir / version, ignore_errors=True)
+            logger.debug(f"Pruned {model_name} artifact version {version}")
+
+
+# Global singleton instance
+artifact_store = ArtifactStore(settings.MODEL_CACHE_DIR, settings.MODEL_ARTIFACT_RETENTION)
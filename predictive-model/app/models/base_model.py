@@ -1,8 +1,17 @@
 import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.compute import BACKGROUND, INTERACTIVE, compute_scheduler
+from app.core.metrics import model_cache_requests
+from app.exceptions import DeadlineExceededError, ResourceLimitError
+from app.models.artifact_store import artifact_store
+from app.utils.deadline import clear_deadline, is_expired
+from app.utils.series import fingerprint_series
 
 logger = logging.getLogger(__name__)
 
@@ -10,27 +19,255 @@ logger = logging.getLogger(__name__)
 class BaseModelAsync:
     """Base class for async models providing common threading and state management."""
 
+    # Subclasses set these to enable artifact persistence
+    model_name: str = "model"
+    artifact_name: str = "model.bin"
+
     def __init__(self):
         self.model: Any = None
         self.is_trained: bool = False
         self.last_trained: Optional[datetime] = None
         self.data_points_used: int = 0
-        self._executor = ThreadPoolExecutor(max_workers=2)
+        self.model_version: Optional[str] = None
+        self.training_metadata: Dict[str, Any] = {}
         self._training_lock = asyncio.Lock()
+        # Single-flight registry and stale-while-revalidate cache
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._swr_cache: Dict[Hashable, Tuple[datetime, Any]] = {}
+        self._cache_generation = 0
+        # Strong references: the event loop keeps only weak ones to running tasks
+        self._background_tasks: Set[asyncio.Task] = set()
 
-    async def _run_in_executor(self, method, *args, **kwargs):
-        """Run synchronous method in thread pool."""
+    async def _run_in_executor(self, method, *args, lane: str = INTERACTIVE):
+        """Run synchronous method on a shared compute lane.
+
+        Raises:
+            ResourceLimitError: If the lane is saturated
+            DeadlineExceededError: If the request deadline passed (other failures return None)
+        """
         try:
-            return await asyncio.get_event_loop().run_in_executor(
-                self._executor, method, *args, **kwargs
-            )
+            return await compute_scheduler.run(lane, method, *args)
+        except (ResourceLimitError, DeadlineExceededError):
+            raise
         except Exception as e:
             logger.error(f"Async operation failed: {e}")
             return None
 
+    async def _coalesce(
+        self, key: Hashable, method: Callable, *args, lane: str = INTERACTIVE
+    ) -> Any:
+        """Run method in the executor once per key.
+
+        Concurrent callers with the same key await the same in-flight future
+        instead of queueing duplicate work. The shared future is shielded so a
+        caller that times out does not cancel it for the others. The flight
+        runs under its starter's request deadline; a joiner whose own deadline
+        has not passed starts a fresh flight if that one is abandoned.
+        """
+        flight_key = (self._cache_generation, key)
+        future = self._inflight.get(flight_key)
+        if future is None or future.done():
+            future = asyncio.ensure_future(self._run_in_executor(method, *args, lane=lane))
+            self._inflight[flight_key] = future
+            future.add_done_callback(
+                lambda done: self._inflight.pop(flight_key)
+                if self._inflight.get(flight_key) is done
+                else None
+            )
+        try:
+            return await asyncio.shield(future)
+        except DeadlineExceededError:
+            if is_expired():
+                raise
+            return await self._coalesce(key, method, *args, lane=lane)
+
+    async def _revalidate(
+        self, key: Hashable, method: Callable, *args, lane: str = INTERACTIVE
+    ) -> Any:
+        """Recompute a cached value through the single-flight layer and store it."""
+        generation = self._cache_generation
+        value = await self._coalesce(key, method, *args, lane=lane)
+        # Drop results computed against a model that has since been replaced
+        if value is not None and generation == self._cache_generation:
+            self._swr_cache[key] = (datetime.utcnow(), value)
+        return value
+
+    async def _stale_while_revalidate(
+        self,
+        key: Hashable,
+        method: Callable,
+        *args,
+        max_age_seconds: float,
+        is_usable: Optional[Callable[[Any], bool]] = None,
+        needs_refresh: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return a cached value, refreshing it in the background once expired.
+
+        Args:
+            key: Cache key (also the single-flight key)
+            method: Synchronous method computing the value in the executor
+            max_age_seconds: Age after which a background refresh is started
+            is_usable: Whether a cached value can answer this request at all;
+                       if not, the caller waits for a (shared) recompute
+            needs_refresh: Extra expiry condition checked against the value
+
+        Returns:
+            The cached or freshly computed value (None if computation failed)
+        """
+        entry = self._swr_cache.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if is_usable is None or is_usable(value):
+                expired = (datetime.utcnow() - stored_at).total_seconds() > max_age_seconds
+                if expired or (needs_refresh is not None and needs_refresh(value)):
+                    model_cache_requests.inc(self.model_name, "stale")
+                    if (self._cache_generation, key) not in self._inflight:
+                        task = asyncio.ensure_future(self._revalidate_in_background(key, method, *args))
+                        self._background_tasks.add(task)
+                        task.add_done_callback(self._background_tasks.discard)
+                else:
+                    model_cache_requests.inc(self.model_name, "hit")
+                return value
+
+        model_cache_requests.inc(self.model_name, "miss")
+        return await self._revalidate(key, method, *args)
+
+    async def _revalidate_in_background(self, key: Hashable, method: Callable, *args) -> None:
+        """Refresh on the background lane; a saturated lane just leaves the value stale."""
+        # The task runs in a copy of the request's context; the refresh must outlive its deadline
+        clear_deadline()
+        try:
+            await self._revalidate(key, method, *args, lane=BACKGROUND)
+        except ResourceLimitError as e:
+            logger.info(f"Deferred {self.model_name} cache refresh: {e.message}")
+
+    def _get_cached_value(self, key: Hashable) -> Any:
+        """Current cached value for key, regardless of age."""
+        entry = self._swr_cache.get(key)
+        return entry[1] if entry is not None else None
+
+    def expire_cache(self) -> None:
+        """Mark cached values expired; they keep serving until revalidated."""
+        self._swr_cache = {
+            key: (datetime.min, value) for key, (_, value) in self._swr_cache.items()
+        }
+
+    def invalidate_cache(self) -> None:
+        """Drop cached values and detach in-flight computations from the cache."""
+        self._cache_generation += 1
+        self._swr_cache.clear()
+
     def _update_training_status(self, data_points: int):
         """Update training status after successful training."""
+        self.invalidate_cache()
         self.is_trained = True
         self.last_trained = datetime.utcnow()
         self.data_points_used = data_points
         logger.info(f"Training completed with {data_points} data points")
+
+    def _save_model_file(self, path: Path) -> None:
+        """Serialize self.model to path. Implemented by subclasses."""
+        raise NotImplementedError
+
+    def _load_model_file(self, path: Path) -> Any:
+        """Deserialize and return a model from path. Implemented by subclasses."""
+        raise NotImplementedError
+
+    def _persist_artifact(
+        self,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        params: Dict[str, Any],
+        extra_metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Save the freshly trained model with its training metadata.
+
+        Persistence failures are logged but never fail training.
+        """
+        version = artifact_store.new_version()
+        metadata = {
+            "trained_at": self.last_trained.isoformat(),
+            "data_points": self.data_points_used,
+            "training_window": {
+                "start": str(timestamps.min()) if len(timestamps) else None,
+                "end": str(timestamps.max()) if len(timestamps) else None,
+            },
+            "data_fingerprint": fingerprint_series(timestamps, values),
+            "params": params,
+            **(extra_metadata or {}),
+        }
+        self.model_version = version
+        self.training_metadata = metadata
+        try:
+            artifact_store.save(
+                self.model_name, version, self.artifact_name, self._save_model_file, metadata
+            )
+        except Exception as e:
+            logger.error(f"Failed to persist {self.model_name} artifact: {e}")
+
+    def read_artifact(self) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Deserialize the newest valid persisted model without installing it.
+
+        Returns:
+            Tuple of (model, metadata), or None if nothing loadable exists
+        """
+        found = artifact_store.load_latest(self.model_name)
+        if found is None:
+            logger.info(f"No persisted {self.model_name} artifact found")
+            return None
+
+        path, metadata = found
+        try:
+            return self._load_model_file(path), metadata
+        except Exception as e:
+            logger.error(f"Failed to load {self.model_name} artifact {metadata['version']}: {e}")
+            return None
+
+    def apply_artifact(self, model: Any, metadata: Dict[str, Any]) -> None:
+        """Install a loaded model; readers see either the old or the new model."""
+        self.model = model
+        self.is_trained = True
+        self.last_trained = datetime.fromisoformat(metadata["trained_at"])
+        self.data_points_used = metadata.get("data_points", 0)
+        self.model_version = metadata["version"]
+        self.training_metadata = metadata
+        self.invalidate_cache()
+        logger.info(
+            f"Loaded {self.model_name} artifact {self.model_version} "
+            f"(trained {self.last_trained.isoformat()})"
+        )
+
+    def load_artifact(self) -> bool:
+        """Load the newest valid persisted model, if one exists.
+
+        Returns:
+            True if a model was loaded
+        """
+        loaded = self.read_artifact()
+        if loaded is None:
+            return False
+        self.apply_artifact(*loaded)
+        return True
+
+    async def reload_artifact_async(self) -> bool:
+        """Hot-swap to the newest persisted model if it differs from the current one.
+
+        Deserialization runs in the executor; the swap itself happens on the
+        event loop, so no request observes a half-installed model.
+
+        Returns:
+            True if a newer model was installed
+        """
+        loaded = await self._run_in_executor(self.read_artifact, lane=BACKGROUND)
+        if loaded is None:
+            return False
+        model, metadata = loaded
+        if metadata["version"] == self.model_version:
+            return False
+        self.apply_artifact(model, metadata)
+        return True
+
+    @property
+    def training_params(self) -> Optional[Dict[str, Any]]:
+        """Hyperparameters the current model was trained with."""
+        return self.training_metadata.get("params")
@@ -1,44 +1,117 @@
+import copy
+import numpy as np
 import pandas as pd
 from prophet import Prophet
+from prophet.serialize import model_from_json, model_to_json
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from pathlib import Path
 import logging
 from typing import List, Dict, Any, Optional
 
 from app.config import settings
+from app.core.compute import BACKGROUND
 from app.models.base_model import BaseModelAsync
 from app.tuning.hyperparameter_tuner import tuner, DEFAULT_PROPHET_PARAMS
+from app.utils.series import SeriesData, SeriesFrame, as_dataframe
+from app.utils.timing import span
 from app.exceptions import (
     InsufficientDataError,
     ModelNotTrainedError,
     ModelTrainingError,
     PredictionError,
+    ResourceLimitError,
 )
 
 
 logger = logging.getLogger(__name__)
 
+FORECAST_TABLE_KEY = "forecast_table"
+
+
+@dataclass(frozen=True)
+class ForecastTable:
+    """
+    Dense hourly forecast stored as aligned arrays.
+
+    Requests for any (hours, past_context_hours) window are served by
+    binary-searching the window bounds and slicing prebuilt rows.
+    """
+
+    ds: np.ndarray  # datetime64[ns], ascending hourly grid
+    yhat: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    built_at: datetime
+    rows: List[Dict[str, Any]]
+
+    @classmethod
+    def from_arrays(
+        cls,
+        ds: np.ndarray,
+        yhat: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        built_at: datetime,
+    ) -> "ForecastTable":
+        yhat = np.maximum(yhat, 0)
+        lower = np.maximum(lower, 0)
+        timestamps = pd.DatetimeIndex(ds)
+        rows = [
+            {
+                "timestamp": ts,
+                "predicted_power": p,
+                "lower_bound": lo,
+                "upper_bound": hi,
+            }
+            for ts, p, lo, hi in zip(timestamps, yhat.tolist(), lower.tolist(), upper.tolist())
+        ]
+        return cls(ds=ds, yhat=yhat, lower=lower, upper=upper, built_at=built_at, rows=rows)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return len(self.ds) > 0 and self.ds[0] <= np.datetime64(start) and (
+            self.ds[-1] >= np.datetime64(end)
+        )
+
+    def window(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Rows with start <= timestamp <= end."""
+        i = np.searchsorted(self.ds, np.datetime64(start), side="left")
+        j = np.searchsorted(self.ds, np.datetime64(end), side="right")
+        return self.rows[i:j]
+
 
 class EnergyForecaster(BaseModelAsync):
+    model_name = "forecaster"
+    artifact_name = "model.json"
+
     def __init__(self):
         super().__init__()
-        self._cache: Optional[tuple[datetime, List[Dict[str, Any]]]] = None
+        self._readings_refresh_at: Optional[datetime] = None
+
+    def _save_model_file(self, path: Path) -> None:
+        """Serialize the fitted Prophet model to JSON."""
+        path.write_text(model_to_json(self.model))
+
+    def _load_model_file(self, path: Path) -> Prophet:
+        """Deserialize a Prophet model from JSON."""
+        return model_from_json(path.read_text())
 
-    async def train_async(self, data: List[Dict[str, Any]]) -> bool:
+    async def train_async(self, data: SeriesData) -> bool:
         """Async training method that runs Prophet training in a thread pool."""
         async with self._training_lock:
             if len(data) < settings.MIN_TRAINING_DATA_POINTS:
                 raise InsufficientDataError(len(data), settings.MIN_TRAINING_DATA_POINTS)
 
-            result = await self._run_in_executor(self._train_sync, data)
+            result = await self._run_in_executor(self._train_sync, data, lane=BACKGROUND)
             return result if result is not None else False
 
-    def train(self, data: List[Dict[str, Any]]) -> bool:
+    def train(self, data: SeriesData) -> bool:
         """Synchronous training method for backward compatibility."""
         return self._train_sync(data)
 
-    def _train_sync(self, data: List[Dict[str, Any]]) -> bool:
+    def _train_sync(self, data: SeriesData) -> bool:
         """Internal synchronous training method."""
-        df = pd.DataFrame(data)
+        df = as_dataframe(data)
         # Prophet requires columns 'ds' (date) and 'y' (value)
         df = df.rename(columns={"timestamp": "ds", "value": "y"})
 
@@ -69,27 +142,93 @@ class EnergyForecaster(BaseModelAsync):
             raise ModelTrainingError("forecaster", str(e)) from e
 
         self.model = m
-        self._cache = None
         self._update_training_status(len(df))
+        self._persist_artifact(
+            df["ds"].to_numpy(dtype="datetime64[ns]"),
+            df["y"].to_numpy(dtype=float),
+            params,
+            extra_metadata={"residual_quantiles": self._compute_residual_quantiles()},
+        )
         return True
 
-    def _get_cached(self, hours: int) -> Optional[List[Dict[str, Any]]]:
-        """Return sliced predictions from cache if valid."""
-        if self._cache is None:
-            return None
-        created_at, predictions = self._cache
-        if datetime.utcnow() - created_at > timedelta(
-            seconds=settings.FORECAST_CACHE_TTL_SECONDS
-        ):
-            self._cache = None
-            return None
-        return predictions[:hours]
+    def _predict_deterministic(self, df: pd.DataFrame) -> np.ndarray:
+        """yhat from trend and seasonality only (no uncertainty sampling).
+
+        Args:
+            df: Frame already passed through Prophet's setup_dataframe
+        """
+        trend = self.model.predict_trend(df)
+        seasonal = self.model.predict_seasonal_components(df)
+        return np.asarray(
+            trend * (1 + seasonal["multiplicative_terms"].to_numpy())
+            + seasonal["additive_terms"].to_numpy(),
+            dtype=float,
+        )
+
+    def _compute_residual_quantiles(self) -> List[float]:
+        """In-sample residual quantiles matching the model's interval width."""
+        history = self.model.history
+        residuals = history["y"].to_numpy(dtype=float) - self._predict_deterministic(history)
+        alpha = (1.0 - self.model.interval_width) / 2
+        return np.quantile(residuals, [alpha, 1.0 - alpha]).tolist()
+
+    def _predict_arrays(self, ds: pd.DatetimeIndex) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Predict (yhat, lower, upper) for the given timestamps.
+
+        In fast mode only the deterministic components are evaluated; intervals
+        come from training-time residual quantiles or from a reduced number of
+        posterior samples (FORECAST_INTERVAL_METHOD). Otherwise Prophet's full
+        predict() with its default uncertainty sampling is used.
+        """
+        if not settings.FORECAST_FAST_MODE:
+            forecast = self.model.predict(pd.DataFrame({"ds": ds}))
+            return (
+                forecast["yhat"].to_numpy(dtype=float),
+                forecast["yhat_lower"].to_numpy(dtype=float),
+                forecast["yhat_upper"].to_numpy(dtype=float),
+            )
+
+        df = self.model.setup_dataframe(pd.DataFrame({"ds": ds}))
+        yhat = self._predict_deterministic(df)
+
+        if settings.FORECAST_INTERVAL_METHOD == "sampled":
+            # Shallow copy so the shared model's sample count stays untouched
+            sampler = copy.copy(self.model)
+            sampler.uncertainty_samples = settings.FORECAST_UNCERTAINTY_SAMPLES
+            intervals = sampler.predict_uncertainty(df, vectorized=True)
+            return (
+                yhat,
+                intervals["yhat_lower"].to_numpy(dtype=float),
+                intervals["yhat_upper"].to_numpy(dtype=float),
+            )
+
+        quantiles = self.training_metadata.get("residual_quantiles")
+        if quantiles is None:
+            quantiles = self._compute_residual_quantiles()
+            self.training_metadata["residual_quantiles"] = quantiles
+        low, high = quantiles
+        return yhat, yhat + low, yhat + high
+
+    @property
+    def _table(self) -> Optional[ForecastTable]:
+        return self._get_cached_value(FORECAST_TABLE_KEY)
+
+    def _table_needs_refresh(self, table: ForecastTable) -> bool:
+        """Whether the table's remaining lookahead is nearly used up."""
+        now = datetime.utcnow()
+        margin = timedelta(
+            hours=settings.MAX_FORECAST_HOURS + settings.FORECAST_TABLE_REFRESH_MARGIN_HOURS
+        )
+        return not table.covers(now, now + margin)
 
     async def predict_async(
         self, hours: int = 24, past_context_hours: int = 0
     ) -> List[Dict[str, Any]]:
         """Async prediction method.
 
+        Served from the precomputed forecast table; Prophet only runs when
+        the table is missing or no longer covers the requested window.
+
         Args:
             hours: Number of future hours to forecast
             past_context_hours: Number of past hours to include for context
@@ -97,34 +236,51 @@ class EnergyForecaster(BaseModelAsync):
         if not self.is_trained:
             raise ModelNotTrainedError("forecaster")
 
-        # When past_context is requested, skip cache for accurate time-based results
-        if past_context_hours > 0:
-            result = await self._run_in_executor(
-                self._predict_sync, hours, past_context_hours
-            )
-            return result if result else []
-
-        # Use cache only for pure future forecasts
-        cached = self._get_cached(hours)
-        if cached is not None:
-            logger.debug(f"Cache hit for {hours}h forecast")
-            return cached
-
-        # Compute max horizon and cache it
-        result = await self._run_in_executor(
-            self._predict_sync, settings.MAX_FORECAST_HOURS, 0
+        now = datetime.utcnow()
+        start_time = now - timedelta(hours=past_context_hours)
+        end_time = now + timedelta(hours=hours)
+
+        # Expired tables keep serving while one background rebuild runs;
+        # concurrent misses share a single build
+        table = await self._stale_while_revalidate(
+            FORECAST_TABLE_KEY,
+            self._build_table_sync,
+            max_age_seconds=settings.FORECAST_CACHE_TTL_SECONDS,
+            is_usable=lambda t: t.covers(start_time, end_time),
+            needs_refresh=self._table_needs_refresh,
         )
-        if result:
-            self._cache = (datetime.utcnow(), result)
-            return result[:hours]
-        return []
+        if table is None or not table.covers(start_time, end_time):
+            return []
+        with span("forecast_window"):
+            return table.window(start_time, end_time)
+
+    async def note_new_readings(self, frame: SeriesFrame) -> None:
+        """Change-stream subscriber: mark the forecast table for refresh.
+
+        The table keeps serving while it is rebuilt in the background on the
+        next request. Refreshes are limited to one per
+        CHANGE_STREAM_FORECAST_REFRESH_SECONDS; predictions themselves only
+        change when the model is retrained.
+        """
+        now = datetime.utcnow()
+        if self._readings_refresh_at is not None and (
+            (now - self._readings_refresh_at).total_seconds()
+            < settings.CHANGE_STREAM_FORECAST_REFRESH_SECONDS
+        ):
+            return
+        self._readings_refresh_at = now
+        self.expire_cache()
 
     async def warm_cache(self) -> None:
-        """Pre-compute max horizon predictions."""
+        """Pre-compute the forecast table."""
         if not self.is_trained:
             return
-        await self.predict_async(settings.MAX_FORECAST_HOURS)
-        logger.info(f"Cache warmed with {settings.MAX_FORECAST_HOURS}h forecast")
+        try:
+            await self._revalidate(FORECAST_TABLE_KEY, self._build_table_sync, lane=BACKGROUND)
+        except ResourceLimitError as e:
+            logger.warning(f"Forecast table warm-up deferred: {e.message}")
+            return
+        logger.info(f"Forecast table warmed through +{settings.MAX_FORECAST_HOURS}h")
 
     def predict(self, hours: int = 24) -> List[Dict[str, Any]]:
         """Synchronous prediction method for backward compatibility."""
@@ -137,52 +293,66 @@ class EnergyForecaster(BaseModelAsync):
             hours: Number of future hours to forecast
             past_context_hours: Number of past hours to include for context (hindcast)
         """
+        try:
+            now = pd.Timestamp(datetime.utcnow())
+            start_time = now - pd.Timedelta(hours=past_context_hours)
+            end_time = now + pd.Timedelta(hours=hours)
+
+            # Only the requested hours are predicted, not the training history
+            grid = pd.date_range(start_time.ceil("h"), end_time.floor("h"), freq="h")
+            if len(grid) == 0:
+                return []
+            with span("forecast_predict"):
+                yhat, lower, upper = self._predict_arrays(grid)
+            table = ForecastTable.from_arrays(
+                ds=grid.to_numpy(dtype="datetime64[ns]"),
+                yhat=yhat,
+                lower=lower,
+                upper=upper,
+                built_at=now.to_pydatetime(),
+            )
+            return table.rows
+        except Exception as e:
+            raise PredictionError("forecaster", f"forecast for {hours}h failed: {e}") from e
+
+    def _build_table_sync(self) -> ForecastTable:
+        """Predict one dense hourly table over the training window and horizon.
+
+        The table starts at the first training hour and extends past
+        now + MAX_FORECAST_HOURS by FORECAST_TABLE_LOOKAHEAD_HOURS so it keeps
+        serving requests while a refresh runs in the background.
+        """
         try:
             now = datetime.utcnow()
+            history = self.model.history["ds"]
+            training_end = history.max()
 
-            # Calculate required periods to reach now + hours, accounting for data gaps
             # Prophet extends from the last training timestamp, not from "now"
-            training_end = self.model.history['ds'].max()
             hours_since_training = max(0, (now - training_end).total_seconds() / 3600)
-            required_periods = int(hours + hours_since_training) + 1  # +1 for rounding safety
-
             if hours_since_training > 1:
                 logger.info(
                     f"Training data ends {hours_since_training:.1f}h ago, "
-                    f"extending forecast periods from {hours} to {required_periods}"
+                    f"extending forecast table to cover the gap"
                 )
 
-            # Create future dataframe with enough periods to bridge any data gap
-            future = self.model.make_future_dataframe(periods=required_periods, freq="H")
-            forecast = self.model.predict(future)
-
-            start_time = now - timedelta(hours=past_context_hours)
-            end_time = now + timedelta(hours=hours)
-
-            # Filter to time range and resample to hourly
-            # This handles dense training data by keeping one point per hour
-            forecast_filtered = forecast[
-                (forecast["ds"] >= start_time) & (forecast["ds"] <= end_time)
-            ].copy()
-
-            # Round timestamps to nearest hour and deduplicate
-            forecast_filtered["hour"] = forecast_filtered["ds"].dt.floor("H")
-            forecast_hourly = forecast_filtered.groupby("hour").first().reset_index()
-
-            results = []
-            for _, row in forecast_hourly.iterrows():
-                results.append(
-                    {
-                        "timestamp": row["hour"],
-                        "predicted_power": max(0, row["yhat"]),
-                        "lower_bound": max(0, row["yhat_lower"]),
-                        "upper_bound": row["yhat_upper"],
-                    }
-                )
-
-            return results
+            horizon_end = max(pd.Timestamp(now), training_end) + pd.Timedelta(
+                hours=settings.MAX_FORECAST_HOURS + settings.FORECAST_TABLE_LOOKAHEAD_HOURS
+            )
+            grid = pd.date_range(history.min().floor("h"), horizon_end.ceil("h"), freq="h")
+            with span("forecast_predict"):
+                yhat, lower, upper = self._predict_arrays(grid)
+
+            table = ForecastTable.from_arrays(
+                ds=grid.to_numpy(dtype="datetime64[ns]"),
+                yhat=yhat,
+                lower=lower,
+                upper=upper,
+                built_at=now,
+            )
+            logger.info(f"Built forecast table with {len(grid)} hourly points")
+            return table
         except Exception as e:
-            raise PredictionError("forecaster", f"forecast for {hours}h failed: {e}") from e
+            raise PredictionError("forecaster", f"forecast table build failed: {e}") from e
 
 
 # Global singleton instance
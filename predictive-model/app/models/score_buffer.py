@@ -0,0 +1,99 @@
+"""Array-backed rolling store of already-scored anomaly points."""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class RollingScoreBuffer:
+    """
+    Fixed-capacity, timestamp-ordered buffer of scored readings.
+
+    Behaves like a ring buffer (the oldest points are dropped once capacity
+    is reached) but keeps its rows contiguous by writing into arrays of twice
+    the capacity and compacting when the end is reached. Window lookups are
+    therefore a binary search plus zero-copy slices.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Maximum number of points retained
+        """
+        self.capacity = capacity
+        self._timestamps = np.empty(2 * capacity, dtype="datetime64[ns]")
+        self._values = np.empty(2 * capacity, dtype=np.float64)
+        self._scores = np.empty(2 * capacity, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        # Earliest time for which the buffer holds every fetched reading
+        self.covered_from: Optional[np.datetime64] = None
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def clear(self) -> None:
+        self._start = 0
+        self._end = 0
+        self.covered_from = None
+
+    @property
+    def last_timestamp(self) -> Optional[np.datetime64]:
+        return self._timestamps[self._end - 1] if len(self) else None
+
+    def tail(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and values of the newest n points."""
+        start = max(self._start, self._end - n)
+        return self._timestamps[start:self._end], self._values[start:self._end]
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray, scores: np.ndarray) -> None:
+        """Append points newer than the current last timestamp."""
+        last = self.last_timestamp
+        if last is not None:
+            keep = timestamps > last
+            timestamps, values, scores = timestamps[keep], values[keep], scores[keep]
+
+        n = len(timestamps)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            timestamps, values, scores = (
+                timestamps[-self.capacity:], values[-self.capacity:], scores[-self.capacity:]
+            )
+            self._start = self._end = 0
+            n = self.capacity
+
+        if self._end + n > len(self._timestamps):
+            # Compact: move the rows that survive this append to the front
+            keep_from = max(self._start, self._end - (self.capacity - n))
+            kept = self._end - keep_from
+            for arr in (self._timestamps, self._values, self._scores):
+                arr[:kept] = arr[keep_from:self._end]
+            self._start, self._end = 0, kept
+
+        end = self._end + n
+        self._timestamps[self._end:end] = timestamps
+        self._values[self._end:end] = values
+        self._scores[self._end:end] = scores
+        self._end = end
+        self._start = max(self._start, self._end - self.capacity)
+
+        first = self._timestamps[self._start]
+        if self.covered_from is not None and first > self.covered_from:
+            self.covered_from = first
+
+    def window(
+        self, start: np.datetime64, max_points: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Timestamps, values and scores at or after start (newest max_points)."""
+        i = self._start + int(
+            np.searchsorted(self._timestamps[self._start:self._end], start, side="left")
+        )
+        i = max(i, self._end - max_points)
+        return (
+            self._timestamps[i:self._end],
+            self._values[i:self._end],
+            self._scores[i:self._end],
+        )
@@ -0,0 +1,253 @@
+"""Push new sensor readings into the service as they are inserted."""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import json_util
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.services.data_service import documents_to_frame
+from app.utils.series import SeriesFrame
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[SeriesFrame], Awaitable[None]]
+
+# Server responses meaning change streams are unavailable on this deployment
+# (standalone mongod, or an API that does not implement $changeStream)
+_UNSUPPORTED_CODES = {40573, 115, 303}
+# Responses meaning the stored resume point can no longer be used
+_RESUME_LOST_CODES = {260, 280, 286}
+
+_MAX_BACKOFF_SECONDS = 60
+
+
+class ChangeStreamListener:
+    """
+    Watches inserts on the sensor collection and fans readings out to subscribers.
+
+    Each batch of inserted documents is parsed once into a SeriesFrame and
+    passed to every subscriber. Prefers a MongoDB change stream and persists
+    its resume token, so a restart continues where it left off; on
+    deployments without change streams it falls back to tail-polling on
+    processingTimestamp.
+
+    Works against any object exposing Motor's ``watch``/``find``/``find_one``
+    collection methods, e.g. a single-node local replica set.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+        self._task: Optional[asyncio.Task] = None
+        self._collection: Any = None
+        self._token_path = Path(settings.MODEL_CACHE_DIR) / settings.CHANGE_STREAM_RESUME_TOKEN_FILE
+        # "change_stream", "polling" or "stopped"
+        self.mode: str = "stopped"
+        # Wall-clock time from which every insert is known to be delivered
+        self.live_since: Optional[datetime] = None
+        self.readings_received: int = 0
+        self.last_event_at: Optional[datetime] = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Register an async callable receiving each batch of new readings."""
+        self._subscribers.append(subscriber)
+
+    @property
+    def is_live(self) -> bool:
+        return self._task is not None and not self._task.done() and self.live_since is not None
+
+    def start(self, collection: Any) -> None:
+        """Start listening on collection in a background task."""
+        if self._task is not None and not self._task.done():
+            return
+        self._collection = collection
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background task and wait for it to exit."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.mode = "stopped"
+        self.live_since = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Listener state for health checks."""
+        return {
+            "status": "running" if self.is_live else self.mode,
+            "mode": self.mode,
+            "live_since": self.live_since.isoformat() if self.live_since else None,
+            "last_event_at": self.last_event_at.isoformat() if self.last_event_at else None,
+            "readings_received": self.readings_received,
+        }
+
+    async def _run(self) -> None:
+        backoff = 1
+        while True:
+            try:
+                await self._watch()
+                return
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in _UNSUPPORTED_CODES or "replica set" in str(e):
+                    logger.info(f"Change streams unavailable ({e}), falling back to polling")
+                    await self._poll()
+                    return
+                if e.code in _RESUME_LOST_CODES:
+                    logger.warning(f"Resume token no longer valid ({e}), restarting from now")
+                    self._clear_resume_token()
+                    continue
+                logger.error(f"Change stream failed: {e}")
+            except PyMongoError as e:
+                logger.error(f"Change stream interrupted: {e}")
+
+            # Events may be missed until the stream reopens
+            self.live_since = None
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    async def _watch(self) -> None:
+        """Consume the change stream until cancelled."""
+        pipeline = [
+            {"$match": {"operationType": "insert"}},
+            {
+                "$project": {
+                    "fullDocument.processingTimestamp": 1,
+                    "fullDocument.payload.ENERGY.Power": 1,
+                }
+            },
+        ]
+        resume_token = self._load_resume_token()
+        saved_token = resume_token
+        loop = asyncio.get_event_loop()
+        async with self._collection.watch(
+            pipeline,
+            resume_after=resume_token,
+            batch_size=settings.CHANGE_STREAM_BATCH_SIZE,
+            max_await_time_ms=settings.CHANGE_STREAM_MAX_AWAIT_MS,
+        ) as stream:
+            self.mode = "change_stream"
+            self.live_since = datetime.utcnow()
+            logger.info(
+                "Change stream opened"
+                + (" from persisted resume token" if resume_token else "")
+            )
+            while True:
+                docs = []
+                change = await stream.try_next()
+                while change is not None:
+                    docs.append(change["fullDocument"])
+                    if len(docs) >= settings.CHANGE_STREAM_BATCH_SIZE:
+                        break
+                    change = await stream.try_next()
+
+                if not docs:
+                    continue
+                await self._publish(docs)
+                # Only after events: an idle stream would otherwise rewrite the
+                # token about once per CHANGE_STREAM_MAX_AWAIT_MS
+                token = stream.resume_token
+                if token is not None and token != saved_token:
+                    await loop.run_in_executor(None, self._save_resume_token, token)
+                    saved_token = token
+
+    async def _poll(self) -> None:
+        """Tail-poll for documents at or after the last processingTimestamp seen.
+
+        Documents sharing that timestamp may arrive after it was read, so the
+        query is inclusive and the _ids already published for it are excluded.
+        """
+        newest = await self._collection.find_one(
+            {}, {"processingTimestamp": 1, "_id": 1}, sort=[("processingTimestamp", -1)]
+        )
+        last_seen = newest["processingTimestamp"] if newest else ""
+        # Every document with processingTimestamp == last_seen is taken as seen
+        seen_ids = []
+        if newest:
+            seen_ids = [
+                doc["_id"]
+                for doc in await self._collection.find(
+                    {"processingTimestamp": last_seen}, {"_id": 1}
+                ).to_list(length=None)
+            ]
+        self.mode = "polling"
+        self.live_since = datetime.utcnow()
+        logger.info(f"Polling for new readings every {settings.CHANGE_STREAM_POLL_INTERVAL_SECONDS}s")
+
+        while True:
+            try:
+                docs = await (
+                    self._collection.find(
+                        {"processingTimestamp": {"$gte": last_seen}, "_id": {"$nin": seen_ids}},
+                        {"processingTimestamp": 1, "payload.ENERGY.Power": 1, "_id": 1},
+                    )
+                    .sort("processingTimestamp", 1)
+                    .limit(settings.CHANGE_STREAM_BATCH_SIZE)
+                    .to_list(length=settings.CHANGE_STREAM_BATCH_SIZE)
+                )
+            except PyMongoError as e:
+                logger.error(f"Polling for new readings failed: {e}")
+                docs = []
+
+            if docs:
+                newest_seen = docs[-1]["processingTimestamp"]
+                same = [doc["_id"] for doc in docs if doc["processingTimestamp"] == newest_seen]
+                seen_ids = seen_ids + same if newest_seen == last_seen else same
+                last_seen = newest_seen
+                await self._publish(docs)
+                # A full batch means more are waiting
+                if len(docs) == settings.CHANGE_STREAM_BATCH_SIZE:
+                    continue
+            await asyncio.sleep(settings.CHANGE_STREAM_POLL_INTERVAL_SECONDS)
+
+    async def _publish(self, docs: List[Dict[str, Any]]) -> None:
+        """Parse documents once and hand the readings to every subscriber."""
+        frame = documents_to_frame(docs)
+        if not len(frame):
+            return
+        self.readings_received += len(frame)
+        self.last_event_at = datetime.utcnow()
+        for subscriber in self._subscribers:
+            try:
+                await subscriber(frame)
+            except Exception as e:
+                logger.error(f"Change stream subscriber {subscriber} failed: {e}")
+
+    def _load_resume_token(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json_util.loads(self._token_path.read_text())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable resume token: {e}")
+            return None
+
+    def _save_resume_token(self, token: Dict[str, Any]) -> None:
+        try:
+            self._token_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._token_path.with_name(f"{self._token_path.name}.tmp-{os.getpid()}")
+            tmp_path.write_text(json_util.dumps(token))
+            os.replace(tmp_path, self._token_path)
+        except OSError as e:
+            logger.error(f"Failed to persist resume token: {e}")
+
+    def _clear_resume_token(self) -> None:
+        try:
+            self._token_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# Global singleton instance
+change_stream_listener = ChangeStreamListener()
@@ -1,14 +1,56 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import ExecutionTimeout
+import numpy as np
+import pandas as pd
 import logging
 import asyncio
+import os
+import time
+from pathlib import Path
 
 from app.config import settings
-from app.exceptions import DatabaseConnectionError
+from app.core.coordination import cluster_coordinator
+from app.core.metrics import observe_query
+from app.exceptions import DatabaseConnectionError, DeadlineExceededError
+from app.services.dataset_catalog import DatasetCatalog
+from app.services.training_snapshot import SnapshotCache, TrainingSnapshot
+from app.utils.deadline import check_deadline, clear_deadline, remaining_ms
+from app.utils.series import SeriesFrame
+from app.utils.timing import span
 
 logger = logging.getLogger(__name__)
 
+# How long a failed oldest-reading lookup is remembered before the request
+# path tries the database again (the background catalog refresh keeps trying)
+AGE_LOOKUP_RETRY_SECONDS = 30
+
+# Refresh intervals after which a follower stops trusting the leader's
+# published catalog and aggregates (incrementally) itself
+SHARED_CATALOG_STALE_REFRESHES = 3
+
+
+def documents_to_frame(docs: List[Dict[str, Any]]) -> SeriesFrame:
+    """Parse sensor documents into a chronological SeriesFrame.
+
+    Documents missing processingTimestamp or payload.ENERGY.Power are skipped.
+    """
+    raw_timestamps = np.empty(len(docs), dtype=object)
+    values = np.empty(len(docs), dtype=np.float64)
+    count = 0
+    for doc in docs:
+        try:
+            raw_timestamps[count] = doc["processingTimestamp"]
+            values[count] = doc["payload"]["ENERGY"]["Power"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        count += 1
+
+    frame, _ = SeriesFrame.from_raw(raw_timestamps[:count], values[:count])
+    order = np.argsort(frame.timestamps, kind="stable")
+    return SeriesFrame(timestamps=frame.timestamps[order], values=frame.values[order])
+
 
 class DataService:
     """Service for fetching sensor data from MongoDB."""
@@ -16,6 +58,23 @@ class DataService:
     def __init__(self):
         self._client: Optional[AsyncIOMotorClient] = None
         self._db: Optional[AsyncIOMotorDatabase] = None
+        self.catalog = DatasetCatalog()
+        self._snapshot_cache = SnapshotCache(
+            os.path.join(settings.MODEL_CACHE_DIR, "training_snapshot")
+        )
+        self._snapshot_lock = asyncio.Lock()
+        # Oldest-reading lookup shared by requests until the catalog has loaded
+        self._age_lookup: Optional[asyncio.Task] = None
+        self._age_lookup_failed_at: Optional[float] = None
+
+    @property
+    def latest_reading_at(self) -> Optional[datetime]:
+        """Newest known reading (naive UTC)."""
+        return self.catalog.newest
+
+    async def note_new_readings(self, frame: SeriesFrame) -> None:
+        """Change-stream subscriber: fold pushed readings into the catalog."""
+        self.catalog.add_readings(frame)
 
     def connect(self, client: AsyncIOMotorClient):
         """Set the MongoDB client connection with connection pooling."""
@@ -45,6 +104,14 @@ class DataService:
             raise DatabaseConnectionError("Database not connected. Call connect() first.")
         return self._db[settings.DATABASE_COLLECTION]
 
+    @property
+    def lease_collection(self):
+        """Get the collection holding cluster coordination leases."""
+        if self._db is None:
+            raise DatabaseConnectionError("Database not connected. Call connect() first.")
+        return self._db[settings.COORDINATION_LEASE_COLLECTION]
+
+    @observe_query("fetch_and_transform_data")
     async def _fetch_and_transform_data(
         self, start_date: datetime, limit: int = None, most_recent: bool = True
     ) -> List[Dict[str, Any]]:
@@ -66,23 +133,29 @@ class DataService:
                 "payload.ENERGY.Power": {"$exists": True},
             },
             {"processingTimestamp": 1, "payload.ENERGY.Power": 1, "_id": 0},
+            max_time_ms=remaining_ms(),
         ).sort("processingTimestamp", sort_order)
 
         limit = limit or settings.MAX_QUERY_LIMIT
-        raw_data = await cursor.to_list(length=limit)
+        try:
+            with span("db_query"):
+                raw_data = await cursor.to_list(length=limit)
+        except ExecutionTimeout as e:
+            raise DeadlineExceededError("database query") from e
 
         # Transform to expected format with 'timestamp' and 'value' keys
         data = []
-        for doc in raw_data:
-            try:
-                timestamp = datetime.fromisoformat(
-                    doc["processingTimestamp"].replace("Z", "+00:00")
-                )
-                value = doc["payload"]["ENERGY"]["Power"]
-                data.append({"timestamp": timestamp, "value": value})
-            except (KeyError, ValueError) as e:
-                logger.warning(f"Skipping malformed document: {e}")
-                continue
+        with span("db_transform"):
+            for doc in raw_data:
+                try:
+                    timestamp = datetime.fromisoformat(
+                        doc["processingTimestamp"].replace("Z", "+00:00")
+                    )
+                    value = doc["payload"]["ENERGY"]["Power"]
+                    data.append({"timestamp": timestamp, "value": value})
+                except (KeyError, ValueError) as e:
+                    logger.warning(f"Skipping malformed document: {e}")
+                    continue
 
         # Return in chronological order (Prophet requires ascending timestamps)
         if most_recent:
@@ -90,115 +163,226 @@ class DataService:
 
         return data
 
-    async def get_training_data(
-        self, days: int = 7, downsample_hourly: bool = True
-    ) -> List[Dict[str, Any]]:
-        """Fetch historical data for model training.
+    @observe_query("fetch_columnar")
+    async def _fetch_columnar(
+        self, start_date: datetime, limit: int = None, most_recent: bool = True
+    ) -> SeriesFrame:
+        """Columnar variant of _fetch_and_transform_data.
+
+        Streams cursor batches into preallocated arrays and parses all
+        timestamps in one vectorized pass, avoiding a dict per document.
 
         Args:
-            days: Number of days of historical data to fetch
-            downsample_hourly: If True, aggregate to hourly means (much faster training)
+            start_date: Fetch data from this date onwards
+            limit: Maximum number of documents to fetch
+            most_recent: If True, fetch most recent data when limit applies.
+                        Data is always returned in chronological order.
         """
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_date_iso = start_date.isoformat()
+        limit = limit or settings.MAX_QUERY_LIMIT
+        batch_size = settings.DATABASE_FETCH_BATCH_SIZE
 
-        if downsample_hourly:
-            data = await self._fetch_hourly_aggregated(start_date)
-            logger.info(
-                f"Fetched {len(data)} hourly data points for training (last {days} days)"
-            )
-        else:
-            data = await self._fetch_and_transform_data(start_date)
-            logger.info(
-                f"Fetched {len(data)} raw data points for training (last {days} days)"
+        sort_order = -1 if most_recent else 1
+        cursor = (
+            self.collection.find(
+                {
+                    "processingTimestamp": {"$gte": start_date_iso},
+                    "payload.ENERGY.Power": {"$exists": True},
+                },
+                {"processingTimestamp": 1, "payload.ENERGY.Power": 1, "_id": 0},
+                # Server-side limit from the request deadline (None outside requests)
+                max_time_ms=remaining_ms(),
             )
-        return data
+            .sort("processingTimestamp", sort_order)
+            .limit(limit)
+            .batch_size(batch_size)
+        )
 
-    async def _fetch_hourly_aggregated(
-        self, start_date: datetime
-    ) -> List[Dict[str, Any]]:
-        """Fetch data aggregated to hourly means using MongoDB aggregation.
+        raw_timestamps = np.empty(limit, dtype=object)
+        values = np.empty(limit, dtype=np.float64)
+        count = 0
+        skipped = 0
 
-        This dramatically reduces data volume (50k -> ~168 points for 7 days)
-        while preserving the patterns Prophet needs for forecasting.
-        """
-        start_date_iso = start_date.isoformat()
+        while count < limit:
+            try:
+                with span("db_query"):
+                    batch = await cursor.to_list(length=batch_size)
+            except ExecutionTimeout as e:
+                raise DeadlineExceededError("database query") from e
+            if not batch:
+                break
+            check_deadline("database fetch")
+            with span("db_transform"):
+                for doc in batch:
+                    try:
+                        raw_timestamps[count] = doc["processingTimestamp"]
+                        values[count] = doc["payload"]["ENERGY"]["Power"]
+                    except (KeyError, TypeError, ValueError):
+                        skipped += 1
+                        continue
+                    count += 1
+                    if count >= limit:
+                        break
+
+        with span("db_parse"):
+            frame, invalid = SeriesFrame.from_raw(raw_timestamps[:count], values[:count])
+        skipped += invalid
+        if skipped:
+            logger.warning(f"Skipped {skipped} malformed documents")
 
-        pipeline = [
-            # Filter to date range and ensure Power field exists
-            {
-                "$match": {
-                    "processingTimestamp": {"$gte": start_date_iso},
-                    "payload.ENERGY.Power": {"$exists": True},
-                }
-            },
-            # Parse timestamp and extract hour bucket
-            {
-                "$addFields": {
-                    "parsedTimestamp": {"$dateFromString": {"dateString": "$processingTimestamp"}},
-                }
-            },
-            {
-                "$addFields": {
-                    "hourBucket": {
-                        "$dateTrunc": {"date": "$parsedTimestamp", "unit": "hour"}
-                    }
-                }
-            },
-            # Group by hour and calculate mean power
-            {
-                "$group": {
-                    "_id": "$hourBucket",
-                    "avgPower": {"$avg": "$payload.ENERGY.Power"},
-                    "count": {"$sum": 1},
-                }
-            },
-            # Sort by timestamp ascending (Prophet requires chronological order)
-            {"$sort": {"_id": 1}},
-        ]
+        # Return in chronological order (Prophet requires ascending timestamps)
+        if most_recent:
+            frame = SeriesFrame(
+                timestamps=frame.timestamps[::-1].copy(), values=frame.values[::-1].copy()
+            )
 
-        cursor = self.collection.aggregate(pipeline)
-        raw_data = await cursor.to_list(length=None)
+        return frame
 
-        # Transform to expected format
-        data = []
-        for doc in raw_data:
-            if doc["_id"] is not None and doc["avgPower"] is not None:
-                data.append({
-                    "timestamp": doc["_id"],
-                    "value": doc["avgPower"],
-                })
+    async def get_training_snapshot(self, days: int = 7) -> TrainingSnapshot:
+        """Fetch the raw training window once for all training and tuning consumers.
 
-        return data
+        Rows cached on disk by the previous run are reused; only readings
+        newer than the last cached timestamp are queried.
+
+        Args:
+            days: Number of days of historical data in the window
+        """
+        async with self._snapshot_lock:
+            window_start = datetime.utcnow() - timedelta(days=days)
+            limit = settings.TRAINING_SNAPSHOT_MAX_POINTS
+
+            cached = self._snapshot_cache.load(window_start)
+            raw = None
+            if cached is not None and len(cached):
+                last = cached.timestamps[-1]
+                newer = await self._fetch_columnar(
+                    pd.Timestamp(last).to_pydatetime(), limit, most_recent=False
+                )
+                keep = newer.timestamps > last
+                new_rows = SeriesFrame(timestamps=newer.timestamps[keep], values=newer.values[keep])
+                if len(newer) < limit and len(cached) + len(new_rows) <= limit:
+                    raw = SeriesFrame(
+                        timestamps=np.concatenate([cached.timestamps, new_rows.timestamps]),
+                        values=np.concatenate([cached.values, new_rows.values]),
+                    )
+                    logger.info(
+                        f"Training snapshot: {len(cached)} cached + {len(new_rows)} new raw points"
+                    )
+
+            if raw is None:
+                raw = await self._fetch_columnar(window_start, limit)
+                logger.info(f"Training snapshot: fetched {len(raw)} raw points (last {days} days)")
+                if len(raw) >= limit:
+                    # Truncated to the newest rows: the snapshot (and the cache) only
+                    # covers the window from the first reading actually returned
+                    window_start = pd.Timestamp(raw.timestamps[0]).to_pydatetime()
+
+            snapshot = TrainingSnapshot.from_raw(raw, window_start)
+            self._snapshot_cache.save(snapshot.raw, window_start)
+            return snapshot
+
+    async def get_recent_data(
+        self, hours: int = 24, columnar: bool = False
+    ) -> Union[List[Dict[str, Any]], SeriesFrame]:
+        """Fetch recent data for anomaly detection.
 
-    async def get_recent_data(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """Fetch recent data for anomaly detection."""
+        Args:
+            hours: Number of hours of recent data to fetch
+            columnar: If True, return a SeriesFrame instead of records
+        """
         start_date = datetime.utcnow() - timedelta(hours=hours)
-        data = await self._fetch_and_transform_data(
-            start_date, min(settings.MAX_QUERY_LIMIT, 10000)
+        fetch = self._fetch_columnar if columnar else self._fetch_and_transform_data
+        data = await fetch(
+            start_date, min(settings.MAX_QUERY_LIMIT, settings.ANOMALY_RECENT_DATA_LIMIT)
         )
         logger.info(f"Fetched {len(data)} recent data points (last {hours} hours)")
         return data
 
-    async def get_data_age_days(self) -> float:
-        """Get the age of the oldest data point in days."""
+    async def get_data_since(self, since: datetime) -> Optional[SeriesFrame]:
+        """Fetch readings at or after a timestamp for incremental anomaly scoring.
+
+        Returns:
+            SeriesFrame in chronological order, or None if more readings than
+            the recent-data limit arrived (the caller should refetch the window)
+        """
+        limit = min(settings.MAX_QUERY_LIMIT, settings.ANOMALY_RECENT_DATA_LIMIT)
+        data = await self._fetch_columnar(since, limit)
+        if len(data) >= limit:
+            logger.info(f"More than {limit} readings since {since.isoformat()}, refetching window")
+            return None
+        logger.debug(f"Fetched {len(data)} new data points since {since.isoformat()}")
+        return data
+
+    @observe_query("refresh_catalog")
+    async def refresh_catalog(self) -> None:
+        """Refresh the dataset catalog (run in the background).
+
+        Only the training leader aggregates, and it publishes the result to
+        CATALOG_SHARED_FILE. The other workers adopt the published copy and
+        fall back to their own incremental refresh once it has gone stale.
+        """
+        loop = asyncio.get_event_loop()
+        path = Path(settings.MODEL_CACHE_DIR) / settings.CATALOG_SHARED_FILE
+        try:
+            if not cluster_coordinator.is_leader:
+                state = await loop.run_in_executor(None, DatasetCatalog.read_state, path)
+                if state is not None:
+                    self.catalog.restore(state)
+                if not self.catalog.is_loaded:
+                    # Nothing published yet; the leader refreshes as soon as it is elected
+                    return
+                stale_after = timedelta(
+                    seconds=SHARED_CATALOG_STALE_REFRESHES * settings.CATALOG_REFRESH_SECONDS
+                )
+                if datetime.utcnow() - self.catalog.refreshed_at < stale_after:
+                    return
+                logger.warning("Published dataset catalog is stale, refreshing locally")
+                await self.catalog.refresh(self.collection)
+                return
+
+            await self.catalog.refresh(self.collection)
+            await loop.run_in_executor(
+                None, DatasetCatalog.write_state, path, self.catalog.export_state()
+            )
+        except Exception as e:
+            logger.error(f"Failed to refresh dataset catalog: {e}")
+
+    async def _lookup_oldest(self) -> None:
+        """Read the oldest reading's timestamp into the catalog (one cheap indexed query)."""
+        # Shared by several requests, so no single request's deadline applies
+        clear_deadline()
         try:
             oldest_doc = await self.collection.find_one(
                 {"payload.ENERGY.Power": {"$exists": True}},
                 {"processingTimestamp": 1, "_id": 0},
                 sort=[("processingTimestamp", 1)]
             )
-
-            if not oldest_doc:
-                return 0.0
-
-            oldest_timestamp = datetime.fromisoformat(
-                oldest_doc["processingTimestamp"].replace("Z", "+00:00")
-            )
-            age = datetime.utcnow() - oldest_timestamp.replace(tzinfo=None)
-            return age.total_seconds() / (24 * 3600)
+            if oldest_doc:
+                self.catalog.note_oldest(oldest_doc["processingTimestamp"])
+            self._age_lookup_failed_at = None
         except Exception as e:
+            self._age_lookup_failed_at = time.monotonic()
             logger.error(f"Failed to get data age: {e}")
+
+    async def get_data_age_days(self) -> float:
+        """Get the age of the oldest data point in days.
+
+        Served from the dataset catalog. Until the background refresh has
+        loaded it, concurrent callers share one oldest-document lookup; after
+        a failed lookup they get 0.0 for AGE_LOOKUP_RETRY_SECONDS.
+        """
+        if self.catalog.is_loaded or self.catalog.oldest is not None:
+            return self.catalog.age_days
+        if (
+            self._age_lookup_failed_at is not None
+            and time.monotonic() - self._age_lookup_failed_at < AGE_LOOKUP_RETRY_SECONDS
+        ):
             return 0.0
+        if self._age_lookup is None or self._age_lookup.done():
+            self._age_lookup = asyncio.create_task(self._lookup_oldest())
+        # A caller that times out must not cancel the lookup the others wait on
+        await asyncio.shield(self._age_lookup)
+        return self.catalog.age_days
 
     async def has_sufficient_data(self) -> tuple[bool, float, int]:
         """
@@ -213,4 +397,5 @@ class DataService:
         return is_sufficient, days_available, days_required
 
 
+# Global singleton instance
 data_service = DataService()
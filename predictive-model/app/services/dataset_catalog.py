@@ -0,0 +1,275 @@
+"""In-memory catalog of what the sensor collection holds."""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.utils.series import SeriesFrame
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_timestamp(raw: str) -> datetime:
+    """Parse a stored processingTimestamp into a naive UTC datetime."""
+    timestamp = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _fromisoformat(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class DatasetCatalog:
+    """
+    Oldest/newest timestamps, hourly document counts and gaps of the collection.
+
+    Refreshed in the background: after the first full scan only the current
+    hour onward is re-aggregated, and the oldest timestamp is re-read once
+    every CATALOG_OLDEST_REFRESH_HOURS. The request path only reads plain
+    attributes, so sufficiency and health checks never touch MongoDB.
+    """
+
+    def __init__(self):
+        self.oldest: Optional[datetime] = None
+        self.newest: Optional[datetime] = None
+        # Hour bucket start (naive UTC) -> document count, ascending
+        self.hourly_counts: Dict[datetime, int] = {}
+        self.gaps: List[Tuple[datetime, datetime]] = []
+        self.refreshed_at: Optional[datetime] = None
+        self._oldest_checked_at: Optional[datetime] = None
+        # Newest hour counted by an aggregation; later hours may hold pushed counts
+        self._scanned_through: Optional[datetime] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    @property
+    def age_days(self) -> float:
+        """Age of the oldest reading in days (0 when the collection is empty)."""
+        if self.oldest is None:
+            return 0.0
+        return (datetime.utcnow() - self.oldest).total_seconds() / (24 * 3600)
+
+    def note_oldest(self, raw_timestamp: str) -> None:
+        """Record the oldest reading found outside a refresh (before the first one)."""
+        if self.oldest is None:
+            self.oldest = _parse_timestamp(raw_timestamp)
+
+    def count_since(self, start: datetime) -> int:
+        """Number of documents in hour buckets overlapping [start, now]."""
+        first_hour = start.replace(minute=0, second=0, microsecond=0)
+        return sum(count for hour, count in self.hourly_counts.items() if hour >= first_hour)
+
+    async def refresh(self, collection: Any) -> None:
+        """Re-aggregate hourly counts from the newest known hour onward.
+
+        Args:
+            collection: Motor collection holding the sensor measurements
+        """
+        now = datetime.utcnow()
+        window_start = (now - timedelta(days=settings.CATALOG_WINDOW_DAYS)).replace(
+            minute=0, second=0, microsecond=0
+        )
+
+        if self._oldest_checked_at is None or (
+            now - self._oldest_checked_at > timedelta(hours=settings.CATALOG_OLDEST_REFRESH_HOURS)
+        ):
+            oldest_doc = await collection.find_one(
+                {"payload.ENERGY.Power": {"$exists": True}},
+                {"processingTimestamp": 1, "_id": 0},
+                sort=[("processingTimestamp", 1)],
+            )
+            self.oldest = _parse_timestamp(oldest_doc["processingTimestamp"]) if oldest_doc else None
+            self._oldest_checked_at = now
+            if self.oldest is None:
+                # Empty collection: a later full scan picks up the first readings
+                self._scanned_through = None
+            elif self.hourly_counts and min(self.hourly_counts) < self.oldest.replace(
+                minute=0, second=0, microsecond=0
+            ):
+                # Old readings were removed (e.g. TTL index); rebuild from scratch
+                self._scanned_through = None
+
+        # Re-count the (possibly partial) last scanned hour and everything after it
+        if self._scanned_through is not None:
+            scan_from = max(self._scanned_through, window_start)
+        else:
+            scan_from = window_start
+        counts, newest_raw = await self._aggregate_hourly_counts(collection, scan_from)
+
+        hourly_counts = {
+            hour: count for hour, count in self.hourly_counts.items()
+            if window_start <= hour < scan_from
+        }
+        hourly_counts.update(counts)
+        self.hourly_counts = dict(sorted(hourly_counts.items()))
+        self._scanned_through = max(counts) if counts else scan_from
+        if newest_raw is not None:
+            newest = _parse_timestamp(newest_raw)
+            if self.newest is None or newest > self.newest:
+                self.newest = newest
+        if self.oldest is None and self.newest is not None:
+            self.oldest = min(self.hourly_counts)
+        self.gaps = self._find_gaps()
+        self.refreshed_at = now
+        logger.debug(
+            f"Dataset catalog refreshed from {scan_from.isoformat()}: "
+            f"{len(counts)} hours updated, {len(self.gaps)} gaps"
+        )
+
+    async def _aggregate_hourly_counts(
+        self, collection: Any, start: datetime
+    ) -> Tuple[Dict[datetime, int], Optional[str]]:
+        """Count documents per hour at or after start.
+
+        Returns:
+            Tuple of (hour -> count, newest raw processingTimestamp)
+        """
+        pipeline = [
+            {
+                "$match": {
+                    "processingTimestamp": {"$gte": start.isoformat()},
+                    "payload.ENERGY.Power": {"$exists": True},
+                }
+            },
+            {
+                "$group": {
+                    "_id": {
+                        "$dateTrunc": {
+                            "date": {"$dateFromString": {"dateString": "$processingTimestamp"}},
+                            "unit": "hour",
+                        }
+                    },
+                    "count": {"$sum": 1},
+                    "newest": {"$max": "$processingTimestamp"},
+                }
+            },
+        ]
+        cursor = collection.aggregate(pipeline)
+        raw = await cursor.to_list(length=None)
+
+        counts = {}
+        newest_raw = None
+        for doc in raw:
+            if doc["_id"] is None:
+                continue
+            hour = doc["_id"].replace(tzinfo=None)
+            counts[hour] = doc["count"]
+            if newest_raw is None or doc["newest"] > newest_raw:
+                newest_raw = doc["newest"]
+        return counts, newest_raw
+
+    def _find_gaps(self) -> List[Tuple[datetime, datetime]]:
+        """Runs of at least CATALOG_GAP_MIN_HOURS empty hours between tracked hours."""
+        if len(self.hourly_counts) < 2:
+            return []
+        hours = np.array(list(self.hourly_counts), dtype="datetime64[h]")
+        steps = np.diff(hours).astype(np.int64)
+        gap_after = np.flatnonzero(steps - 1 >= settings.CATALOG_GAP_MIN_HOURS)
+        return [
+            (
+                pd.Timestamp(hours[i] + 1).to_pydatetime(),
+                pd.Timestamp(hours[i + 1]).to_pydatetime(),
+            )
+            for i in gap_after
+        ]
+
+    def add_readings(self, frame: SeriesFrame) -> None:
+        """Fold pushed readings into the counts without a database round trip.
+
+        Buckets after the last aggregated hour are recounted by the next
+        background refresh, which keeps counts exact even if a reading is
+        seen both here and there.
+        """
+        if not len(frame):
+            return
+        hours, counts = np.unique(frame.timestamps.astype("datetime64[h]"), return_counts=True)
+        hourly_counts = dict(self.hourly_counts)
+        for hour, count in zip(hours, counts):
+            key = pd.Timestamp(hour).to_pydatetime()
+            hourly_counts[key] = hourly_counts.get(key, 0) + int(count)
+        self.hourly_counts = dict(sorted(hourly_counts.items()))
+
+        newest = pd.Timestamp(frame.timestamps[-1]).to_pydatetime()
+        if self.newest is None or newest > self.newest:
+            self.newest = newest
+        if self.oldest is None:
+            self.oldest = pd.Timestamp(frame.timestamps[0]).to_pydatetime()
+
+    def export_state(self) -> Dict[str, Any]:
+        """JSON-serializable state for the other workers (see restore)."""
+        return {
+            "oldest": _isoformat(self.oldest),
+            "newest": _isoformat(self.newest),
+            "hourly_counts": [[hour.isoformat(), count] for hour, count in self.hourly_counts.items()],
+            "refreshed_at": _isoformat(self.refreshed_at),
+            "oldest_checked_at": _isoformat(self._oldest_checked_at),
+            "scanned_through": _isoformat(self._scanned_through),
+        }
+
+    def restore(self, state: Dict[str, Any]) -> bool:
+        """Adopt a catalog exported by another worker if it is newer than this one.
+
+        Returns:
+            True if the state was adopted
+        """
+        refreshed_at = _fromisoformat(state.get("refreshed_at"))
+        if refreshed_at is None or (self.refreshed_at is not None and refreshed_at <= self.refreshed_at):
+            return False
+        self.oldest = _fromisoformat(state["oldest"])
+        self.newest = _fromisoformat(state["newest"])
+        self.hourly_counts = {datetime.fromisoformat(hour): count for hour, count in state["hourly_counts"]}
+        self._oldest_checked_at = _fromisoformat(state["oldest_checked_at"])
+        self._scanned_through = _fromisoformat(state["scanned_through"])
+        self.gaps = self._find_gaps()
+        self.refreshed_at = refreshed_at
+        return True
+
+    @staticmethod
+    def write_state(path: Path, state: Dict[str, Any]) -> None:
+        """Publish exported state; the file is replaced atomically."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+            tmp_path.write_text(json.dumps(state))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to publish dataset catalog: {e}")
+
+    @staticmethod
+    def read_state(path: Path) -> Optional[Dict[str, Any]]:
+        """State published by write_state, or None if there is none yet."""
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable dataset catalog file: {e}")
+            return None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Catalog summary for health checks."""
+        return {
+            "oldest": self.oldest.isoformat() if self.oldest else None,
+            "newest": self.newest.isoformat() if self.newest else None,
+            "days_available": round(self.age_days, 2),
+            "hours_tracked": len(self.hourly_counts),
+            "gaps": [
+                {"start": start.isoformat(), "end": end.isoformat()} for start, end in self.gaps
+            ],
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+        }
@@ -0,0 +1,141 @@
+"""Training-window snapshot shared by the training and tuning jobs."""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.utils.series import SeriesFrame
+
+logger = logging.getLogger(__name__)
+
+
+def resample_hourly(frame: SeriesFrame) -> SeriesFrame:
+    """Hourly means of a chronological series (one row per non-empty hour).
+
+    Equivalent to the ``$dateTrunc``/``$avg`` aggregation pipeline, computed
+    locally with one reduceat over the hour boundaries.
+    """
+    if not len(frame):
+        return SeriesFrame.empty()
+    hours = frame.timestamps.astype("datetime64[h]")
+    starts = np.flatnonzero(np.r_[True, hours[1:] != hours[:-1]])
+    sums = np.add.reduceat(frame.values, starts)
+    counts = np.diff(np.r_[starts, len(hours)])
+    return SeriesFrame(
+        timestamps=hours[starts].astype("datetime64[ns]"),
+        values=sums / counts,
+    )
+
+
+def _freeze(frame: SeriesFrame) -> SeriesFrame:
+    """Mark a frame's arrays read-only so consumers can share them safely."""
+    frame.timestamps.flags.writeable = False
+    frame.values.flags.writeable = False
+    return frame
+
+
+@dataclass(frozen=True)
+class TrainingSnapshot:
+    """
+    Raw readings of the training window plus their hourly resample.
+
+    Arrays are read-only and shared between the forecaster (hourly), the
+    anomaly detector (raw) and the tuner (hourly) without copies.
+    """
+
+    raw: SeriesFrame
+    hourly: SeriesFrame
+    window_start: datetime
+    fetched_at: datetime
+
+    @classmethod
+    def from_raw(cls, raw: SeriesFrame, window_start: datetime) -> "TrainingSnapshot":
+        return cls(
+            raw=_freeze(raw),
+            hourly=_freeze(resample_hourly(raw)),
+            window_start=window_start,
+            fetched_at=datetime.utcnow(),
+        )
+
+    def raw_tail(self, max_points: int) -> SeriesFrame:
+        """The newest max_points raw readings (a view, not a copy)."""
+        if len(self.raw) <= max_points:
+            return self.raw
+        return SeriesFrame(
+            timestamps=self.raw.timestamps[-max_points:], values=self.raw.values[-max_points:]
+        )
+
+
+class SnapshotCache:
+    """
+    On-disk cache of the raw training window as ``.npy`` files.
+
+    The next run loads the cached rows, drops the ones that left the window
+    and only fetches readings newer than the last cached timestamp.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the cache.
+
+        Args:
+            root: Directory holding timestamps.npy, values.npy and meta.json
+        """
+        self.root = Path(root)
+        self._memory: Optional[SeriesFrame] = None
+        self._memory_window_start: Optional[datetime] = None
+
+    def load(self, window_start: datetime) -> Optional[SeriesFrame]:
+        """Cached rows at or after window_start, if the cache covers that window.
+
+        Returns:
+            Chronological SeriesFrame, or None when the window must be fetched in full
+        """
+        if self._memory is None:
+            try:
+                meta = json.loads((self.root / "meta.json").read_text())
+                timestamps = np.load(self.root / "timestamps.npy")
+                values = np.load(self.root / "values.npy")
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable training snapshot cache: {e}")
+                return None
+            if len(timestamps) != meta.get("rows") or len(values) != len(timestamps):
+                logger.warning("Training snapshot cache is inconsistent, refetching")
+                return None
+            self._memory = SeriesFrame(timestamps=timestamps, values=values)
+            self._memory_window_start = datetime.fromisoformat(meta["window_start"])
+
+        # Rows before the cached window were never fetched
+        if self._memory_window_start > window_start:
+            return None
+        i = int(np.searchsorted(self._memory.timestamps, np.datetime64(window_start, "ns")))
+        return SeriesFrame(timestamps=self._memory.timestamps[i:], values=self._memory.values[i:])
+
+    def save(self, frame: SeriesFrame, window_start: datetime) -> None:
+        """Persist the window; files are replaced atomically, meta.json last."""
+        self._memory = frame
+        self._memory_window_start = window_start
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            for name, array in (("timestamps", frame.timestamps), ("values", frame.values)):
+                tmp_path = self.root / f"{name}.tmp-{os.getpid()}.npy"
+                np.save(tmp_path, array)
+                os.replace(tmp_path, self.root / f"{name}.npy")
+            meta = {
+                "window_start": window_start.isoformat(),
+                "rows": len(frame),
+                "saved_at": datetime.utcnow().isoformat(),
+            }
+            tmp_path = self.root / f"meta.tmp-{os.getpid()}.json"
+            tmp_path.write_text(json.dumps(meta))
+            os.replace(tmp_path, self.root / "meta.json")
+        except OSError as e:
+            logger.error(f"Failed to persist training snapshot: {e}")
@@ -2,5 +2,12 @@
 
 from app.tuning.cross_validation import TimeSeriesCrossValidator
 from app.tuning.hyperparameter_tuner import HyperparameterTuner
+from app.tuning.search import ExhaustiveSearch, SearchStrategy, SuccessiveHalving
 
-__all__ = ["TimeSeriesCrossValidator", "HyperparameterTuner"]
+__all__ = [
+    "TimeSeriesCrossValidator",
+    "HyperparameterTuner",
+    "SearchStrategy",
+    "ExhaustiveSearch",
+    "SuccessiveHalving",
+]
@@ -11,14 +11,19 @@ logger = logging.getLogger(__name__)
 
 class TimeSeriesCrossValidator:
     """
-    Expanding window cross-validator for time series data.
-
-    Unlike standard k-fold CV, this preserves temporal order:
-    - Fold 1: Train on [0:n], Validate on [n:n+1]
-    - Fold 2: Train on [0:n+1], Validate on [n+1:n+2]
-    - ...and so on
-
-    This prevents data leakage where future data would influence past predictions.
+    Calendar-anchored rolling window cross-validator for time series data.
+
+    Folds validate on the last complete calendar days (UTC midnight to
+    midnight) and train on a fixed number of whole days just before them:
+    - Fold 1: Train on days [d-k-n:d-n], Validate on day d-n
+    - Fold 2: Train on days [d-k-n+1:d-n+1], Validate on day d-n+1
+    - ...and so on, where d is the current (partial) day
+
+    Temporal order is preserved, so future data never influences past
+    predictions. Because boundaries sit on fixed calendar days rather than
+    on the first row of a sliding fetch window, a fold keeps exactly the
+    same rows on later runs until it ages out, and its stored tuning results
+    are reused; only folds over new days are refit.
     """
 
     def __init__(
@@ -32,7 +37,7 @@ class TimeSeriesCrossValidator:
 
         Args:
             n_splits: Number of cross-validation folds
-            min_train_days: Minimum days of training data for first fold
+            min_train_days: Minimum whole days of training data per fold
             validation_days: Days of data to use for each validation fold
         """
         self.n_splits = n_splits
@@ -59,41 +64,72 @@ class TimeSeriesCrossValidator:
         df[timestamp_col] = pd.to_datetime(df[timestamp_col])
         df = df.sort_values(timestamp_col).reset_index(drop=True)
 
-        min_date = df[timestamp_col].min()
-        max_date = df[timestamp_col].max()
-        total_days = (max_date - min_date).days
+        timestamps = df[timestamp_col].to_numpy(dtype="datetime64[ns]")
+        folds = self.fold_indices(timestamps)
+        for fold, (train_start, train_end, val_end) in enumerate(folds):
+            train_df = df.iloc[train_start:train_end].copy()
+            val_df = df.iloc[train_end:val_end].copy()
 
-        required_days = self.min_train_days + (self.n_splits * self.validation_days)
-        if total_days < required_days:
-            logger.warning(
-                f"Insufficient data for {self.n_splits} folds. "
-                f"Have {total_days} days, need {required_days}. "
-                f"Reducing number of splits."
+            logger.debug(
+                f"Fold {fold + 1}/{len(folds)}: "
+                f"Train={len(train_df)} points, Val={len(val_df)} points"
             )
-            self.n_splits = max(1, (total_days - self.min_train_days) // self.validation_days)
-
-        for fold in range(self.n_splits):
-            train_end_days = self.min_train_days + (fold * self.validation_days)
-            val_end_days = train_end_days + self.validation_days
+            yield train_df, val_df
 
-            train_end = min_date + timedelta(days=train_end_days)
-            val_end = min_date + timedelta(days=val_end_days)
+    def fold_indices(self, timestamps: np.ndarray) -> List[Tuple[int, int, int]]:
+        """
+        Compute fold boundaries once over a sorted timestamp array.
 
-            train_mask = df[timestamp_col] < train_end
-            val_mask = (df[timestamp_col] >= train_end) & (df[timestamp_col] < val_end)
+        Fold k trains on rows [train_start:train_end] and validates on
+        [train_end:val_end], so callers can slice shared arrays instead of
+        copying a DataFrame per fold. Boundaries fall on UTC midnights; the
+        partial first and current days are not used.
 
-            train_df = df[train_mask].copy()
-            val_df = df[val_mask].copy()
+        Args:
+            timestamps: Ascending datetime64 array (naive UTC)
 
-            if len(train_df) == 0 or len(val_df) == 0:
+        Returns:
+            List of (train_start, train_end, val_end) row indices, one per non-empty fold
+        """
+        if len(timestamps) == 0:
+            return []
+
+        timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        day = np.timedelta64(1, "D")
+        first_day = timestamps[0].astype("datetime64[D]")
+        if timestamps[0] > first_day:
+            first_day += day  # First complete day
+        current_day = timestamps[-1].astype("datetime64[D]")
+        total_days = int((current_day - first_day) // day)
+
+        n_splits = self.n_splits
+        required_days = self.min_train_days + (n_splits * self.validation_days)
+        if total_days < required_days:
+            logger.warning(
+                f"Insufficient data for {n_splits} folds. "
+                f"Have {total_days} complete days, need {required_days}. "
+                f"Reducing number of splits."
+            )
+            n_splits = max(1, (total_days - self.min_train_days) // self.validation_days)
+        # Every fold trains on the same number of days, so a fold's rows only
+        # depend on its validation day (stable while the fetch window is)
+        train_days = max(self.min_train_days, total_days - n_splits * self.validation_days)
+
+        def row(boundary: np.datetime64) -> int:
+            return int(np.searchsorted(timestamps, boundary.astype("datetime64[ns]")))
+
+        folds = []
+        for fold in range(n_splits):
+            val_start_day = current_day - (n_splits - fold) * self.validation_days * day
+            train_start = row(val_start_day - train_days * day)
+            train_end = row(val_start_day)
+            val_end = row(val_start_day + self.validation_days * day)
+
+            if train_end == train_start or val_end == train_end:
                 logger.warning(f"Fold {fold + 1}: Empty split, skipping")
                 continue
-
-            logger.debug(
-                f"Fold {fold + 1}/{self.n_splits}: "
-                f"Train={len(train_df)} points, Val={len(val_df)} points"
-            )
-            yield train_df, val_df
+            folds.append((train_start, train_end, val_end))
+        return folds
 
     def get_fold_info(self, data: pd.DataFrame, timestamp_col: str = "timestamp") -> List[dict]:
         """
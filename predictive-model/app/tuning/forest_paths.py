@@ -0,0 +1,68 @@
+"""Score Isolation Forest tree subsets from per-tree path lengths."""
+
+from typing import Union
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+EULER_GAMMA = 0.5772156649
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Expected path length of an unsuccessful BST search among n samples, c(n)."""
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    large = n > 2
+    result[large] = 2.0 * (np.log(n[large] - 1.0) + EULER_GAMMA) - 2.0 * (n[large] - 1.0) / n[large]
+    return result
+
+
+def tree_path_lengths(forest: IsolationForest, X: np.ndarray) -> np.ndarray:
+    """
+    Path length of every sample in every tree of a fitted forest.
+
+    Args:
+        forest: Fitted IsolationForest
+        X: Feature matrix the forest was fitted on (or new samples)
+
+    Returns:
+        Array of shape (n_trees, n_samples)
+    """
+    X = np.asarray(X, dtype=np.float32)
+    lengths = np.empty((len(forest.estimators_), X.shape[0]), dtype=np.float64)
+    for i, (tree, features) in enumerate(zip(forest.estimators_, forest.estimators_features_)):
+        X_tree = X[:, features]
+        leaves = tree.apply(X_tree)
+        depth = np.asarray(tree.decision_path(X_tree).sum(axis=1)).ravel() - 1.0
+        lengths[i] = depth + average_path_length(tree.tree_.n_node_samples[leaves])
+    return lengths
+
+
+def subset_score_samples(
+    cumulative_lengths: np.ndarray, n_trees: int, max_samples: int
+) -> np.ndarray:
+    """
+    score_samples of the forest made of its first n_trees trees.
+
+    With a fixed random_state, a forest fitted with fewer estimators grows
+    exactly these trees, so this equals fitting that smaller forest.
+
+    Args:
+        cumulative_lengths: np.cumsum(tree_path_lengths(...), axis=0)
+        n_trees: Number of leading trees in the subset
+        max_samples: The forest's max_samples_
+    """
+    denominator = n_trees * average_path_length(np.array([max_samples]))[0]
+    if denominator == 0:
+        return -np.ones(cumulative_lengths.shape[1])
+    return -(2.0 ** (-cumulative_lengths[n_trees - 1] / denominator))
+
+
+def decision_scores(score_samples: np.ndarray, contamination: Union[float, str]) -> np.ndarray:
+    """decision_function values for a contamination setting (only the offset differs)."""
+    if contamination == "auto":
+        offset = -0.5
+    else:
+        offset = np.percentile(score_samples, 100.0 * contamination)
+    return score_samples - offset
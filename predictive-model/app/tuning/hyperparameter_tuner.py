@@ -3,6 +3,7 @@
 import json
 import logging
 import os
+import time
 from datetime import datetime
 from itertools import product
 from pathlib import Path
@@ -10,12 +11,22 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from prophet import Prophet
 from sklearn.ensemble import IsolationForest
-from sklearn.metrics import mean_absolute_error
 
 from app.tuning.cross_validation import TimeSeriesCrossValidator
+from app.tuning.forest_paths import decision_scores, subset_score_samples, tree_path_lengths
+from app.config import settings
+from app.tuning.parallel import ProphetFoldEvaluator
+from app.tuning.result_store import TuningResultStore
+from app.tuning.search import (
+    PROPHET_SEARCH_SPACE,
+    SearchStrategy,
+    build_strategy,
+    grid_candidates,
+    random_candidates,
+)
 from app.utils.feature_extraction import extract_time_series_features
+from app.utils.series import SeriesData, as_dataframe, fingerprint_series
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +77,7 @@ class HyperparameterTuner:
         params_file: str = "best_params.json",
         cv_folds: int = 4,
         min_train_days: int = 3,
+        max_workers: Optional[int] = None,
     ):
         """
         Initialize the tuner.
@@ -74,95 +86,99 @@ class HyperparameterTuner:
             params_file: Path to save/load best parameters
             cv_folds: Number of cross-validation folds
             min_train_days: Minimum training days for first CV fold
+            max_workers: Processes for Prophet fits (None = TUNING_MAX_WORKERS)
         """
         self.params_file = Path(params_file)
         self.cv = TimeSeriesCrossValidator(
             n_splits=cv_folds,
             min_train_days=min_train_days,
         )
+        self.max_workers = max_workers
+        self.last_prophet_fits = 0
+        self.result_store = TuningResultStore(
+            str(self.params_file.with_name(settings.TUNING_RESULT_STORE_FILE)),
+            max_entries=settings.TUNING_RESULT_STORE_MAX_ENTRIES,
+        )
         self._best_params: Optional[Dict[str, Any]] = None
         self._tuning_history: List[Dict[str, Any]] = []
 
     def tune_prophet(
-        self, data: List[Dict[str, Any]], param_grid: Optional[Dict] = None
+        self,
+        data: SeriesData,
+        param_grid: Optional[Dict] = None,
+        strategy: Optional[SearchStrategy] = None,
+        deadline: Optional[float] = None,
     ) -> Tuple[Dict[str, Any], float]:
         """
-        Tune Prophet hyperparameters using grid search with CV.
+        Tune Prophet hyperparameters with time-series CV.
 
         Args:
-            data: Training data with 'timestamp' and 'value' keys
+            data: Training records with 'timestamp' and 'value' keys, or a SeriesFrame
             param_grid: Custom parameter grid (uses default if None)
+            strategy: Search strategy (built from TUNING_STRATEGY if None)
+            deadline: time.monotonic() value after which no new fits start
 
         Returns:
             Tuple of (best_params, best_mae)
         """
-        if param_grid is None:
-            param_grid = PROPHET_PARAM_GRID
-
-        df = pd.DataFrame(data)
+        if strategy is None:
+            strategy = build_strategy(settings.TUNING_STRATEGY, settings.TUNING_HALVING_ETA)
+        if param_grid is None and settings.TUNING_STRATEGY == "random":
+            candidates = random_candidates(PROPHET_SEARCH_SPACE, settings.TUNING_RANDOM_SAMPLES)
+        else:
+            candidates = grid_candidates(param_grid or PROPHET_PARAM_GRID)
+
+        df = as_dataframe(data)
         df = df.rename(columns={"timestamp": "ds", "value": "y"})
         if df["ds"].dt.tz is not None:
             df["ds"] = df["ds"].dt.tz_convert(None)
-
-        param_combinations = list(product(*param_grid.values()))
-        param_names = list(param_grid.keys())
-
-        best_params = DEFAULT_PROPHET_PARAMS.copy()
-        best_mae = float("inf")
-
-        total_combos = len(param_combinations)
-        logger.info(f"Starting Prophet tuning: {total_combos} parameter combinations")
-
-        for i, combo in enumerate(param_combinations):
-            params = dict(zip(param_names, combo))
-            fold_maes = []
-
-            try:
-                for train_df, val_df in self.cv.split(df, "ds"):
-                    # Prepare Prophet format
-                    train_prophet = train_df[["ds", "y"]].copy()
-                    val_prophet = val_df[["ds", "y"]].copy()
-
-                    # Train with current params
-                    model = Prophet(
-                        daily_seasonality=True,
-                        weekly_seasonality=True,
-                        yearly_seasonality=False,
-                        **params,
-                    )
-                    model.fit(train_prophet)
-
-                    # Predict on validation set
-                    forecast = model.predict(val_prophet[["ds"]])
-                    mae = mean_absolute_error(val_prophet["y"], forecast["yhat"])
-                    fold_maes.append(mae)
-
-                avg_mae = np.mean(fold_maes)
-
-                if avg_mae < best_mae:
-                    best_mae = avg_mae
-                    best_params = {**DEFAULT_PROPHET_PARAMS, **params}
-                    logger.info(f"New best Prophet params (MAE={best_mae:.2f}): {params}")
-
-                self._tuning_history.append({
-                    "model": "prophet",
-                    "params": params,
-                    "mae": avg_mae,
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-
-            except Exception as e:
-                logger.warning(f"Prophet combo {i + 1}/{total_combos} failed: {e}")
-                continue
-
-            if (i + 1) % 10 == 0:
-                logger.info(f"Prophet tuning progress: {i + 1}/{total_combos}")
-
-        logger.info(f"Prophet tuning complete. Best MAE: {best_mae:.2f}")
-        return best_params, best_mae
+        df = df.sort_values("ds", kind="stable")
+        ds = df["ds"].to_numpy(dtype="datetime64[ns]")
+        y = df["y"].to_numpy(dtype=float)
+
+        # Fold boundaries are computed once and shared by every candidate
+        folds = self.cv.fold_indices(ds)
+        if not folds:
+            logger.warning("No usable CV folds for Prophet tuning, keeping defaults")
+            return DEFAULT_PROPHET_PARAMS.copy(), float("inf")
+
+        with ProphetFoldEvaluator(
+            ds, y, folds, self.max_workers, store=self.result_store
+        ) as evaluator:
+            logger.info(
+                f"Starting Prophet tuning ({strategy.name}): {len(candidates)} candidates x "
+                f"{len(folds)} folds on {evaluator.max_workers} worker(s)"
+            )
+            ranked = strategy.search(evaluator, candidates, deadline)
+            self.last_prophet_fits = evaluator.fits
+
+        for candidate in ranked:
+            self._tuning_history.append({
+                "model": "prophet",
+                "params": candidate.params,
+                "mae": candidate.mean_mae,
+                "folds": len(candidate.fold_maes),
+                "timestamp": datetime.utcnow().isoformat(),
+            })
+
+        if not ranked:
+            logger.warning("Prophet tuning produced no result, keeping defaults")
+            return DEFAULT_PROPHET_PARAMS.copy(), float("inf")
+
+        best = ranked[0]
+        best_params = {**DEFAULT_PROPHET_PARAMS, **best.params}
+        logger.info(
+            f"Prophet tuning complete after {self.last_prophet_fits} fits "
+            f"({evaluator.cached} fold results reused). "
+            f"Best MAE: {best.mean_mae:.2f} with {best.params}"
+        )
+        return best_params, best.mean_mae
 
     def tune_isolation_forest(
-        self, data: List[Dict[str, Any]], param_grid: Optional[Dict] = None
+        self,
+        data: SeriesData,
+        param_grid: Optional[Dict] = None,
+        deadline: Optional[float] = None,
     ) -> Tuple[Dict[str, Any], float]:
         """
         Tune Isolation Forest hyperparameters.
@@ -171,8 +187,9 @@ class HyperparameterTuner:
         since we don't have labeled anomalies.
 
         Args:
-            data: Training data with 'timestamp' and 'value' keys
+            data: Training records with 'timestamp' and 'value' keys, or a SeriesFrame
             param_grid: Custom parameter grid (uses default if None)
+            deadline: time.monotonic() value after which no new fits start
 
         Returns:
             Tuple of (best_params, best_score)
@@ -180,56 +197,97 @@ class HyperparameterTuner:
         if param_grid is None:
             param_grid = ISOLATION_FOREST_PARAM_GRID
 
-        df = pd.DataFrame(data)
+        df = as_dataframe(data)
         features = extract_time_series_features(df)
+        data_hash = fingerprint_series(
+            df["timestamp"].to_numpy(dtype="datetime64[ns]"), df["value"].to_numpy(dtype=float)
+        )
 
-        param_combinations = list(product(*param_grid.values()))
         param_names = list(param_grid.keys())
+        combos = [dict(zip(param_names, combo)) for combo in product(*param_grid.values())]
+        total_combos = len(combos)
+
+        # Trees depend on neither contamination (it only sets offset_) nor on
+        # how many trees follow them, so one forest at the largest
+        # n_estimators per remaining parameter group scores every combo
+        groups: Dict[str, List[int]] = {}
+        for index, params in enumerate(combos):
+            tree_params = {
+                k: v for k, v in params.items() if k not in ("n_estimators", "contamination")
+            }
+            groups.setdefault(json.dumps(tree_params, sort_keys=True), []).append(index)
+
+        logger.info(
+            f"Starting Isolation Forest tuning: {total_combos} combinations "
+            f"from {len(groups)} forest fits"
+        )
 
-        best_params = DEFAULT_ISOLATION_FOREST_PARAMS.copy()
-        best_score = float("-inf")
-
-        total_combos = len(param_combinations)
-        logger.info(f"Starting Isolation Forest tuning: {total_combos} combinations")
-
-        for i, combo in enumerate(param_combinations):
-            params = dict(zip(param_names, combo))
+        scores: Dict[int, float] = {}
+        for group_index, group in enumerate(groups.values()):
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.info(
+                    f"Tuning time budget reached after {group_index}/{len(groups)} IF forests"
+                )
+                break
+
+            pending = []
+            for index in group:
+                cached = self.result_store.get(data_hash, "isolation_forest", combos[index])
+                if cached is not None:
+                    scores[index] = cached["score"]
+                else:
+                    pending.append(index)
+            if not pending:
+                continue
 
             try:
-                model = IsolationForest(
-                    random_state=42,
-                    n_jobs=-1,
-                    **params,
-                )
+                max_trees = max(combos[index].get("n_estimators", 100) for index in pending)
+                fit_params = {**combos[pending[0]], "n_estimators": max_trees}
+                model = IsolationForest(random_state=42, n_jobs=-1, **fit_params)
                 model.fit(features)
+                cumulative = np.cumsum(tree_path_lengths(model, features), axis=0)
+            except Exception as e:
+                logger.warning(f"IF forest {group_index + 1}/{len(groups)} failed: {e}")
+                continue
 
+            for index in pending:
+                params = combos[index]
                 # Use average path length as quality metric
                 # Higher (less negative) decision function = better normal point separation
-                scores = model.decision_function(features)
-                avg_score = np.mean(scores)
-
-                if avg_score > best_score:
-                    best_score = avg_score
-                    best_params = {**DEFAULT_ISOLATION_FOREST_PARAMS, **params}
-                    logger.info(
-                        f"New best IF params (score={best_score:.4f}): {params}"
-                    )
-
-                self._tuning_history.append({
-                    "model": "isolation_forest",
-                    "params": params,
-                    "score": avg_score,
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
+                score_samples = subset_score_samples(
+                    cumulative, params.get("n_estimators", 100), model.max_samples_
+                )
+                avg_score = float(
+                    np.mean(decision_scores(score_samples, params.get("contamination", "auto")))
+                )
+                scores[index] = avg_score
+                self.result_store.put(data_hash, "isolation_forest", params, {"score": avg_score})
 
-            except Exception as e:
-                logger.warning(f"IF combo {i + 1}/{total_combos} failed: {e}")
-                continue
+        best_params = DEFAULT_ISOLATION_FOREST_PARAMS.copy()
+        best_score = float("-inf")
 
+        # Select in grid order so ties resolve as the one-fit-per-combo search did
+        for index, params in enumerate(combos):
+            if index not in scores:
+                continue
+            avg_score = scores[index]
+            if avg_score > best_score:
+                best_score = avg_score
+                best_params = {**DEFAULT_ISOLATION_FOREST_PARAMS, **params}
+                logger.info(f"New best IF params (score={best_score:.4f}): {params}")
+
+            self._tuning_history.append({
+                "model": "isolation_forest",
+                "params": params,
+                "score": avg_score,
+                "timestamp": datetime.utcnow().isoformat(),
+            })
+
+        self.result_store.save()
         logger.info(f"Isolation Forest tuning complete. Best score: {best_score:.4f}")
         return best_params, best_score
 
-    def tune_all(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def tune_all(self, data: SeriesData) -> Dict[str, Any]:
         """
         Tune both models and save results.
 
@@ -241,8 +299,14 @@ class HyperparameterTuner:
         """
         logger.info("Starting full hyperparameter tuning...")
 
-        prophet_params, prophet_mae = self.tune_prophet(data)
-        if_params, if_score = self.tune_isolation_forest(data)
+        # Prophet fits dominate the cost; the rest of the budget is left for IF
+        budget = settings.TUNING_TIME_BUDGET_SECONDS
+        started = time.monotonic()
+        prophet_deadline = started + 0.8 * budget if budget > 0 else None
+        deadline = started + budget if budget > 0 else None
+
+        prophet_params, prophet_mae = self.tune_prophet(data, deadline=prophet_deadline)
+        if_params, if_score = self.tune_isolation_forest(data, deadline=deadline)
 
         self._best_params = {
             "prophet": prophet_params,
@@ -251,6 +315,9 @@ class HyperparameterTuner:
             "metrics": {
                 "prophet_mae": prophet_mae,
                 "isolation_forest_score": if_score,
+                "prophet_fits": self.last_prophet_fits,
+                "strategy": settings.TUNING_STRATEGY,
+                "duration_seconds": round(time.monotonic() - started, 1),
             },
         }
 
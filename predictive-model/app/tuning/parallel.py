@@ -0,0 +1,193 @@
+"""Process-parallel evaluation of Prophet (parameter set, CV fold) fits."""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.tuning.result_store import TuningResultStore
+from app.utils.series import fingerprint_series
+
+logger = logging.getLogger(__name__)
+
+# Training arrays and fold boundaries, set once per worker process
+_worker_data: Dict[str, Any] = {}
+
+
+def cpu_budget(max_workers: Optional[int] = None) -> int:
+    """
+    Number of worker processes tuning may use.
+
+    Args:
+        max_workers: Explicit worker count; defaults to TUNING_MAX_WORKERS,
+                     where 0 means all CPUs available to this process minus
+                     TUNING_RESERVED_CPUS (left for the API and training)
+    """
+    if max_workers is None:
+        max_workers = settings.TUNING_MAX_WORKERS
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available = os.cpu_count() or 1
+    if max_workers <= 0:
+        max_workers = available - settings.TUNING_RESERVED_CPUS
+    return max(1, min(max_workers, available))
+
+
+def _init_worker(ds: np.ndarray, y: np.ndarray, folds: List[Tuple[int, int, int]]) -> None:
+    _worker_data["ds"] = ds
+    _worker_data["y"] = y
+    _worker_data["folds"] = folds
+    # Per-fit cmdstanpy INFO lines would flood the parent's log
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+
+def _fit_fold(params: Dict[str, Any], fold: int) -> Tuple[Optional[float], Optional[str]]:
+    """Fit Prophet on one fold's training rows and score its validation rows.
+
+    Returns:
+        Tuple of (MAE, None) on success or (None, error message) on failure
+    """
+    from prophet import Prophet
+    from sklearn.metrics import mean_absolute_error
+
+    ds, y = _worker_data["ds"], _worker_data["y"]
+    train_start, train_end, val_end = _worker_data["folds"][fold]
+    try:
+        model = Prophet(
+            daily_seasonality=True,
+            weekly_seasonality=True,
+            yearly_seasonality=False,
+            **params,
+        )
+        model.fit(pd.DataFrame({"ds": ds[train_start:train_end], "y": y[train_start:train_end]}))
+        forecast = model.predict(pd.DataFrame({"ds": ds[train_end:val_end]}))
+        return float(mean_absolute_error(y[train_end:val_end], forecast["yhat"])), None
+    except Exception as e:
+        return None, str(e)
+
+
+class ProphetFoldEvaluator:
+    """
+    Evaluates (parameter set, fold) pairs on a pool of worker processes.
+
+    The series and fold boundaries are shipped to each worker once, at pool
+    start-up; tasks only carry the parameter dict and the fold index.
+    Results come back in task order regardless of completion order, so the
+    aggregation (and therefore the selected parameters) is deterministic.
+    With a result store, tasks already evaluated on identical fold data are
+    answered from it instead of refitting.
+    Use as a context manager; the pool is reused across evaluate() calls.
+    """
+
+    def __init__(
+        self,
+        ds: np.ndarray,
+        y: np.ndarray,
+        folds: List[Tuple[int, int, int]],
+        max_workers: Optional[int] = None,
+        store: Optional[TuningResultStore] = None,
+    ):
+        """
+        Initialize the evaluator.
+
+        Args:
+            ds: Ascending naive timestamps (datetime64[ns])
+            y: Observed values aligned with ds
+            folds: (train_start, train_end, val_end) indices from TimeSeriesCrossValidator.fold_indices
+            max_workers: Worker processes (see cpu_budget); 1 evaluates in-process
+            store: Persistent memo of earlier fold evaluations
+        """
+        self.ds = ds
+        self.y = y
+        self.folds = folds
+        self.max_workers = cpu_budget(max_workers)
+        self.store = store
+        self.fits = 0
+        self.cached = 0
+        # Content hash of each fold's train and validation rows
+        self.fold_hashes = [
+            fingerprint_series(ds[train_start:train_end], y[train_start:train_end])
+            + fingerprint_series(ds[train_end:val_end], y[train_end:val_end])
+            for train_start, train_end, val_end in folds
+        ]
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._started = False
+
+    def __enter__(self) -> "ProphetFoldEvaluator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self.store is not None:
+            self.store.save()
+
+    def _start(self) -> None:
+        """Start the workers on first use, so fully cached runs spawn nothing."""
+        if self._started:
+            return
+        self._started = True
+        if self.max_workers > 1:
+            # spawn: forking a process that runs threads (event loop, executors) is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.ds, self.y, self.folds),
+            )
+        else:
+            _init_worker(self.ds, self.y, self.folds)
+
+    def evaluate(self, tasks: List[Tuple[Dict[str, Any], int]]) -> List[Optional[float]]:
+        """
+        Fit and score each (params, fold) task.
+
+        Returns:
+            MAE per task in task order (None where the fit failed)
+        """
+        maes: List[Optional[float]] = [None] * len(tasks)
+        pending = []
+        for i, (params, fold) in enumerate(tasks):
+            cached = (
+                self.store.get(self.fold_hashes[fold], "prophet", params)
+                if self.store is not None
+                else None
+            )
+            if cached is not None:
+                maes[i] = cached["mae"]
+                self.cached += 1
+            else:
+                pending.append(i)
+        if not pending:
+            return maes
+
+        self._start()
+        if self._pool is None:
+            results = [_fit_fold(*tasks[i]) for i in pending]
+        else:
+            futures = [self._pool.submit(_fit_fold, *tasks[i]) for i in pending]
+            results = [future.result() for future in futures]
+
+        self.fits += len(pending)
+        for i, (mae, error) in zip(pending, results):
+            params, fold = tasks[i]
+            if error is not None:
+                logger.warning(f"Prophet fit failed on fold {fold + 1} with {params}: {error}")
+                continue
+            maes[i] = mae
+            if self.store is not None:
+                train_start, train_end, val_end = self.folds[fold]
+                self.store.put(
+                    self.fold_hashes[fold],
+                    "prophet",
+                    params,
+                    {"mae": mae, "train_size": train_end - train_start, "val_size": val_end - train_end},
+                )
+        return maes
@@ -0,0 +1,139 @@
+"""Persistent memo of tuning evaluations keyed by fold data and parameters."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def result_key(data_hash: str, model: str, params: Dict[str, Any]) -> str:
+    """Stable key for one evaluation of params on one fold's data."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(data_hash.encode())
+    digest.update(model.encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class TuningResultStore:
+    """
+    JSON-backed store of per-fold tuning metrics.
+
+    Entries are keyed by (fold train/validation data hash, model type,
+    parameter set), so an evaluation is only ever computed once for the same
+    data. The least recently used entries are evicted beyond max_entries.
+
+    The file is re-read when another process (the training worker) has
+    replaced it since it was loaded, as long as there are no unsaved local
+    changes. That process reports its lookups back via record_lookups.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        """
+        Initialize the store.
+
+        Args:
+            path: JSON file holding the entries
+            max_entries: Entries kept after eviction
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        # st_mtime_ns of the file the entries were read from (None: no file)
+        self._loaded_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        mtime = self._file_mtime()
+        if self._entries is None or (not self._dirty and mtime != self._loaded_mtime):
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except FileNotFoundError:
+                self._entries = {}
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable tuning result store: {e}")
+                self._entries = {}
+            self._loaded_mtime = mtime
+        return self._entries
+
+    def get(self, data_hash: str, model: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Stored metrics for an evaluation, or None (counted as hit/miss)."""
+        key = result_key(data_hash, model, params)
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["last_used"] = datetime.utcnow().isoformat()
+            self._dirty = True
+            return entry["metrics"]
+
+    def put(
+        self, data_hash: str, model: str, params: Dict[str, Any], metrics: Dict[str, Any]
+    ) -> None:
+        """Record the metrics of a finished evaluation."""
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._load()[result_key(data_hash, model, params)] = {
+                "model": model,
+                "params": params,
+                "metrics": metrics,
+                "stored_at": now,
+                "last_used": now,
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        """Evict beyond max_entries and write the store atomically."""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            if len(self._entries) > self.max_entries:
+                newest = sorted(
+                    self._entries.items(), key=lambda item: item[1]["last_used"], reverse=True
+                )
+                self._entries = dict(newest[:self.max_entries])
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+                tmp_path.write_text(json.dumps(self._entries, default=str))
+                os.replace(tmp_path, self.path)
+                self._loaded_mtime = self._file_mtime()
+                self._dirty = False
+            except OSError as e:
+                logger.error(f"Failed to save tuning result store: {e}")
+
+    def record_lookups(self, hits: int, misses: int) -> None:
+        """Count lookups another process made against the same file."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since start-up and the current entry count."""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = len(self._load())
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
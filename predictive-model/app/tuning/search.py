@@ -0,0 +1,203 @@
+"""Search strategies deciding which Prophet (params, fold) fits to run."""
+
+import abc
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.tuning.parallel import ProphetFoldEvaluator
+
+logger = logging.getLogger(__name__)
+
+# Continuous ranges for the random sampler: (low, high, log-scale) or choices
+PROPHET_SEARCH_SPACE = {
+    "changepoint_prior_scale": (0.001, 0.5, True),
+    "seasonality_prior_scale": (0.01, 10.0, True),
+    "seasonality_mode": ["additive", "multiplicative"],
+}
+
+
+@dataclass
+class Candidate:
+    """One parameter set and the fold MAEs measured for it so far."""
+
+    params: Dict[str, Any]
+    fold_maes: Dict[int, float] = field(default_factory=dict)
+    failed: bool = False
+
+    @property
+    def mean_mae(self) -> float:
+        if self.failed or not self.fold_maes:
+            return float("inf")
+        return float(np.mean([self.fold_maes[fold] for fold in sorted(self.fold_maes)]))
+
+
+def grid_candidates(param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of a parameter grid, in grid order."""
+    names = list(param_grid.keys())
+    return [dict(zip(names, combo)) for combo in product(*param_grid.values())]
+
+
+def random_candidates(
+    space: Dict[str, Any], n_samples: int, seed: int = 42
+) -> List[Dict[str, Any]]:
+    """Latin hypercube sample of parameter sets from continuous ranges.
+
+    Each range is split into n_samples equal strata (log-uniform where
+    flagged) and every stratum is drawn exactly once, so the samples reach
+    both ends of every range instead of clustering; choices are spread
+    evenly over the samples.
+    """
+    rng = random.Random(seed)
+    columns = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            column = [spec[i % len(spec)] for i in range(n_samples)]
+        else:
+            low, high, log_scale = spec
+            if log_scale:
+                low, high = math.log(low), math.log(high)
+            width = (high - low) / n_samples
+            column = []
+            for stratum in range(n_samples):
+                value = low + (stratum + rng.random()) * width
+                if log_scale:
+                    value = math.exp(value)
+                column.append(float(f"{value:.4g}"))
+        rng.shuffle(column)
+        columns[name] = column
+    return [{name: columns[name][i] for name in space} for i in range(n_samples)]
+
+
+def _past(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _evaluate(
+    evaluator: ProphetFoldEvaluator,
+    tasks: List[Tuple[Candidate, int]],
+    deadline: Optional[float],
+) -> bool:
+    """Run (candidate, fold) tasks in worker-sized batches, recording MAEs.
+
+    Returns:
+        False if the deadline stopped evaluation early
+    """
+    batch_size = max(1, evaluator.max_workers) * 2
+    for start in range(0, len(tasks), batch_size):
+        if _past(deadline):
+            return False
+        batch = tasks[start:start + batch_size]
+        maes = evaluator.evaluate([(candidate.params, fold) for candidate, fold in batch])
+        for (candidate, fold), mae in zip(batch, maes):
+            if mae is None:
+                candidate.failed = True
+            else:
+                candidate.fold_maes[fold] = mae
+    return True
+
+
+class SearchStrategy(abc.ABC):
+    """Base class: choose which fits to run and return the evaluated candidates."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def search(
+        self,
+        evaluator: ProphetFoldEvaluator,
+        candidates: List[Dict[str, Any]],
+        deadline: Optional[float] = None,
+    ) -> List[Candidate]:
+        """
+        Evaluate candidates on the evaluator's folds.
+
+        Args:
+            evaluator: Fold evaluator holding the series and fold boundaries
+            candidates: Parameter sets to consider, in priority order
+            deadline: time.monotonic() value after which no new fits start
+
+        Returns:
+            Candidates ranked best first (lowest mean MAE over the most folds)
+        """
+
+    @staticmethod
+    def rank(candidates: List[Candidate]) -> List[Candidate]:
+        """Order by folds evaluated (desc), then mean MAE; ties keep input order."""
+        usable = [c for c in candidates if c.fold_maes and not c.failed]
+        return sorted(usable, key=lambda c: (-len(c.fold_maes), c.mean_mae))
+
+
+class ExhaustiveSearch(SearchStrategy):
+    """Every candidate on every fold (the original grid search)."""
+
+    name = "grid"
+
+    def search(self, evaluator, candidates, deadline=None):
+        pool = [Candidate(params) for params in candidates]
+        tasks = [(c, fold) for c in pool for fold in range(len(evaluator.folds))]
+        if not _evaluate(evaluator, tasks, deadline):
+            logger.info("Tuning time budget reached during grid search")
+        complete = [c for c in pool if len(c.fold_maes) == len(evaluator.folds)]
+        return self.rank(complete or pool)
+
+
+class SuccessiveHalving(SearchStrategy):
+    """
+    Evaluate everything on the latest fold, then promote the best 1/eta.
+
+    Each round adds the next most recent fold for the surviving candidates
+    (earlier fold MAEs are reused) until every fold is covered, so clearly
+    bad parameter sets cost one fit instead of one per fold. At least eta
+    candidates reach the final round, so one unlucky fold cannot decide
+    the winner on its own.
+    """
+
+    name = "halving"
+
+    def __init__(self, eta: int = 2):
+        """
+        Args:
+            eta: Keep the best 1/eta of candidates after each round
+        """
+        self.eta = max(2, eta)
+
+    def search(self, evaluator, candidates, deadline=None):
+        n_folds = len(evaluator.folds)
+        survivors = [Candidate(params) for params in candidates]
+        evaluated = list(survivors)
+
+        # Latest fold first: most training data and the most recent validation day
+        for round_index, fold in enumerate(reversed(range(n_folds))):
+            tasks = [(c, fold) for c in survivors]
+            finished = _evaluate(evaluator, tasks, deadline)
+            survivors = [c for c in survivors if not c.failed and fold in c.fold_maes]
+            logger.info(
+                f"Successive halving round {round_index + 1}/{n_folds}: "
+                f"{len(tasks)} fits, best mean MAE "
+                f"{min((c.mean_mae for c in survivors), default=float('inf')):.2f}"
+            )
+            if not finished:
+                logger.info("Tuning time budget reached during successive halving")
+                break
+            if round_index == n_folds - 1 or len(survivors) <= 1:
+                break
+            keep = max(self.eta, math.ceil(len(survivors) / self.eta))
+            survivors = sorted(survivors, key=lambda c: c.mean_mae)[:keep]
+
+        return self.rank(evaluated)
+
+
+def build_strategy(name: str, eta: int = 2) -> SearchStrategy:
+    """Strategy for a TUNING_STRATEGY setting value ("grid", "halving" or "random")."""
+    if name == "grid":
+        return ExhaustiveSearch()
+    if name in ("halving", "random"):
+        return SuccessiveHalving(eta=eta)
+    raise ValueError(f"Unknown tuning strategy: {name}")
@@ -1,6 +1,16 @@
 """Shared utilities for the predictive model application."""
 
+from app.utils.deadline import check_deadline
 from app.utils.feature_extraction import extract_time_series_features
+from app.utils.series import SeriesData, SeriesFrame, as_dataframe, fingerprint_series
 from app.utils.validation import validate_range
 
-__all__ = ["extract_time_series_features", "validate_range"]
+__all__ = [
+    "check_deadline",
+    "extract_time_series_features",
+    "SeriesData",
+    "SeriesFrame",
+    "as_dataframe",
+    "fingerprint_series",
+    "validate_range",
+]
@@ -0,0 +1,77 @@
+"""Per-request deadline carried in a context variable.
+
+The timeout middleware sets the deadline; database queries derive their
+server-side time limit from it, and compute code checks it before starting
+and between chunks, so work for a request that has already timed out stops
+instead of competing with live requests.
+"""
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from app.exceptions import DeadlineExceededError
+
+# time.monotonic() value after which the current request's work is abandoned
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def set_deadline(timeout_seconds: float) -> Token:
+    """Start a deadline timeout_seconds from now; returns a token for reset_deadline."""
+    return _deadline.set(time.monotonic() + timeout_seconds)
+
+
+def reset_deadline(token: Token) -> None:
+    """Restore the deadline that was in effect before set_deadline."""
+    _deadline.reset(token)
+
+
+def clear_deadline() -> None:
+    """Run the rest of this context without a deadline.
+
+    For background jobs started from a request (BackgroundTasks inherit the
+    request's context, including its deadline).
+    """
+    _deadline.set(None)
+
+
+def get_deadline() -> Optional[float]:
+    """The current deadline (time.monotonic() based), or None outside a request."""
+    return _deadline.get()
+
+
+def remaining_seconds() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def remaining_ms() -> Optional[int]:
+    """Milliseconds left for a server-side time limit such as maxTimeMS.
+
+    Raises:
+        DeadlineExceededError: If the deadline has already passed
+    """
+    remaining = remaining_seconds()
+    if remaining is None:
+        return None
+    if remaining <= 0:
+        raise DeadlineExceededError("database query")
+    return max(1, int(remaining * 1000))
+
+
+def is_expired() -> bool:
+    remaining = remaining_seconds()
+    return remaining is not None and remaining <= 0
+
+
+def check_deadline(operation: str) -> None:
+    """Cooperative cancellation point for long-running work.
+
+    Raises:
+        DeadlineExceededError: If the current request's deadline has passed
+    """
+    if is_expired():
+        raise DeadlineExceededError(operation)
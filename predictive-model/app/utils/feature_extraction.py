@@ -3,6 +3,8 @@
 import numpy as np
 import pandas as pd
 
+from app.utils.deadline import check_deadline
+
 
 def extract_time_series_features(
     df: pd.DataFrame,
@@ -28,6 +30,7 @@ def extract_time_series_features(
     Returns:
         numpy array of extracted features
     """
+    check_deadline("feature extraction")
     features = pd.DataFrame()
 
     # Raw value
@@ -45,6 +48,8 @@ def extract_time_series_features(
     features["dow_sin"] = np.sin(2 * np.pi * timestamps.dt.dayofweek / 7)
     features["dow_cos"] = np.cos(2 * np.pi * timestamps.dt.dayofweek / 7)
 
+    check_deadline("feature extraction")
+
     # Rolling statistics (handle NaN at edges)
     features["rolling_mean"] = (
         df[value_column].rolling(window=rolling_window, min_periods=1).mean()
@@ -0,0 +1,110 @@
+"""Columnar time series container shared by the data service and models."""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class SeriesFrame:
+    """
+    Lightweight columnar time series.
+
+    Holds two aligned arrays instead of a list of ``{"timestamp", "value"}``
+    dicts, so large fetches avoid per-row Python objects.
+
+    Attributes:
+        timestamps: Naive UTC timestamps (``datetime64[ns]``), ascending
+        values: Power readings (``float64``)
+    """
+
+    timestamps: np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @classmethod
+    def empty(cls) -> "SeriesFrame":
+        """Create a frame with no rows."""
+        return cls(
+            timestamps=np.empty(0, dtype="datetime64[ns]"),
+            values=np.empty(0, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "SeriesFrame":
+        """Build a frame from a list of ``{"timestamp", "value"}`` dicts."""
+        if not records:
+            return cls.empty()
+        timestamps = pd.to_datetime([r["timestamp"] for r in records], utc=True)
+        return cls(
+            timestamps=timestamps.tz_convert(None).as_unit("ns").to_numpy(),
+            values=np.asarray([r["value"] for r in records], dtype=np.float64),
+        )
+
+    @classmethod
+    def from_raw(
+        cls, raw_timestamps: np.ndarray, values: np.ndarray
+    ) -> Tuple["SeriesFrame", int]:
+        """Build a frame from ISO-8601 timestamp strings and raw values.
+
+        All timestamps are parsed in one vectorized pass; rows with an
+        unparseable timestamp are dropped.
+
+        Returns:
+            Tuple of (frame, number of dropped rows)
+        """
+        timestamps = pd.to_datetime(raw_timestamps, utc=True, format="ISO8601", errors="coerce")
+        valid = ~timestamps.isna()
+        frame = cls(
+            timestamps=timestamps[valid].tz_convert(None).as_unit("ns").to_numpy(),
+            values=np.asarray(values, dtype=np.float64)[valid],
+        )
+        return frame, len(valid) - int(valid.sum())
+
+    def to_dataframe(
+        self, timestamp_column: str = "timestamp", value_column: str = "value"
+    ) -> pd.DataFrame:
+        """
+        Convert to a DataFrame matching the record-based format.
+
+        Timestamps are localized to UTC so downstream output is identical to
+        ``pd.DataFrame(records)`` built from timezone-aware datetimes.
+        """
+        return pd.DataFrame(
+            {
+                timestamp_column: pd.DatetimeIndex(self.timestamps).tz_localize("UTC"),
+                value_column: self.values,
+            }
+        )
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert to the list-of-dicts format used by the JSON-facing code."""
+        timestamps = pd.DatetimeIndex(self.timestamps).tz_localize("UTC")
+        return [
+            {"timestamp": ts.to_pydatetime(), "value": float(value)}
+            for ts, value in zip(timestamps, self.values)
+        ]
+
+
+# Anything the models accept as training/detection input
+SeriesData = Union[List[Dict[str, Any]], SeriesFrame]
+
+
+def as_dataframe(data: SeriesData) -> pd.DataFrame:
+    """Convert records or a SeriesFrame into a ``timestamp``/``value`` DataFrame."""
+    if isinstance(data, SeriesFrame):
+        return data.to_dataframe()
+    return pd.DataFrame(data)
+
+
+def fingerprint_series(timestamps: np.ndarray, values: np.ndarray) -> str:
+    """Stable content hash of a time series, used to identify training data."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(timestamps, dtype="datetime64[ns]").view(np.int64).tobytes())
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,83 @@
+"""Per-request stage timings reported in the Server-Timing header.
+
+The server-timing middleware starts a span list for each request; code on
+the request path wraps its stages in span(). Interactive compute lane tasks
+run in a copy of the request's context, so stages timed in the pool threads
+land in the same list. Outside a request span() only costs a context
+variable lookup.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# (stage name, seconds) pairs recorded for the current request
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "server_timing_spans", default=None
+)
+
+_INVALID_NAME_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def start_timing() -> Token:
+    """Collect spans for the rest of this context; returns a token for stop_timing."""
+    return _spans.set([])
+
+
+def stop_timing(token: Token) -> List[Tuple[str, float]]:
+    """Stop collecting and return the spans recorded since start_timing."""
+    spans = _spans.get() or []
+    _spans.reset(token)
+    return spans
+
+
+def record_span(name: str, seconds: float) -> None:
+    """Record an already measured stage (no-op outside a timed request)."""
+    spans = _spans.get()
+    if spans is not None:
+        # list.append is atomic, so pool threads can record concurrently
+        spans.append((name, seconds))
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as stage name of the current request."""
+    spans = _spans.get()
+    if spans is None:
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, time.perf_counter() - start_time))
+
+
+def timed_json_response(content: Any) -> JSONResponse:
+    """Encode a response body as FastAPI would, timed as the "encode" stage."""
+    with span("encode"):
+        return JSONResponse(jsonable_encoder(content))
+
+
+def server_timing_header(spans: List[Tuple[str, float]], total_seconds: float) -> str:
+    """Format spans as a Server-Timing header value.
+
+    Repeated stages (one per cursor batch, say) are summed into one entry
+    whose description carries the count. Durations are in milliseconds.
+    """
+    totals: Dict[str, List[float]] = {}
+    for name, seconds in spans:
+        entry = totals.setdefault(_INVALID_NAME_CHARS.sub("_", name), [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    metrics = []
+    for name, (seconds, count) in totals.items():
+        desc = f';desc="{count}x"' if count > 1 else ""
+        metrics.append(f"{name}{desc};dur={seconds * 1000:.2f}")
+    metrics.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ", ".join(metrics)
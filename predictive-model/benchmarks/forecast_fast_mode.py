@@ -0,0 +1,87 @@
+"""Compare forecast latency and interval drift: full Prophet predict vs fast mode.
+
+Trains one Prophet model on synthetic hourly data, then builds the same
+hourly grid (training window + MAX_FORECAST_HOURS) with each prediction path.
+
+Usage (from predictive-model/):
+    python -m benchmarks.forecast_fast_mode [--days 7] [--repeat 5]
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.models.forecaster import EnergyForecaster
+
+
+def synthetic_hourly(days: int, seed: int = 42) -> list:
+    """Daily + weekly pattern with noise, one point per hour."""
+    rng = np.random.default_rng(seed)
+    end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    idx = pd.date_range(end - timedelta(days=days), end, freq="h")
+    values = (
+        400
+        + 200 * np.sin(2 * np.pi * idx.hour / 24)
+        + 60 * (idx.dayofweek >= 5)
+        + rng.normal(0, 40, len(idx))
+    )
+    return [{"timestamp": t.to_pydatetime(), "value": float(v)} for t, v in zip(idx, values)]
+
+
+def time_path(forecaster: EnergyForecaster, grid: pd.DatetimeIndex, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = forecaster._predict_arrays(grid)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    forecaster = EnergyForecaster()
+    forecaster._persist_artifact = lambda *a, **k: None  # keep benchmarks off disk
+    forecaster.train(synthetic_hourly(args.days))
+
+    history = forecaster.model.history["ds"]
+    grid = pd.date_range(
+        history.min(), history.max() + pd.Timedelta(hours=settings.MAX_FORECAST_HOURS), freq="h"
+    )
+
+    paths = {
+        "full (1000 samples)": {"FORECAST_FAST_MODE": False},
+        "fast residual": {"FORECAST_FAST_MODE": True, "FORECAST_INTERVAL_METHOD": "residual"},
+        "fast sampled": {"FORECAST_FAST_MODE": True, "FORECAST_INTERVAL_METHOD": "sampled"},
+    }
+    results = {}
+    for name, overrides in paths.items():
+        for key, value in overrides.items():
+            setattr(settings, key, value)
+        results[name] = time_path(forecaster, grid, args.repeat)
+
+    base_latency, (base_yhat, base_lower, base_upper) = results["full (1000 samples)"]
+    base_width = np.mean(base_upper - base_lower)
+    print(f"{len(grid)} hourly points, median of {args.repeat} runs\n")
+    print(f"{'path':<22}{'latency ms':>12}{'speedup':>10}{'yhat drift':>12}{'bound drift':>13}")
+    for name, (latency, (yhat, lower, upper)) in results.items():
+        yhat_drift = np.mean(np.abs(yhat - base_yhat))
+        bound_drift = np.mean(np.abs(lower - base_lower) + np.abs(upper - base_upper)) / 2
+        print(
+            f"{name:<22}{latency * 1000:>12.1f}{base_latency / latency:>9.1f}x"
+            f"{yhat_drift:>12.2f}{bound_drift / base_width:>12.1%}"
+        )
+    print("\nbound drift is relative to the mean full-path interval width")
+
+
+if __name__ == "__main__":
+    main()
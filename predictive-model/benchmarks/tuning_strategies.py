@@ -0,0 +1,69 @@
+"""Compare Prophet tuning strategies: fits spent vs best cross-validated MAE.
+
+Runs the exhaustive grid, successive halving over the same grid and the
+random sampler on synthetic hourly data. Halving's winner has been scored on
+every fold, so its MAE is directly comparable to the grid optimum. Each
+strategy gets its own tuner with an empty result store in a temporary
+directory, so no strategy is served fold scores cached by an earlier one.
+
+Usage (from predictive-model/):
+    python -m benchmarks.tuning_strategies [--days 7] [--workers 0]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from app.config import settings
+from app.tuning.hyperparameter_tuner import HyperparameterTuner
+from app.tuning.search import ExhaustiveSearch, SuccessiveHalving
+from benchmarks.forecast_fast_mode import synthetic_hourly
+
+CV_FOLDS = 4
+
+
+def run(data: list, strategy, workers: int, random_sampler: bool = False):
+    settings.TUNING_STRATEGY = "random" if random_sampler else "halving"
+    with tempfile.TemporaryDirectory() as directory:
+        tuner = HyperparameterTuner(
+            params_file=os.path.join(directory, "best_params.json"),
+            cv_folds=CV_FOLDS,
+            max_workers=workers or None,
+        )
+        start = time.perf_counter()
+        params, mae = tuner.tune_prophet(data, strategy=strategy)
+        return tuner.last_prophet_fits, mae, time.perf_counter() - start, params
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=0, help="0 = CPU budget default")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    data = synthetic_hourly(args.days)
+
+    runs = {
+        "grid": run(data, ExhaustiveSearch(), args.workers),
+        "halving eta=2": run(data, SuccessiveHalving(eta=2), args.workers),
+        "halving eta=3": run(data, SuccessiveHalving(eta=3), args.workers),
+        f"random x{settings.TUNING_RANDOM_SAMPLES} + halving": run(
+            data, SuccessiveHalving(eta=settings.TUNING_HALVING_ETA), args.workers, random_sampler=True
+        ),
+    }
+
+    grid_fits, grid_mae, grid_time, _ = runs["grid"]
+    print(f"{len(data)} hourly points, {CV_FOLDS} CV folds\n")
+    print(f"{'strategy':<28}{'fits':>6}{'of grid':>9}{'best MAE':>10}{'vs grid':>9}{'time s':>8}")
+    for name, (fits, mae, elapsed, params) in runs.items():
+        print(
+            f"{name:<28}{fits:>6}{fits / grid_fits:>9.0%}{mae:>10.2f}"
+            f"{(mae - grid_mae) / grid_mae:>+9.1%}{elapsed:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.anomaly_detector import AnomalyDetector
+from app.utils.series import SeriesFrame
+
+START = datetime(2025, 1, 1)
+
+
+def readings(hours: int, seed: int = 3) -> SeriesFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(START, periods=hours * 4, freq="15min")
+    values = 300 + 150 * np.sin(2 * np.pi * np.asarray(idx.hour) / 24) + rng.normal(0, 15, len(idx))
+    values[::97] += 900  # A few spikes
+    return SeriesFrame(timestamps=idx.to_numpy(dtype="datetime64[ns]"), values=values)
+
+
+def head(frame: SeriesFrame, n: int) -> SeriesFrame:
+    return SeriesFrame(timestamps=frame.timestamps[:n], values=frame.values[:n])
+
+
+def tail(frame: SeriesFrame, n: int) -> SeriesFrame:
+    return SeriesFrame(timestamps=frame.timestamps[n:], values=frame.values[n:])
+
+
+@pytest.fixture
+def detector():
+    detector = AnomalyDetector()
+    detector._persist_artifact = lambda *args, **kwargs: None
+    detector.train(readings(72, seed=1).to_records())
+    detector.model_version = "v1"
+    return detector
+
+
+def detect(detector, data, resume, model_version="v1"):
+    return asyncio.run(
+        detector.detect_incremental_async(
+            data, START, sensitivity=0.9, resume=resume, model_version=model_version
+        )
+    )
+
+
+def test_incremental_scoring_matches_a_full_rescore(detector):
+    data = readings(48)
+    full = detect(detector, data, resume=False)
+    full_window = detector._score_incremental_sync(data, START, resume=False)
+
+    detector.invalidate_cache()
+    detect(detector, head(data, 100), resume=False)
+    for start in range(100, len(data), 37):
+        since = detector.resume_point(START)
+        assert since == pd.Timestamp(data.timestamps[start - 1]).to_pydatetime()
+        chunk = SeriesFrame(timestamps=data.timestamps[start:start + 37], values=data.values[start:start + 37])
+        incremental = detect(detector, chunk, resume=True)
+    incremental_window = detector._score_incremental_sync(SeriesFrame.empty(), START, resume=True, model_version="v1")
+
+    np.testing.assert_allclose(incremental_window.scores, full_window.scores)
+    np.testing.assert_array_equal(incremental_window.is_outlier, full_window.is_outlier)
+    assert incremental == full
+    assert full  # The spikes are found
+
+
+def test_retrain_between_resume_point_and_scoring_asks_for_a_full_rescore(detector):
+    data = readings(24)
+    detect(detector, head(data, 60), resume=False)
+    assert detector.resume_point(START) is not None
+    version = detector.model_version
+
+    # A retrain lands after resume_point() but before the new readings are scored
+    detector.invalidate_cache()
+    detector.model_version = "v2"
+    assert detect(detector, tail(data, 60), resume=True, model_version=version) is None
+
+    # Even before the new version is installed, the cleared store is detected
+    detector.invalidate_cache()
+    assert detect(detector, tail(data, 60), resume=True, model_version="v2") is None
+
+    rescored = detect(detector, data, resume=False, model_version=None)
+    assert rescored is not None
+    assert detector.resume_point(START) == pd.Timestamp(data.timestamps[-1]).to_pydatetime()
+
+
+def test_store_not_covering_the_window_cannot_be_resumed(detector):
+    data = readings(24)
+    detect(detector, data, resume=False)
+    earlier = START - timedelta(hours=1)
+    assert detector.resume_point(earlier) is None
+    result = asyncio.run(
+        detector.detect_incremental_async(SeriesFrame.empty(), earlier, resume=True, model_version="v1")
+    )
+    assert result is None
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from app.models.artifact_store import METADATA_FILE, ArtifactStore
+
+
+def write_text(content: str):
+    def write(path):
+        path.write_text(content)
+
+    return write
+
+
+def test_save_and_load_latest_round_trip(tmp_path):
+    store = ArtifactStore(str(tmp_path), retention=2)
+    store.save("forecaster", "20250101T000000000000Z", "model.json", write_text("old"), {"rows": 1})
+    store.save("forecaster", "20250102T000000000000Z", "model.json", write_text("new"), {"rows": 2})
+
+    artifact_path, metadata = store.load_latest("forecaster")
+
+    assert artifact_path.read_text() == "new"
+    assert metadata["rows"] == 2
+    assert metadata["version"] == "20250102T000000000000Z"
+    assert metadata["model_name"] == "forecaster"
+    assert store.load_latest("anomaly_detector") is None
+
+
+def test_retention_prunes_the_oldest_versions(tmp_path):
+    store = ArtifactStore(str(tmp_path), retention=2)
+    for day in range(1, 5):
+        store.save("forecaster", f"2025010{day}T000000000000Z", "model.json", write_text(str(day)), {})
+
+    assert store.list_versions("forecaster") == ["20250104T000000000000Z", "20250103T000000000000Z"]
+
+
+def test_corrupt_newest_version_falls_back_to_the_previous_one(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.save("forecaster", "20250101T000000000000Z", "model.json", write_text("good"), {})
+    newest = store.save("forecaster", "20250102T000000000000Z", "model.json", write_text("good"), {})
+    (newest / "model.json").write_text("tampered")
+
+    artifact_path, metadata = store.load_latest("forecaster")
+
+    assert metadata["version"] == "20250101T000000000000Z"
+    assert artifact_path.read_text() == "good"
+
+
+def test_unfinished_and_incompatible_versions_are_ignored(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.save("forecaster", "20250101T000000000000Z", "model.json", write_text("v1"), {})
+    newer = store.save("forecaster", "20250102T000000000000Z", "model.json", write_text("v2"), {})
+    metadata = json.loads((newer / METADATA_FILE).read_text())
+    (newer / METADATA_FILE).write_text(json.dumps({**metadata, "format_version": 0}))
+
+    def crash(path):
+        path.write_text("partial")
+        raise RuntimeError("killed mid-write")
+
+    with pytest.raises(RuntimeError):
+        store.save("forecaster", "20250103T000000000000Z", "model.json", crash, {})
+
+    assert store.list_versions("forecaster") == ["20250102T000000000000Z", "20250101T000000000000Z"]
+    assert store.load_latest("forecaster")[0].read_text() == "v1"
+    assert [p.name for p in (tmp_path / "forecaster").iterdir() if p.name.startswith(".")] == []
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import compute
+from app.exceptions import DeadlineExceededError, ResourceLimitError
+from app.models.base_model import BaseModelAsync
+from app.utils.deadline import check_deadline, get_deadline, set_deadline
+
+
+class SlowModel(BaseModelAsync):
+    model_name = "slow"
+
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def compute(self, value):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        check_deadline("slow compute")
+        return value * 2
+
+
+def test_concurrent_callers_share_one_flight():
+    model = SlowModel(0.05)
+
+    async def main():
+        return await asyncio.gather(*(model._coalesce("key", model.compute, 21) for _ in range(5)))
+
+    assert asyncio.run(main()) == [42] * 5
+    assert model.calls == 1
+
+
+def test_joiner_restarts_flight_abandoned_by_expired_starter():
+    model = SlowModel(0.2)
+
+    async def call(timeout_seconds: float):
+        set_deadline(timeout_seconds)
+        return await model._coalesce("key", model.compute, 21)
+
+    async def main():
+        starter = asyncio.ensure_future(call(0.05))
+        await asyncio.sleep(0.01)  # Let the starter's flight begin
+        joiner = asyncio.ensure_future(call(5.0))
+        return await asyncio.gather(starter, joiner, return_exceptions=True)
+
+    starter, joiner = asyncio.run(main())
+    assert isinstance(starter, DeadlineExceededError)
+    assert joiner == 42
+    assert model.calls == 2
+
+
+def test_saturated_lane_is_not_swallowed(monkeypatch):
+    model = SlowModel(0)
+
+    async def saturated(lane, fn, *args):
+        raise ResourceLimitError("interactive compute", "queue full", retry_after=1)
+
+    monkeypatch.setattr(compute.compute_scheduler, "run", saturated)
+
+    with pytest.raises(ResourceLimitError):
+        asyncio.run(model._coalesce("key", model.compute, 21))
+
+
+def test_expired_value_is_served_while_a_tracked_refresh_runs():
+    model = SlowModel(0.05)
+
+    async def main():
+        assert await model._stale_while_revalidate("key", model.compute, 1, max_age_seconds=60) == 2
+        model.expire_cache()
+        # Served stale; the refresh runs in the background and is kept referenced
+        assert await model._stale_while_revalidate("key", model.compute, 2, max_age_seconds=60) == 2
+        assert len(model._background_tasks) == 1
+        await asyncio.gather(*model._background_tasks)
+        assert not model._background_tasks
+        return await model._stale_while_revalidate("key", model.compute, 3, max_age_seconds=60)
+
+    assert asyncio.run(main()) == 4
+    assert model.calls == 2
+
+
+def test_background_refresh_runs_without_the_request_deadline():
+    model = SlowModel(0)
+    deadlines = []
+    revalidate = model._revalidate
+
+    async def recording_revalidate(*args, **kwargs):
+        deadlines.append(get_deadline())
+        return await revalidate(*args, **kwargs)
+
+    model._revalidate = recording_revalidate
+
+    async def main():
+        await model._stale_while_revalidate("key", model.compute, 1, max_age_seconds=60)
+        model.expire_cache()
+        set_deadline(0.02)
+        await model._stale_while_revalidate("key", model.compute, 2, max_age_seconds=60)
+        await asyncio.gather(*model._background_tasks)
+        return get_deadline()
+
+    assert asyncio.run(main()) is not None  # The request keeps its own deadline
+    assert deadlines == [None, None]
@@ -0,0 +1,152 @@
+import asyncio
+import itertools
+
+import numpy as np
+
+from app.config import settings
+from app.services.change_stream import ChangeStreamListener
+from app.services.data_service import documents_to_frame
+
+_ids = itertools.count()
+
+
+def reading(timestamp: str, power: float) -> dict:
+    return {"_id": next(_ids), "processingTimestamp": timestamp, "payload": {"ENERGY": {"Power": power}}}
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        value = doc[field]
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        if "$gte" in condition and not value >= condition["$gte"]:
+            return False
+        if "$nin" in condition and value in condition["$nin"]:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    async def find_one(self, query, projection, sort):
+        cursor = self.find(query, projection).sort(*sort[0])
+        return cursor.docs[0] if cursor.docs else None
+
+    def find(self, query, projection):
+        return FakeCursor([dict(doc) for doc in self.docs if matches(doc, query)])
+
+
+def test_polling_delivers_late_inserts_sharing_the_last_timestamp(monkeypatch):
+    monkeypatch.setattr(settings, "CHANGE_STREAM_POLL_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "CHANGE_STREAM_BATCH_SIZE", 2)
+    collection = FakeCollection([reading("2025-01-01T00:00:00", 1)])
+    listener = ChangeStreamListener()
+    received = []
+
+    async def subscriber(frame):
+        received.extend(frame.values.tolist())
+
+    listener.subscribe(subscriber)
+
+    async def main():
+        listener._collection = collection
+        task = asyncio.create_task(listener._poll())
+        await asyncio.sleep(0.05)
+        collection.docs.append(reading("2025-01-01T00:00:00", 2))  # Same timestamp as the newest
+        collection.docs += [reading("2025-01-01T00:00:05", 3), reading("2025-01-01T00:00:05", 4)]
+        await asyncio.sleep(0.05)
+        collection.docs.append(reading("2025-01-01T00:00:05", 5))
+        collection.docs.append(reading("2025-01-01T00:00:06", 6))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(main())
+    assert received == [2, 3, 4, 5, 6]
+
+
+class FakeStream:
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.resume_token = {"_data": "0"}
+        self.events = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def try_next(self):
+        if self.batches and self.batches[0]:
+            self.events += 1
+            self.resume_token = {"_data": str(self.events)}
+            return {"fullDocument": self.batches[0].pop(0)}
+        if self.batches:
+            self.batches.pop(0)
+        await asyncio.sleep(0.001)  # The server waits max_await_time_ms
+        self.resume_token = {"_data": f"{self.events}-idle"}  # Post-batch tokens advance while idle
+        return None
+
+
+def test_resume_token_is_persisted_off_loop_only_after_events(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CACHE_DIR", str(tmp_path))
+    stream = FakeStream([[reading("2025-01-01T00:00:00", 1), reading("2025-01-01T00:00:01", 2)], [], [], []])
+    collection = FakeCollection()
+    collection.watch = lambda *args, **kwargs: stream
+    listener = ChangeStreamListener()
+    saved = []
+    original = listener._save_resume_token
+
+    def recording_save(token):
+        saved.append(token)
+        original(token)
+
+    listener._save_resume_token = recording_save
+
+    async def main():
+        listener._collection = collection
+        task = asyncio.create_task(listener._watch())
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(main())
+    # One write for the batch (the token read after draining it); idle tokens are not persisted
+    assert saved == [{"_data": "2-idle"}]
+    assert listener._load_resume_token() == {"_data": "2-idle"}
+    assert [path.name for path in tmp_path.iterdir()] == [listener._token_path.name]
+
+
+
+def test_documents_to_frame_skips_malformed_documents_and_sorts():
+    docs = [
+        {"processingTimestamp": "2025-03-01T10:05:00Z", "payload": {"ENERGY": {"Power": 7}}},
+        {"processingTimestamp": "2025-03-01T10:00:00Z", "payload": {"ENERGY": {"Power": 5}}},
+        {"processingTimestamp": "2025-03-01T10:01:00Z", "payload": {"ENERGY": {}}},
+        {"processingTimestamp": "2025-03-01T10:02:00Z", "payload": None},
+        {"payload": {"ENERGY": {"Power": 9}}},
+    ]
+
+    frame = documents_to_frame(docs)
+
+    assert frame.values.tolist() == [5.0, 7.0]
+    assert np.all(np.diff(frame.timestamps) > np.timedelta64(0))
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.compute import ComputeLane
+from app.exceptions import DeadlineExceededError, ResourceLimitError
+from app.handlers.exceptions import setup_exception_handlers
+from app.utils.deadline import set_deadline
+
+
+def test_saturated_lane_rejects_new_work_until_it_drains():
+    lane = ComputeLane("interactive", max_workers=1, queue_limit=1)
+    release = threading.Event()
+
+    async def main():
+        blocked = [asyncio.ensure_future(lane.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ResourceLimitError) as rejected:
+            await lane.run(lambda: "late")
+        release.set()
+        await asyncio.gather(*blocked)
+        return rejected.value, await lane.run(lambda: "admitted")
+
+    error, result = asyncio.run(main())
+    lane.shutdown()
+    assert error.retry_after >= 1
+    assert result == "admitted"
+    metrics = lane.get_metrics()
+    assert (metrics["rejected"], metrics["completed"], metrics["queued"], metrics["running"]) == (1, 3, 0, 0)
+
+
+def test_only_deadline_enforcing_lanes_refuse_expired_requests():
+    interactive = ComputeLane("interactive", 1, 0, enforce_deadlines=True)
+    background = ComputeLane("background", 1, 0)
+
+    async def main():
+        set_deadline(-1)
+        with pytest.raises(DeadlineExceededError):
+            await interactive.run(lambda: "skipped")
+        return await background.run(lambda: "ran")
+
+    assert asyncio.run(main()) == "ran"
+    assert interactive.get_metrics()["expired"] == 1
+    interactive.shutdown()
+    background.shutdown()
+
+
+def test_rejection_is_served_as_429_with_retry_after():
+    lane = ComputeLane("interactive", max_workers=1, queue_limit=0)
+    lane.queue_limit, lane.running = 1, 2  # Saturated
+    app = FastAPI()
+    setup_exception_handlers(app)
+
+    @app.get("/work")
+    async def work():
+        return await lane.run(lambda: "done")
+
+    response = TestClient(app).get("/work")
+    lane.shutdown()
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["error_code"] == "RESOURCE_LIMIT_EXCEEDED"
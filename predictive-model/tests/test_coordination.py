@@ -0,0 +1,115 @@
+import asyncio
+
+from app.core import coordination
+from app.core.coordination import ClusterCoordinator, FileLease, LeaderLease
+from app.models.artifact_store import ArtifactStore
+
+
+def test_file_lease_is_held_by_one_process_at_a_time(tmp_path):
+    path = tmp_path / "trainer.lock"
+    first, second = FileLease("host:1", path), FileLease("host:2", path)
+
+    async def main():
+        assert await first.acquire()
+        assert await first.acquire()  # Renewal
+        assert not await second.acquire()
+        await first.release()
+        assert await second.acquire()
+        await second.release()
+
+    asyncio.run(main())
+    assert path.read_text() == "host:2\n"
+
+
+class FakeModel:
+    model_name = "forecaster"
+
+    def __init__(self, store: ArtifactStore, loadable: bool = True):
+        self.store = store
+        self.loadable = loadable
+        self.model_version = None
+        self.reload_attempts = 0
+
+    async def reload_artifact_async(self) -> bool:
+        self.reload_attempts += 1
+        if not self.loadable:
+            return False
+        self.model_version = self.store.list_versions(self.model_name)[0]
+        return True
+
+
+class HeldBy(LeaderLease):
+    def __init__(self, held: bool):
+        super().__init__("host:1")
+        self.held = held
+
+    async def acquire(self) -> bool:
+        return self.held
+
+
+def publish(store: ArtifactStore, version: str) -> None:
+    store.save("forecaster", version, "model.json", lambda path: path.write_text(version), {})
+
+
+def test_followers_reload_new_versions_and_leaders_do_not(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path))
+    monkeypatch.setattr(coordination, "artifact_store", store)
+    model = FakeModel(store)
+    events = []
+
+    async def on_elected():
+        events.append("elected")
+
+    async def on_demoted():
+        events.append("demoted")
+
+    async def on_reloaded(reloaded):
+        events.append(("reloaded", reloaded.model_version))
+
+    lease = HeldBy(False)
+    coordinator = ClusterCoordinator()
+    coordinator.configure(lease, [model], on_elected, on_demoted, on_reloaded)
+
+    async def main():
+        publish(store, "20250101T000000000000Z")
+        await coordinator._tick()
+        await coordinator._tick()  # Already serving the newest version
+        lease.held = True
+        publish(store, "20250102T000000000000Z")
+        await coordinator._tick()
+        lease.held = False
+        await coordinator._tick()
+
+    asyncio.run(main())
+    assert events == [
+        ("reloaded", "20250101T000000000000Z"),
+        "elected",
+        "demoted",
+        ("reloaded", "20250102T000000000000Z"),
+    ]
+    assert coordinator.reloads == 2
+    assert coordinator.get_status()["role"] == "follower"
+
+
+def test_a_version_that_fails_to_load_is_not_retried(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path))
+    monkeypatch.setattr(coordination, "artifact_store", store)
+    model = FakeModel(store, loadable=False)
+    coordinator = ClusterCoordinator()
+
+    async def noop(*args):
+        pass
+
+    coordinator.configure(HeldBy(False), [model], noop, noop, noop)
+
+    async def main():
+        publish(store, "20250101T000000000000Z")
+        for _ in range(3):
+            await coordinator._tick()
+        model.loadable = True
+        publish(store, "20250102T000000000000Z")
+        await coordinator._tick()
+
+    asyncio.run(main())
+    assert model.reload_attempts == 2
+    assert model.model_version == "20250102T000000000000Z"
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.tuning.cross_validation import TimeSeriesCrossValidator
+
+
+def hourly(start: datetime, hours: int) -> pd.DataFrame:
+    timestamps = pd.date_range(start, periods=hours, freq="h")
+    return pd.DataFrame({"timestamp": timestamps, "value": np.arange(hours, dtype=np.float64)})
+
+
+def test_folds_never_validate_on_data_before_their_training_rows():
+    data = hourly(datetime(2025, 1, 1, 13), 24 * 10)
+    folds = list(TimeSeriesCrossValidator(n_splits=4).split(data))
+
+    assert len(folds) == 4
+    previous_val_end = None
+    for train, val in folds:
+        assert len(train) and len(val)
+        assert train["timestamp"].max() < val["timestamp"].min()
+        if previous_val_end is not None:
+            assert val["timestamp"].min() > previous_val_end
+        previous_val_end = val["timestamp"].max()
+
+
+def test_short_data_reduces_the_folds_without_changing_the_setting():
+    cv = TimeSeriesCrossValidator(n_splits=4, min_train_days=3)
+    folds = list(cv.split(hourly(datetime(2025, 1, 1), 24 * 5 + 6)))
+
+    assert 1 <= len(folds) < 4
+    assert cv.n_splits == 4
+
+
+def fold_timestamps(data: pd.DataFrame, cv: TimeSeriesCrossValidator):
+    timestamps = data["timestamp"].to_numpy(dtype="datetime64[ns]")
+    return [
+        (timestamps[train_start:train_end].tolist(), timestamps[train_end:val_end].tolist())
+        for train_start, train_end, val_end in cv.fold_indices(timestamps)
+    ]
+
+
+def test_folds_validate_on_whole_utc_days():
+    data = hourly(datetime(2025, 1, 1, 13), 24 * 10)
+    cv = TimeSeriesCrossValidator(n_splits=4, min_train_days=3)
+
+    for train, val in fold_timestamps(data, cv):
+        assert len(val) == 24
+        assert pd.Timestamp(val[0]) == pd.Timestamp(val[0]).normalize()
+        assert pd.Timestamp(train[0]) == pd.Timestamp(train[0]).normalize()
+
+
+def test_folds_keep_their_rows_while_the_fetch_window_slides():
+    data = hourly(datetime(2025, 1, 1, 13), 24 * 10)
+    cv = TimeSeriesCrossValidator(n_splits=4, min_train_days=3)
+    folds = fold_timestamps(data, cv)
+
+    # Same day, window moved forward a few hours: every fold is unchanged
+    assert fold_timestamps(data.iloc[5:].reset_index(drop=True), cv) == folds
+
+    # A day later the oldest fold ages out and the others move up one place
+    next_day = pd.concat([data, hourly(data["timestamp"].iloc[-1] + timedelta(hours=1), 24)])
+    next_day = next_day.iloc[24:].reset_index(drop=True)
+    assert fold_timestamps(next_day, cv)[:-1] == folds[1:]
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.core.coordination import cluster_coordinator
+from app.services.data_service import DataService
+from app.services.dataset_catalog import DatasetCatalog
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class FakeCollection:
+    """Answers the catalog's oldest-reading lookup and hourly-count aggregation."""
+
+    def __init__(self, timestamps):
+        self.timestamps = sorted(timestamps)
+        self.aggregations = 0
+
+    async def find_one(self, query, projection, sort):
+        return {"processingTimestamp": self.timestamps[0]} if self.timestamps else None
+
+    def aggregate(self, pipeline):
+        self.aggregations += 1
+        start = pipeline[0]["$match"]["processingTimestamp"]["$gte"]
+        groups = {}
+        for raw in self.timestamps:
+            if raw < start:
+                continue
+            hour = datetime.fromisoformat(raw).replace(minute=0, second=0, microsecond=0)
+            group = groups.setdefault(hour, {"_id": hour, "count": 0, "newest": raw})
+            group["count"] += 1
+            group["newest"] = max(group["newest"], raw)
+        return FakeCursor(list(groups.values()))
+
+
+def readings(start, hours, per_hour=4):
+    return [
+        (start + timedelta(hours=h, minutes=15 * i)).isoformat()
+        for h in hours
+        for i in range(per_hour)
+    ]
+
+
+def test_refresh_counts_hours_and_finds_gaps():
+    start = (datetime.utcnow() - timedelta(hours=10)).replace(minute=0, second=0, microsecond=0)
+    collection = FakeCollection(readings(start, [0, 1, 2, 6, 8, 9]))
+    catalog = DatasetCatalog()
+
+    asyncio.run(catalog.refresh(collection))
+
+    assert catalog.count_since(start) == 24
+    assert catalog.count_since(start + timedelta(hours=8)) == 8
+    assert catalog.oldest == start
+    assert catalog.newest == start + timedelta(hours=9, minutes=45)
+    # Three empty hours count as a gap; the single empty hour 7 does not
+    assert catalog.gaps == [(start + timedelta(hours=3), start + timedelta(hours=6))]
+
+    # Later readings are picked up by an incremental refresh
+    collection.timestamps += readings(start, [10], per_hour=2)
+    asyncio.run(catalog.refresh(collection))
+    assert catalog.count_since(start) == 26
+
+
+def test_only_the_leader_aggregates_and_followers_adopt_its_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CACHE_DIR", str(tmp_path))
+    start = (datetime.utcnow() - timedelta(hours=5)).replace(minute=0, second=0, microsecond=0)
+    collection = FakeCollection(readings(start, range(5)))
+    leader, follower = DataService(), DataService()
+    for service in (leader, follower):
+        service._db = {settings.DATABASE_COLLECTION: collection}
+
+    # Nothing published yet: the follower waits for the leader instead of scanning
+    monkeypatch.setattr(cluster_coordinator, "is_leader", False)
+    asyncio.run(follower.refresh_catalog())
+    assert collection.aggregations == 0
+    assert not follower.catalog.is_loaded
+
+    monkeypatch.setattr(cluster_coordinator, "is_leader", True)
+    asyncio.run(leader.refresh_catalog())
+    assert collection.aggregations == 1
+
+    monkeypatch.setattr(cluster_coordinator, "is_leader", False)
+    asyncio.run(follower.refresh_catalog())
+    assert collection.aggregations == 1
+    assert follower.catalog.get_status() == leader.catalog.get_status()
+
+    # A stale published catalog (the leader stopped refreshing) is refreshed locally
+    path = tmp_path / settings.CATALOG_SHARED_FILE
+    stale = datetime.utcnow() - timedelta(seconds=10 * settings.CATALOG_REFRESH_SECONDS)
+    DatasetCatalog.write_state(path, {**DatasetCatalog.read_state(path), "refreshed_at": stale.isoformat()})
+    follower.catalog.refreshed_at = stale
+    asyncio.run(follower.refresh_catalog())
+    assert collection.aggregations == 2
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.models.forecaster import EnergyForecaster, ForecastTable
+
+
+def hourly_table(start: datetime, hours: int) -> ForecastTable:
+    ds = pd.date_range(start, periods=hours, freq="h").to_numpy(dtype="datetime64[ns]")
+    yhat = np.arange(hours, dtype=np.float64) - 2
+    return ForecastTable.from_arrays(ds=ds, yhat=yhat, lower=yhat - 1, upper=yhat + 1, built_at=start)
+
+
+def test_window_is_inclusive_and_binary_searched():
+    start = datetime(2025, 1, 1)
+    table = hourly_table(start, 48)
+
+    rows = table.window(start + timedelta(hours=10, minutes=30), start + timedelta(hours=13))
+
+    assert [row["timestamp"] for row in rows] == [
+        pd.Timestamp(start + timedelta(hours=h)) for h in (11, 12, 13)
+    ]
+    assert [row["predicted_power"] for row in rows] == [9.0, 10.0, 11.0]
+    assert table.window(start - timedelta(hours=5), start - timedelta(hours=1)) == []
+
+
+def test_covers_only_windows_inside_the_table():
+    start = datetime(2025, 1, 1)
+    table = hourly_table(start, 48)
+
+    assert table.covers(start, start + timedelta(hours=47))
+    assert not table.covers(start - timedelta(minutes=1), start + timedelta(hours=2))
+    assert not table.covers(start, start + timedelta(hours=47, minutes=1))
+    assert not ForecastTable.from_arrays(
+        np.empty(0, dtype="datetime64[ns]"), np.empty(0), np.empty(0), np.empty(0), start
+    ).covers(start, start)
+
+
+def test_negative_power_is_clipped_to_zero():
+    table = hourly_table(datetime(2025, 1, 1), 4)
+
+    assert [row["predicted_power"] for row in table.rows] == [0.0, 0.0, 0.0, 1.0]
+    assert [row["lower_bound"] for row in table.rows] == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_served_window_matches_a_direct_prediction():
+    rng = np.random.default_rng(3)
+    idx = pd.date_range(end=datetime.utcnow(), periods=24 * 7, freq="h")
+    values = 400 + 200 * np.sin(2 * np.pi * np.asarray(idx.hour) / 24) + rng.normal(0, 20, len(idx))
+    forecaster = EnergyForecaster()
+    forecaster._persist_artifact = lambda *args, **kwargs: None
+    forecaster.train([{"timestamp": t.to_pydatetime(), "value": float(v)} for t, v in zip(idx, values)])
+
+    served = asyncio.run(forecaster.predict_async(hours=6, past_context_hours=3))
+    direct = forecaster._predict_sync(6, past_context_hours=3)
+
+    assert [row["timestamp"] for row in served] == [row["timestamp"] for row in direct]
+    np.testing.assert_allclose(
+        [row["predicted_power"] for row in served], [row["predicted_power"] for row in direct]
+    )
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.config import settings
+from app.models.forecaster import EnergyForecaster
+
+
+@pytest.fixture(scope="module")
+def trained_forecaster():
+    rng = np.random.default_rng(7)
+    idx = pd.date_range(datetime(2025, 1, 1), periods=24 * 7, freq="h")
+    values = 400 + 200 * np.sin(2 * np.pi * idx.hour / 24) + rng.normal(0, 20, len(idx))
+    forecaster = EnergyForecaster()
+    forecaster._persist_artifact = lambda *args, **kwargs: None
+    forecaster.train([{"timestamp": t.to_pydatetime(), "value": float(v)} for t, v in zip(idx, values)])
+    return forecaster
+
+
+def test_fast_mode_is_opt_in():
+    assert settings.FORECAST_FAST_MODE is False
+
+
+@pytest.mark.parametrize("interval_method", ["residual", "sampled"])
+def test_fast_mode_point_forecast_matches_full_predict(trained_forecaster, monkeypatch, interval_method):
+    history_end = trained_forecaster.model.history["ds"].max()
+    grid = pd.date_range(history_end - timedelta(hours=12), history_end + timedelta(hours=24), freq="h")
+
+    monkeypatch.setattr(settings, "FORECAST_FAST_MODE", False)
+    full_yhat, full_lower, full_upper = trained_forecaster._predict_arrays(grid)
+    monkeypatch.setattr(settings, "FORECAST_FAST_MODE", True)
+    monkeypatch.setattr(settings, "FORECAST_INTERVAL_METHOD", interval_method)
+    fast_yhat, fast_lower, fast_upper = trained_forecaster._predict_arrays(grid)
+
+    np.testing.assert_allclose(fast_yhat, full_yhat, rtol=1e-9, atol=1e-6)
+    assert np.all(fast_lower <= fast_yhat) and np.all(fast_yhat <= fast_upper)
+    # Interval widths stay in the same range as Prophet's sampled ones
+    ratio = np.median(fast_upper - fast_lower) / np.median(full_upper - full_lower)
+    assert 0.5 < ratio < 2.0
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from app.tuning.forest_paths import decision_scores, subset_score_samples, tree_path_lengths
+
+
+@pytest.fixture(scope="module")
+def features():
+    rng = np.random.default_rng(5)
+    X = rng.normal(size=(600, 4))
+    X[:6] += 6  # A few outliers
+    return X
+
+
+@pytest.mark.parametrize("max_features", [0.5, 1.0])
+def test_tree_subsets_match_smaller_fitted_forests(features, max_features):
+    largest = IsolationForest(random_state=42, n_estimators=200, max_features=max_features).fit(features)
+    cumulative = np.cumsum(tree_path_lengths(largest, features), axis=0)
+
+    for n_estimators in (50, 100, 200):
+        score_samples = subset_score_samples(cumulative, n_estimators, largest.max_samples_)
+        for contamination in ("auto", 0.01, 0.02):
+            forest = IsolationForest(
+                random_state=42,
+                n_estimators=n_estimators,
+                max_features=max_features,
+                contamination=contamination,
+            ).fit(features)
+
+            np.testing.assert_allclose(score_samples, forest.score_samples(features))
+            np.testing.assert_allclose(
+                decision_scores(score_samples, contamination), forest.decision_function(features)
+            )
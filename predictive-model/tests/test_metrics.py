@@ -0,0 +1,65 @@
+import threading
+
+from app.core.metrics import MetricsRegistry, _render
+
+
+def registry_with_samples() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests served", ("route",))
+    latency = registry.histogram("latency_seconds", "Request latency", ("route",), buckets=(0.1, 1.0))
+    registry.callback("queue_depth", "Queued tasks", "gauge", ("lane",), lambda: {("interactive",): 3})
+
+    def serve():
+        for _ in range(500):
+            requests.inc("/forecast")
+
+    threads = [threading.Thread(target=serve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests.inc('/say "hi"\n', amount=2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/forecast")
+    return registry
+
+
+def test_render_sums_thread_cells_into_prometheus_text():
+    registry = registry_with_samples()
+
+    assert registry.render() == (
+        "# HELP requests_total Requests served\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/forecast"} 2000\n'
+        'requests_total{route="/say \\"hi\\"\\n"} 2\n'
+        "# HELP latency_seconds Request latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{route="/forecast",le="0.1"} 2\n'
+        'latency_seconds_bucket{route="/forecast",le="1"} 3\n'
+        'latency_seconds_bucket{route="/forecast",le="+Inf"} 4\n'
+        'latency_seconds_sum{route="/forecast"} 3.65\n'
+        'latency_seconds_count{route="/forecast"} 4\n'
+        "# HELP queue_depth Queued tasks\n"
+        "# TYPE queue_depth gauge\n"
+        f'queue_depth{{lane="interactive",pid="{registry.pid}"}} 3\n'
+    )
+
+
+def test_snapshots_of_several_workers_are_merged():
+    worker = registry_with_samples().snapshot()
+    peer = registry_with_samples().snapshot()
+    peer["pid"] = worker["pid"] + 1
+
+    text = _render([worker, peer])
+
+    assert 'requests_total{route="/forecast"} 4000\n' in text
+    assert 'latency_seconds_count{route="/forecast"} 8\n' in text
+    assert f'queue_depth{{lane="interactive",pid="{worker["pid"]}"}} 3\n' in text
+    assert f'queue_depth{{lane="interactive",pid="{peer["pid"]}"}} 3\n' in text
+
+
+def test_failing_callback_is_left_out():
+    registry = MetricsRegistry()
+    registry.callback("broken", "Raises", "gauge", (), lambda: 1 / 0)
+
+    assert registry.render() == "# HELP broken Raises\n# TYPE broken gauge\n"
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from app.core.profiler import SamplingProfiler
+
+
+def busy_work(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_samples_the_event_loop_thread():
+    async def main():
+        profiler = SamplingProfiler(0.001)
+        profiler.start()
+        busy_work(0.1)
+        await profiler.stop()
+        return profiler
+
+    profiler = asyncio.run(main())
+    assert not profiler._thread.is_alive()
+    assert profiler.sample_count > 0
+    assert "busy_work (test_profiler.py" in profiler.folded()
+
+
+def test_stop_does_not_block_the_event_loop():
+    async def main():
+        profiler = SamplingProfiler(0.001)
+        profiler.start()
+        join = profiler._thread.join
+        # A sampler thread that is slow to exit (e.g. mid-sample over many threads)
+        profiler._thread.join = lambda: (time.sleep(0.2), join())
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        before = ticks
+        await profiler.stop()
+        task.cancel()
+        return ticks - before
+
+    assert asyncio.run(main()) >= 5
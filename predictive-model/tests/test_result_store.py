@@ -0,0 +1,59 @@
+import os
+
+from app.tuning.result_store import TuningResultStore
+
+PARAMS = {"changepoint_prior_scale": 0.1, "seasonality_mode": "additive"}
+
+
+def test_round_trip_and_hit_miss_counts(tmp_path):
+    store = TuningResultStore(str(tmp_path / "results.json"))
+    assert store.get("fold-a", "prophet", PARAMS) is None
+    store.put("fold-a", "prophet", PARAMS, {"mae": 12.5})
+    store.save()
+
+    reloaded = TuningResultStore(str(tmp_path / "results.json"))
+    assert reloaded.get("fold-a", "prophet", dict(reversed(PARAMS.items()))) == {"mae": 12.5}
+    assert reloaded.get("fold-b", "prophet", PARAMS) is None
+    assert reloaded.get("fold-a", "isolation_forest", PARAMS) is None
+    stats = reloaded.get_stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_reloads_entries_written_by_another_process(tmp_path):
+    path = tmp_path / "results.json"
+    server = TuningResultStore(str(path))
+    assert server.get("fold-a", "prophet", PARAMS) is None
+
+    worker = TuningResultStore(str(path))
+    worker.put("fold-a", "prophet", PARAMS, {"mae": 9.0})
+    worker.save()
+    # Make the rewrite visible even on filesystems with coarse timestamps
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 10**9))
+
+    assert server.get("fold-a", "prophet", PARAMS) == {"mae": 9.0}
+
+
+def test_unsaved_local_entries_are_not_dropped_by_a_reload(tmp_path):
+    path = tmp_path / "results.json"
+    server = TuningResultStore(str(path))
+    server.put("fold-local", "prophet", PARAMS, {"mae": 1.0})
+
+    worker = TuningResultStore(str(path))
+    worker.put("fold-a", "prophet", PARAMS, {"mae": 9.0})
+    worker.save()
+
+    assert server.get("fold-local", "prophet", PARAMS) == {"mae": 1.0}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = TuningResultStore(str(tmp_path / "results.json"), max_entries=2)
+    for fold in ("a", "b", "c"):
+        store.put(fold, "prophet", PARAMS, {"mae": 1.0})
+    store.get("a", "prophet", PARAMS)
+    store.save()
+
+    reloaded = TuningResultStore(str(tmp_path / "results.json"))
+    assert reloaded.get("a", "prophet", PARAMS) is not None
+    assert reloaded.get("c", "prophet", PARAMS) is not None
+    assert reloaded.get("b", "prophet", PARAMS) is None
+    assert [p.name for p in tmp_path.iterdir()] == ["results.json"]
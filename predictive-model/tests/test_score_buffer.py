@@ -0,0 +1,56 @@
+import numpy as np
+
+from app.models.score_buffer import RollingScoreBuffer
+
+START = np.datetime64("2025-01-01T00:00", "ns")
+
+
+def points(first: int, n: int):
+    timestamps = START + np.arange(first, first + n) * np.timedelta64(1, "m")
+    values = np.arange(first, first + n, dtype=np.float64)
+    return timestamps, values, values / 10
+
+
+def test_appends_in_chunks_match_one_append_of_everything():
+    chunked, whole = RollingScoreBuffer(50), RollingScoreBuffer(50)
+    whole.append(*points(0, 130))
+    for first in range(0, 130, 17):
+        chunked.append(*points(first, min(17, 130 - first)))
+
+    for start in (START, START + np.timedelta64(100, "m")):
+        for got, expected in zip(chunked.window(start, 1000), whole.window(start, 1000)):
+            np.testing.assert_array_equal(got, expected)
+    assert len(chunked) == 50
+    assert chunked.window(START, 1000)[1].tolist() == list(range(80, 130))
+
+
+def test_append_ignores_points_already_stored():
+    buffer = RollingScoreBuffer(10)
+    buffer.append(*points(0, 5))
+    buffer.append(*points(3, 5))
+
+    assert buffer.window(START, 100)[1].tolist() == [0, 1, 2, 3, 4, 5, 6, 7]
+
+
+def test_window_caps_the_number_of_points():
+    buffer = RollingScoreBuffer(10)
+    buffer.append(*points(0, 10))
+
+    timestamps, values, scores = buffer.window(START + np.timedelta64(2, "m"), 3)
+
+    assert values.tolist() == [7, 8, 9]
+    assert scores.tolist() == [0.7, 0.8, 0.9]
+
+
+def test_coverage_moves_forward_as_old_points_are_dropped():
+    buffer = RollingScoreBuffer(10)
+    buffer.append(*points(0, 5))
+    buffer.covered_from = START
+    buffer.append(*points(5, 5))
+    assert buffer.covered_from == START
+
+    buffer.append(*points(10, 3))
+    assert buffer.covered_from == START + np.timedelta64(3, "m")
+
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.covered_from is None and buffer.last_timestamp is None
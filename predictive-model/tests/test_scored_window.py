@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.config import settings
+from app.models.anomaly_detector import AnomalyDetector, calculate_anomaly_threshold
+from app.utils.feature_extraction import extract_time_series_features
+
+
+def records(hours: int, seed: int):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(datetime(2025, 1, 1), periods=hours * 4, freq="15min", tz="UTC")
+    values = 300 + 150 * np.sin(2 * np.pi * np.asarray(idx.hour) / 24) + rng.normal(0, 15, len(idx))
+    values[::61] += 900
+    return [{"timestamp": t.to_pydatetime(), "value": float(v)} for t, v in zip(idx, values)]
+
+
+def reference_detect(detector, data, sensitivity):
+    """The per-row loop the vectorized classification replaced."""
+    df = pd.DataFrame(data)
+    features = extract_time_series_features(df)
+    predictions = detector.model.predict(features)
+    scores = detector.model.decision_function(features)
+    normalized = 1 - (scores - scores.min()) / (scores.max() - scores.min())
+    df["expected"] = df["value"].rolling(window=settings.ROLLING_WINDOW_SIZE, min_periods=1, center=True).mean()
+    threshold = calculate_anomaly_threshold(sensitivity, normalized)
+
+    anomalies = []
+    for i, (pred, score) in enumerate(zip(predictions, normalized)):
+        actual, expected = df.iloc[i]["value"], df.iloc[i]["expected"]
+        if pred == -1 and score > threshold and abs(actual - expected) >= settings.ANOMALY_MIN_POWER_DIFF:
+            if actual > expected * settings.ANOMALY_SPIKE_THRESHOLD:
+                anomaly_type = "spike"
+            elif actual < expected * settings.ANOMALY_DIP_THRESHOLD:
+                anomaly_type = "dip"
+            else:
+                anomaly_type = "pattern_change"
+            anomalies.append(
+                {
+                    "timestamp": df.iloc[i]["timestamp"],
+                    "actual_power": float(actual),
+                    "expected_power": float(expected),
+                    "anomaly_score": float(score),
+                    "anomaly_type": anomaly_type,
+                }
+            )
+    return anomalies
+
+
+@pytest.fixture(scope="module")
+def detector():
+    detector = AnomalyDetector()
+    detector._persist_artifact = lambda *args, **kwargs: None
+    detector.train(records(72, seed=1))
+    return detector
+
+
+@pytest.mark.parametrize("sensitivity", [0.2, 0.5, 0.8, 1.0])
+def test_vectorized_classification_matches_the_per_row_loop(detector, sensitivity):
+    data = records(48, seed=2)
+
+    detected = detector.detect(data, sensitivity=sensitivity)
+    expected = reference_detect(detector, data, sensitivity)
+
+    assert [a["timestamp"] for a in detected] == [a["timestamp"] for a in expected]
+    assert [a["anomaly_type"] for a in detected] == [a["anomaly_type"] for a in expected]
+    for name in ("actual_power", "expected_power", "anomaly_score"):
+        np.testing.assert_allclose([a[name] for a in detected], [a[name] for a in expected])
+
+
+def test_one_scored_window_serves_every_sensitivity(detector):
+    window = detector._score_sync(records(48, seed=2))
+
+    flagged = [len(window.classify(s)) for s in (0.2, 0.5, 0.8, 1.0)]
+
+    assert flagged == sorted(flagged)
+    assert flagged[-1] > 0
+    assert "spike" in {a["anomaly_type"] for a in window.classify(1.0)}
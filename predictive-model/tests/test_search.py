@@ -0,0 +1,61 @@
+import math
+
+import pytest
+
+from app.tuning.search import (
+    PROPHET_SEARCH_SPACE,
+    ExhaustiveSearch,
+    SearchStrategy,
+    SuccessiveHalving,
+    grid_candidates,
+    random_candidates,
+)
+
+
+class FakeEvaluator:
+    """Fold MAE = candidate's "quality" plus a per-fold offset; counts fits."""
+
+    def __init__(self, n_folds: int):
+        self.folds = list(range(n_folds))
+        self.max_workers = 2
+        self.fits = 0
+
+    def evaluate(self, tasks):
+        self.fits += len(tasks)
+        return [params["quality"] + fold for params, fold in tasks]
+
+
+def test_search_strategy_is_abstract():
+    with pytest.raises(TypeError):
+        SearchStrategy()
+
+
+def test_random_candidates_draw_every_stratum_of_each_range():
+    n_samples = 24
+    candidates = random_candidates(PROPHET_SEARCH_SPACE, n_samples)
+
+    for name, spec in PROPHET_SEARCH_SPACE.items():
+        values = [c[name] for c in candidates]
+        if isinstance(spec, list):
+            assert sorted(values) == sorted(spec * (n_samples // len(spec)))
+            continue
+        low, high, _ = spec
+        log_low, log_high = math.log(low), math.log(high)
+        strata = sorted(
+            min(n_samples - 1, int((math.log(v) - log_low) / (log_high - log_low) * n_samples))
+            for v in values
+        )
+        assert strata == list(range(n_samples))
+    assert random_candidates(PROPHET_SEARCH_SPACE, n_samples) == candidates
+
+
+def test_successive_halving_finds_the_grid_optimum_with_fewer_fits():
+    candidates = grid_candidates({"quality": [5.0, 1.0, 7.0, 3.0, 2.0, 9.0, 4.0, 8.0]})
+    grid_evaluator, halving_evaluator = FakeEvaluator(4), FakeEvaluator(4)
+
+    grid_best = ExhaustiveSearch().search(grid_evaluator, candidates)[0]
+    halving_ranked = SuccessiveHalving(eta=2).search(halving_evaluator, candidates)
+
+    assert halving_ranked[0].params == grid_best.params == {"quality": 1.0}
+    assert len(halving_ranked[0].fold_maes) == 4
+    assert halving_evaluator.fits < grid_evaluator.fits
@@ -0,0 +1,48 @@
+import numpy as np
+
+from app.utils.series import SeriesFrame
+
+
+def test_from_raw_parses_mixed_iso_timestamps_to_naive_utc():
+    raw = np.array(
+        [
+            "2025-03-01T10:00:00Z",
+            "2025-03-01T12:15:30.250000+02:00",
+            "2025-03-01T10:30:00",
+            "not a timestamp",
+            None,
+            "2025-03-01T11:00:00.5",
+        ],
+        dtype=object,
+    )
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+
+    frame, dropped = SeriesFrame.from_raw(raw, values)
+
+    assert dropped == 2
+    assert frame.timestamps.dtype == np.dtype("datetime64[ns]")
+    assert frame.timestamps.tolist() == np.array(
+        [
+            "2025-03-01T10:00:00",
+            "2025-03-01T10:15:30.250",
+            "2025-03-01T10:30:00",
+            "2025-03-01T11:00:00.500",
+        ],
+        dtype="datetime64[ns]",
+    ).tolist()
+    assert frame.values.tolist() == [1.0, 2.0, 3.0, 6.0]
+
+
+def test_from_raw_matches_the_record_path():
+    records = [
+        {"timestamp": "2025-03-01T10:00:00+00:00", "value": 1.5},
+        {"timestamp": "2025-03-01T10:00:15+00:00", "value": 2.5},
+    ]
+    frame, dropped = SeriesFrame.from_raw(
+        np.array([r["timestamp"] for r in records], dtype=object), [r["value"] for r in records]
+    )
+
+    assert dropped == 0
+    assert frame.to_records() == SeriesFrame.from_records(records).to_records()
+    assert frame.to_dataframe().equals(SeriesFrame.from_records(records).to_dataframe())
+
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.config import settings
+from app.services.data_service import DataService
+from app.utils.series import SeriesFrame
+
+
+def hourly_readings(start: datetime, hours: int) -> SeriesFrame:
+    timestamps = np.datetime64(start, "ns") + np.arange(hours) * np.timedelta64(1, "h")
+    return SeriesFrame(timestamps=timestamps, values=np.arange(hours, dtype=np.float64))
+
+
+def test_truncated_snapshot_starts_at_the_first_returned_reading(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TRAINING_SNAPSHOT_MAX_POINTS", 24)
+    service = DataService()
+    stored = hourly_readings(datetime.utcnow() - timedelta(days=3), 72)
+    fetches = []
+
+    async def fetch_columnar(start_date, limit=None, most_recent=True):
+        fetches.append(start_date)
+        keep = stored.timestamps >= np.datetime64(start_date, "ns")
+        timestamps, values = stored.timestamps[keep], stored.values[keep]
+        if most_recent:
+            timestamps, values = timestamps[-limit:], values[-limit:]
+        else:
+            timestamps, values = timestamps[:limit], values[:limit]
+        return SeriesFrame(timestamps=timestamps, values=values)
+
+    service._fetch_columnar = fetch_columnar
+
+    snapshot = asyncio.run(service.get_training_snapshot(days=7))
+    assert len(snapshot.raw) == 24
+    assert np.datetime64(snapshot.window_start, "ns") == stored.timestamps[-24]
+
+    # The cache does not claim the unfetched part of the window, so the next run refetches it
+    asyncio.run(service.get_training_snapshot(days=7))
+    assert len(fetches) == 2
+    assert fetches[1] < snapshot.window_start